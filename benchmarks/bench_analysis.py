@@ -0,0 +1,266 @@
+"""
+Headless throughput and memory benchmark for zenpad.analysis.
+
+Every function runs against synthetic corpora (access logs, nested JSON,
+deep XML, binary-ish text) at the requested sizes. Each result records
+MB/s and the peak memory allocated by one call, and every output is
+checked so a function silently returning nothing fails the run.
+
+Usage:
+    python benchmarks/bench_analysis.py                      # 1KB and 1MB
+    python benchmarks/bench_analysis.py --sizes 1KB,1MB,100MB,1GB
+    python benchmarks/bench_analysis.py --save benchmarks/baseline_analysis.json
+    python benchmarks/bench_analysis.py --compare benchmarks/baseline_analysis.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from zenpad import analysis
+
+SIZES = {
+    "1KB": 1024,
+    "1MB": 1024 ** 2,
+    "100MB": 100 * 1024 ** 2,
+    "1GB": 1024 ** 3,
+}
+DEFAULT_SIZES = "1KB,1MB"
+
+# Corpora are built by repeating a block of this many bytes of random records
+UNIT_SIZE = 64 * 1024
+# Timed calls stop after this many seconds per function and corpus
+TIME_BUDGET = 1.0
+MAX_CALLS = 1000
+
+
+def _log_line(rng):
+    ip = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+    path = "/" + "/".join(rng.choice(["api", "static", "img", "v2", "users", "search"]) for _ in range(rng.randint(1, 4)))
+    return (
+        f'{ip} - - [10/Oct/2024:13:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} +0000] '
+        f'"{rng.choice(["GET", "POST", "PUT"])} {path}?id={rng.randint(1, 99999)} HTTP/1.1" '
+        f'{rng.choice([200, 200, 200, 301, 404, 500])} {rng.randint(0, 50000)} '
+        f'"https://example.com/" "Mozilla/5.0 (X11; Linux x86_64) bench/{rng.randint(1, 9)}"'
+    )
+
+
+def _json_record(rng, depth=4):
+    record = {
+        "id": rng.randint(1, 10 ** 6),
+        "name": f"item-{rng.randint(1, 10 ** 6)}",
+        "active": rng.random() < 0.5,
+        "score": round(rng.random() * 100, 3),
+        "tags": [rng.choice(["a", "b", "c", "d"]) for _ in range(3)],
+    }
+    if depth:
+        record["child"] = _json_record(rng, depth - 1)
+    return json.dumps(record)
+
+
+def _xml_record(rng, depth=16):
+    opening = "".join(f'<level{i} n="{i}">' for i in range(depth))
+    closing = "".join(f"</level{i}>" for i in reversed(range(depth)))
+    return f"<item id=\"{rng.randint(1, 10 ** 6)}\">{opening}value {rng.random():.6f}{closing}</item>"
+
+
+def _binary_chunk(rng):
+    # Printable runs mixed with control bytes, as in a dumped binary
+    chars = []
+    while len(chars) < 256:
+        if rng.random() < 0.3:
+            chars.extend(chr(rng.randint(0, 31)) for _ in range(rng.randint(1, 8)))
+        else:
+            chars.extend(chr(rng.randint(32, 126)) for _ in range(rng.randint(4, 32)))
+    return "".join(chars)
+
+
+# kind: (record generator, separator, head, tail)
+CORPORA = {
+    "access_log": (_log_line, "\n", "", "\n"),
+    "nested_json": (_json_record, ",\n", "[", "]"),
+    "deep_xml": (_xml_record, "\n", "<?xml version=\"1.0\"?>\n<root>", "</root>"),
+    "binaryish": (_binary_chunk, "", "", ""),
+}
+
+
+def make_corpus(kind, size, seed=0):
+    """
+    Builds a deterministic, well-formed document of about size bytes by
+    repeating a block of random records.
+    """
+    generate, separator, head, tail = CORPORA[kind]
+    rng = random.Random(seed)
+
+    records = []
+    length = 0
+    limit = min(size, UNIT_SIZE)
+    while length < limit or not records:
+        record = generate(rng)
+        records.append(record)
+        length += len(record) + len(separator)
+        if length >= size:
+            break
+    unit = separator.join(records)
+
+    repeats = max(1, size // (len(unit) + len(separator)))
+    body = separator.join([unit] * repeats)
+    return head + body + tail
+
+
+def _ok_tuple(result):
+    return result[0] and bool(result[1])
+
+
+# name: (callable, corpus kinds, output check)
+FUNCTIONS = {
+    "format_json": (analysis.format_json, ("nested_json",), _ok_tuple),
+    "format_xml": (analysis.format_xml, ("deep_xml",), _ok_tuple),
+    "convert_to_json": (analysis.convert_to_json, ("access_log",), _ok_tuple),
+    "detect_language_by_content": (
+        analysis.detect_language_by_content,
+        ("access_log", "nested_json", "deep_xml", "binaryish"),
+        lambda result: result is None or isinstance(result, str),
+    ),
+    "generate_hex_dump": (
+        analysis.generate_hex_dump,
+        ("binaryish",),
+        lambda result: isinstance(result, str) and result.startswith("00000000  "),
+    ),
+    "calculate_hashes": (
+        analysis.calculate_hashes,
+        ("access_log", "binaryish"),
+        lambda result: len(result) == 4,
+    ),
+    "transform_text:base64_enc": (
+        lambda text: analysis.transform_text(text, "base64_enc"),
+        ("binaryish",),
+        _ok_tuple,
+    ),
+    "transform_text:url_enc": (
+        lambda text: analysis.transform_text(text, "url_enc"),
+        ("access_log",),
+        _ok_tuple,
+    ),
+}
+
+
+def measure(function, text):
+    """Returns (best seconds per call, peak bytes allocated, last result)."""
+    best = None
+    calls = 0
+    started = time.perf_counter()
+    while calls < MAX_CALLS:
+        start = time.perf_counter()
+        result = function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        calls += 1
+        if time.perf_counter() - started >= TIME_BUDGET:
+            break
+    # Separate run: tracemalloc slows calls down considerably
+    del result
+    tracemalloc.start()
+    result = function(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def run(sizes, only=None):
+    results = {}
+    failures = []
+    for size_name in sizes:
+        corpora = {}
+        for name, (function, kinds, check) in FUNCTIONS.items():
+            if only and name not in only:
+                continue
+            for kind in kinds:
+                if kind not in corpora:
+                    corpora[kind] = make_corpus(kind, SIZES[size_name])
+                text = corpora[kind]
+                # Corpora are pure ASCII: one character per byte
+                megabytes = len(text) / 1024 ** 2
+
+                seconds, peak, result = measure(function, text)
+                key = f"{name}/{kind}/{size_name}"
+                results[key] = {
+                    "mb_per_s": round(megabytes / seconds, 3) if seconds else None,
+                    "peak_mb": round(peak / 1024 ** 2, 3),
+                    "seconds": round(seconds, 6),
+                }
+                if not check(result):
+                    failures.append(key)
+                print(f"{key:60} {results[key]['mb_per_s']:>10} MB/s {results[key]['peak_mb']:>10} MB peak", flush=True)
+        corpora.clear()
+    return results, failures
+
+
+def compare(results, baseline, threshold):
+    """Returns (key, metric, baseline value, current value) for every regression."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if previous["mb_per_s"] and current["mb_per_s"] < previous["mb_per_s"] * (1 - threshold):
+            regressions.append((key, "mb_per_s", previous["mb_per_s"], current["mb_per_s"]))
+        # Ignore noise on tiny allocations
+        if current["peak_mb"] > max(previous["peak_mb"] * (1 + threshold), previous["peak_mb"] + 0.1):
+            regressions.append((key, "peak_mb", previous["peak_mb"], current["peak_mb"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark zenpad.analysis functions")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated, from {', '.join(SIZES)}")
+    parser.add_argument("--only", help="Comma separated function names")
+    parser.add_argument("--save", metavar="FILE", help="Write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (default: 0.25)")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",")]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unknown size(s): {', '.join(unknown)}")
+    only = set(args.only.split(",")) if args.only else None
+
+    results, failures = run(sizes, only)
+    status = 0
+
+    for key in failures:
+        print(f"BAD OUTPUT {key}")
+        status = 1
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=4, sort_keys=True)
+            f.write("\n")
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for key, metric, before, after in regressions:
+            print(f"REGRESSION {key} {metric}: {before} -> {after}")
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        if regressions:
+            status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Appearance change benchmark: theme, font and word wrap switches against
+the number of open tabs, under a virtual display.
+
+For each tab count a window is filled with that many tabs of Python
+source, then the settings are changed through the shared Settings store
+(as Preferences does) and timed until the main loop is idle again, the
+repaint included. Hidden tabs catch up when they are shown, so the cost
+of switching to one of them afterwards is reported as well; both should
+stay flat as tabs are added.
+
+Needs a display. Without one, an X server is started for the run:
+    python benchmarks/bench_appearance.py                     # Xvfb
+    python benchmarks/bench_appearance.py --tabs 10,100,500 --json appearance.json
+    python benchmarks/bench_appearance.py --backend broadway
+
+The run uses a throwaway HOME, so settings and sessions are not touched.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_keystrokes import start_display
+
+DEFAULT_TABS = "10,50,200"
+# Pairs of values switched back and forth
+CHANGES = {
+    "theme": ("tango", "classic"),
+    "font": ("Monospace 12", "Monospace 14"),
+    "word_wrap": (False, True),
+}
+LINES_PER_TAB = 400
+
+
+def drain():
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def timed(action):
+    start = time.perf_counter()
+    action()
+    drain()
+    return (time.perf_counter() - start) * 1000
+
+
+def fill(window, count):
+    text = "".join(f"def handler_{n}(request):\n    return {{'status': {n}}}\n\n" for n in range(LINES_PER_TAB // 3))
+    for i in range(count):
+        window.add_tab(text, f"tab_{i}.py", select=False)
+    window.notebook.set_current_page(0)
+    drain()
+
+
+def run(tab_counts, repeat):
+    app = Gtk.Application(application_id="com.zenpad.benchmark", flags=Gio.ApplicationFlags.NON_UNIQUE)
+    app.register(None)
+    settings = get_settings()
+    results = {}
+
+    for count in tab_counts:
+        window = ZenpadWindow(application=app)
+        window.set_default_size(1000, 800)
+        window.show_all()
+        fill(window, count)
+
+        row = {}
+        for key, values in CHANGES.items():
+            times = [timed(lambda: settings.set(key, values[i % 2])) for i in range(repeat * 2)]
+            row[f"{key}_ms"] = round(statistics.median(times), 3)
+
+        # Hidden tabs apply what changed while they were hidden when shown
+        settings.set("theme", CHANGES["theme"][1])
+        drain()
+        last = window.notebook.get_n_pages() - 1
+        row["switch_to_hidden_ms"] = round(timed(lambda: window.notebook.set_current_page(last)), 3)
+
+        results[str(count)] = row
+        print(f"{count:5} tabs  " + "  ".join(f"{name} {ms:9.3f}" for name, ms in row.items()), flush=True)
+
+        for i in range(window.notebook.get_n_pages()):
+            window.notebook.get_nth_page(i).buffer.set_modified(False)
+        window.destroy()
+        drain()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time appearance changes against the number of open tabs")
+    parser.add_argument("--backend", choices=["xvfb", "broadway"], default="xvfb")
+    parser.add_argument("--tabs", default=DEFAULT_TABS, help="Comma separated tab counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Switches back and forth per setting")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="zenpad-home-")
+    os.environ["HOME"] = home
+    server = start_display(args.backend)
+
+    # Gtk can only be imported once the display is known
+    global Gtk, Gio, ZenpadWindow, get_settings
+    import gi
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import Gtk, Gio
+    from zenpad.window import ZenpadWindow
+    from zenpad.settings import get_settings
+
+    try:
+        results = run([int(count) for count in args.tabs.split(",")], args.repeat)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=4)
+                f.write("\n")
+    finally:
+        if server:
+            server.terminate()
+        shutil.rmtree(home, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
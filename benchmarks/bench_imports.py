@@ -0,0 +1,105 @@
+"""
+Import-time budget for Zenpad's startup path.
+
+Imports zenpad.main (what `zenpad` loads before it shows a window) in a
+fresh interpreter with `python -X importtime`, then reports the
+cumulative import cost of every zenpad module and of the heaviest other
+modules, in ms. The run fails (exit status 1) when:
+
+- the total exceeds --budget ms, or
+- one of the subsystems deferred by zenpad.lazy (Markdown preview and
+  WebKit2, diff viewer and difflib, preferences dialog) was imported.
+
+No display is needed: importing Gtk does not open one.
+
+Usage:
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --budget 400 --top 15 --repeat 5
+    python benchmarks/bench_imports.py --json imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from zenpad.lazy import DEFERRED
+
+ENTRY_MODULE = "zenpad.main"
+DEFAULT_BUDGET_MS = 500.0
+
+# Prints the deferred modules that were imported anyway
+PROBE = (
+    "import sys, json, {entry}\n"
+    "print(json.dumps([name for name in {deferred!r} if name in sys.modules]))\n"
+)
+
+
+def measure(entry):
+    """
+    One cold import of entry. Returns ({module: cumulative ms}, total ms,
+    deferred modules that were imported).
+    """
+    code = PROBE.format(entry=entry, deferred=DEFERRED)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {entry} failed:\n{proc.stderr.strip()[-2000:]}")
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        cumulative[fields[2].strip()] = int(fields[1]) / 1000
+    total = cumulative.get(entry, 0.0)
+    imported = json.loads(proc.stdout.strip().splitlines()[-1])
+    return cumulative, total, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import cost of Zenpad's startup modules")
+    parser.add_argument("--entry", default=ENTRY_MODULE, help=f"Module to import (default: {ENTRY_MODULE})")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_MS, help=f"Allowed total in ms (default: {DEFAULT_BUDGET_MS:.0f})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs; the fastest one is reported")
+    parser.add_argument("--top", type=int, default=10, help="Other modules to list, heaviest first")
+    parser.add_argument("--json", metavar="FILE", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    runs = [measure(args.entry) for _ in range(args.repeat)]
+    cumulative, total, imported = min(runs, key=lambda run: run[1])
+
+    print(f"{args.entry}: {total:.1f} ms (budget {args.budget:.0f} ms, best of {args.repeat})")
+    print("\nzenpad modules (cumulative ms):")
+    ours = sorted(((name, ms) for name, ms in cumulative.items() if name.startswith("zenpad")), key=lambda item: -item[1])
+    for name, ms in ours:
+        print(f"  {name:32} {ms:8.1f}")
+    print("\nHeaviest other modules (cumulative ms):")
+    others = sorted(((name, ms) for name, ms in cumulative.items() if not name.startswith("zenpad")), key=lambda item: -item[1])
+    for name, ms in others[:args.top]:
+        print(f"  {name:32} {ms:8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"entry": args.entry, "total_ms": round(total, 1), "budget_ms": args.budget,
+                       "modules_ms": {name: round(ms, 1) for name, ms in ours + others},
+                       "deferred_imported": imported}, f, indent=4)
+
+    failed = False
+    if imported:
+        print(f"\nFAIL: imported at startup although deferred: {', '.join(imported)}")
+        failed = True
+    if total > args.budget:
+        print(f"\nFAIL: {total:.1f} ms is over the {args.budget:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Keystroke replay benchmark for EditorTab under a virtual display.
+
+Builds a real ZenpadWindow, opens generated fixture files of increasing
+size and replays keystroke scripts as synthetic Gdk.EventKey presses and
+releases on the focused view. Each key is timed from dispatch until the
+main loop is idle again (handlers, idle callbacks and the repaint), so
+per-keystroke work that grows with the buffer shows up as growing latency.
+
+Needs a display. Without one, an X server is started for the run:
+    python benchmarks/bench_keystrokes.py                     # Xvfb
+    python benchmarks/bench_keystrokes.py --backend broadway  # broadwayd
+    python benchmarks/bench_keystrokes.py --lines 100,10000 --json results.json
+
+The run uses a throwaway HOME, so settings and sessions are not touched.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+DEFAULT_LINES = "100,1000,10000,50000"
+DISPLAY_NUMBER = 97
+
+# Recorded keystroke scripts. Strings are typed character by character;
+# lists name special keys (Gdk key names) pressed in between.
+SCRIPTS = {
+    "python_function": [
+        "def compute(values, factor=2):", ["Return"],
+        "total = 0", ["Return"],
+        "for value in values:", ["Return"],
+        "total += value * factor", ["Return"],
+        "return total", ["Return", "Return"],
+    ],
+    "closing_braces": [
+        "function render(items) {", ["Return"],
+        "if (items.length) {", ["Return"],
+        "return items.map((item) => [item, \"x\"]);", ["Return"],
+        "}", ["Return"],
+        "}", ["Return"],
+    ],
+    "enter_inside_braces": [
+        "{", ["Return"], "}", ["Left", "Return"],
+        "\"key\": 'value'", ["End", "Return"],
+    ],
+    "backspace_run": [
+        "temporary text that gets removed again",
+        ["BackSpace"] * 38,
+    ],
+}
+
+
+def start_display(backend):
+    """Starts Xvfb or broadwayd when no display is set. Returns the process."""
+    if backend == "xvfb":
+        if os.environ.get("DISPLAY"):
+            return None
+        server = subprocess.Popen(["Xvfb", f":{DISPLAY_NUMBER}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"])
+        os.environ["DISPLAY"] = f":{DISPLAY_NUMBER}"
+        os.environ["GDK_BACKEND"] = "x11"
+    else:
+        server = subprocess.Popen(["broadwayd", f":{DISPLAY_NUMBER}"])
+        os.environ["BROADWAY_DISPLAY"] = f":{DISPLAY_NUMBER}"
+        os.environ["GDK_BACKEND"] = "broadway"
+    # Give the server a moment to accept connections
+    time.sleep(1.0)
+    return server
+
+
+def make_fixture(directory, lines):
+    """Writes a Python file of the given number of lines."""
+    path = os.path.join(directory, f"fixture_{lines}.py")
+    block = [
+        "class Handler{n}(object):",
+        "    def handle(self, request):",
+        "        if request.method == 'GET':",
+        "            return {{'status': {n}, 'items': [1, 2, 3]}}",
+        "        return None",
+        "",
+    ]
+    with open(path, "w") as f:
+        for n in range(lines):
+            f.write(block[n % len(block)].format(n=n // len(block)) + "\n")
+    return path
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Replayer:
+    """Turns script entries into synthetic key events on one view."""
+
+    def __init__(self, view):
+        self.view = view
+        seat = Gdk.Display.get_default().get_default_seat()
+        self.keyboard = seat.get_keyboard()
+        self.keymap = Gdk.Keymap.get_for_display(Gdk.Display.get_default())
+
+    def keys(self, script):
+        for entry in script:
+            if isinstance(entry, str):
+                for char in entry:
+                    yield Gdk.unicode_to_keyval(ord(char))
+            else:
+                for name in entry:
+                    yield Gdk.keyval_from_name(name)
+
+    def make_event(self, event_type, keyval):
+        event = Gdk.Event.new(event_type)
+        event.key.window = self.view.get_window(Gtk.TextWindowType.TEXT)
+        event.key.send_event = True
+        event.key.time = Gtk.get_current_event_time()
+        event.key.keyval = keyval
+        found, entries = self.keymap.get_entries_for_keyval(keyval)
+        if found and entries:
+            event.key.hardware_keycode = entries[0].keycode
+            event.key.group = entries[0].group
+            if entries[0].level:
+                event.key.state = Gdk.ModifierType.SHIFT_MASK
+        event.set_device(self.keyboard)
+        return event
+
+    def press(self, keyval):
+        """Sends one key press/release and waits until the main loop is idle."""
+        start = time.perf_counter()
+        self.view.event(self.make_event(Gdk.EventType.KEY_PRESS, keyval))
+        self.view.event(self.make_event(Gdk.EventType.KEY_RELEASE, keyval))
+        drain()
+        return time.perf_counter() - start
+
+    def replay(self, script):
+        return [self.press(keyval) for keyval in self.keys(script)]
+
+
+def drain():
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def run(line_counts, scripts, repeat):
+    app = Gtk.Application(application_id="com.zenpad.benchmark", flags=Gio.ApplicationFlags.NON_UNIQUE)
+    app.register(None)
+    window = ZenpadWindow(application=app)
+    window.set_default_size(1000, 800)
+    window.show_all()
+    drain()
+
+    fixtures = tempfile.mkdtemp(prefix="zenpad-bench-")
+    results = {}
+    try:
+        for lines in line_counts:
+            path = make_fixture(fixtures, lines)
+            editor = window.open_file_from_path(path)
+            # The file loads on a worker thread and the view is read-only meanwhile:
+            # block on the main loop until the loader is done
+            while editor.loader:
+                Gtk.main_iteration_do(True)
+            drain()
+            editor.view.grab_focus()
+            replayer = Replayer(editor.view)
+
+            for name in scripts:
+                latencies = []
+                wall_start = time.perf_counter()
+                for _ in range(repeat):
+                    # Type at the end of the file, like appending new code
+                    editor.buffer.place_cursor(editor.buffer.get_end_iter())
+                    latencies.extend(replayer.replay(SCRIPTS[name]))
+                wall = time.perf_counter() - wall_start
+
+                latencies.sort()
+                key = f"{name}/{lines}"
+                results[key] = {
+                    "keys": len(latencies),
+                    "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+                    "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+                    "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+                    "max_ms": round(latencies[-1] * 1000, 3),
+                    "wall_s": round(wall, 3),
+                }
+                r = results[key]
+                print(f"{key:32} {r['keys']:5} keys  p50 {r['p50_ms']:8.3f}  p95 {r['p95_ms']:8.3f}  "
+                      f"p99 {r['p99_ms']:8.3f}  max {r['max_ms']:8.3f} ms  wall {r['wall_s']:.3f} s", flush=True)
+
+            # Drop the tab without a save prompt
+            editor.buffer.set_modified(False)
+            window.notebook.remove_page(window.notebook.page_num(editor))
+            drain()
+    finally:
+        shutil.rmtree(fixtures, ignore_errors=True)
+        window.destroy()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay keystrokes into Zenpad and time them")
+    parser.add_argument("--backend", choices=["xvfb", "broadway"], default="xvfb")
+    parser.add_argument("--lines", default=DEFAULT_LINES, help="Comma separated fixture sizes in lines")
+    parser.add_argument("--scripts", default=",".join(SCRIPTS), help="Comma separated script names")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays of each script per file")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args()
+
+    scripts = args.scripts.split(",")
+    unknown = [name for name in scripts if name not in SCRIPTS]
+    if unknown:
+        parser.error(f"Unknown script(s): {', '.join(unknown)}")
+
+    home = tempfile.mkdtemp(prefix="zenpad-home-")
+    os.environ["HOME"] = home
+    server = start_display(args.backend)
+
+    # Gtk can only be imported once the display is known
+    global Gtk, Gdk, Gio, ZenpadWindow
+    import gi
+    gi.require_version('Gtk', '3.0')
+    gi.require_version('Gdk', '3.0')
+    from gi.repository import Gtk, Gdk, Gio
+    from zenpad.window import ZenpadWindow
+
+    try:
+        results = run([int(lines) for lines in args.lines.split(",")], scripts, args.repeat)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=4)
+                f.write("\n")
+    finally:
+        if server:
+            server.terminate()
+        shutil.rmtree(home, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
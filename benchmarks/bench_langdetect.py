@@ -0,0 +1,262 @@
+"""
+Language detection micro-benchmark and regression corpus.
+
+Every sample must keep the language the original cascade in
+analysis.detect_language_by_content returned for it. Samples that only
+the system (Gio) content sniffing recognizes are left out, so the corpus
+gives the same answers with or without a display.
+
+Each sample set is also timed with that cascade (legacy_detect_language
+below), to show the speedup. Its Gio step is left out, which flatters
+it: it used to import gi and sniff the content on every call that got
+that far.
+
+Usage: python benchmarks/bench_langdetect.py [--repeat N]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from zenpad import analysis
+
+# (text, expected language id)
+CORPUS = [
+    ("#!/usr/bin/env python3\nprint('hi')\n", 'python'),
+    ('#!/bin/bash\necho hi\n', 'sh'),
+    ('#!/bin/sh\nset -e\n', 'sh'),
+    ('#!/usr/bin/env node\nconsole.log(1)\n', 'js'),
+    ('#!/usr/bin/perl\nuse strict;\n', 'perl'),
+    ("#!/usr/bin/env ruby\nputs 'x'\n", 'ruby'),
+    ('#!/usr/bin/php\n<?php echo 1;\n', 'php'),
+    ('#!/usr/bin/awk -f\n{ print $1 }\n', None),
+    ('public class Main {\n    public static void main(String[] args) {\n        System.out.println("hi");\n    }\n}\n', 'java'),
+    ('package com.example;\n\nimport java.util.List;\n', 'java'),
+    ('package main\n\nimport "fmt"\n\nfunc main() {\n\tfmt.Println("hi")\n}\n', 'go'),
+    ('#include <iostream>\nint main() { std::cout << 1; }\n', 'cpp'),
+    ('#include <vector>\n', 'cpp'),
+    ('using namespace std;\nint x;\n', 'cpp'),
+    ('#include <stdio.h>\nint main(void) { printf("x"); return 0; }\n', 'c'),
+    ('import os\nimport sys\n\nprint(os.getcwd())\n', 'python'),
+    ('from collections import OrderedDict\n', 'python'),
+    ('def foo(x):\n    return x * 2\n', 'python'),
+    ('class Foo:\n    pass\n', 'python'),
+    ('class Foo(Base):\n    pass\n', 'python'),
+    ("if __name__ == '__main__':\n    main()\n", 'python'),
+    ('<html><body><div>Hello</div></body></html>', 'html'),
+    ('<p>Para</p>', 'html'),
+    ('<br/>', 'html'),
+    ("<script src='x.js'></script>", 'html'),
+    ('<?xml version="1.0"?>\n<root><a>1</a></root>', 'xml'),
+    ("<root><child attr='1'>text</child></root>", None),
+    ('{"a": 1, "b": [1, 2, 3]}', 'json'),
+    ('[1, 2, 3]', 'json'),
+    ('{}', None),
+    ('[ ]', None),
+    ('{"broken": 1,', None),
+    ('{"broken": 1, }', 'json'),
+    ('[broken', None),
+    ('[broken]', 'json'),
+    ('{not json}', None),
+    ('int main(int argc, char **argv) {\n  return 0;\n}\n', 'c'),
+    ('int main() {\n  std::vector<int> v;\n}\n', 'cpp'),
+    ('void f() { printf("%d", 1); }', 'c'),
+    ('std::string s;', 'cpp'),
+    ('auto x = cout << 1;', 'cpp'),
+    ('System.out.println(1)', 'java'),
+    ('for i in range(10):\n    pass\n', 'python'),
+    ('for x, y in pairs:\n', 'python'),
+    ('print("hello")', 'python'),
+    ("print('hello')", 'python'),
+    ('  print("x")', 'python'),
+    ('function foo() {\n  return 1;\n}\n', 'js'),
+    ('console.log(1)', 'js'),
+    ('const x = 5', 'js'),
+    ('let y = 6', 'js'),
+    ("document.getElementById('a')", 'js'),
+    ('window.alert(1)', 'js'),
+    ('body {\n  color: red;\n}\n', 'css'),
+    ('.class { margin: 0; }', 'css'),
+    ('div { a: b; }', 'css'),
+    ('body { color red }', None),
+    ('@media screen { }', 'css'),
+    ('@import url(x.css)', 'css'),
+    ('# Title\n\nSome text here.\n', 'markdown'),
+    ('## Sub\ntext', None),
+    ('**Bold line**', 'markdown'),
+    ('Just some prose about stuff, nothing special here.', None),
+    ('Meeting notes: discuss the budget; assign owners = TBD', None),
+    ('hello world', None),
+    ('', None),
+    ('   \n\t ', None),
+    ('a < b and c > d', None),
+    ('<notatag', None),
+    ('x <y> z', None),
+    ('SELECT * FROM users WHERE id = 1;', None),
+    ('The function of this text is to confuse {the detector}', 'js'),
+    ('Let me tell you = something', None),
+    ('let me tell you something', None),
+    ('I think class Foo: is weird', 'python'),
+    ('#!/usr/bin/env bash\nfor i in 1 2; do echo $i; done\n', 'sh'),
+    ('package foo;', 'java'),
+    ('packages are here; yes', None),
+    ("import React from 'react';\n", 'python'),
+    ('# comment\nimport os\n', 'python'),
+    ('<div>\n  <span>x</span>\n</div>', 'html'),
+    ('<ul><li>x</li></ul>', None),
+    ('{\n  "name": "zenpad",\n  "version": "1.2.0"\n}\n', 'json'),
+    ('[\n  {"a": 1}\n]', 'json'),
+    ('{"key": "value"', None),
+    ('a = 1\nb = 2\n', None),
+    ('x := 5', None),
+    ('  for   item in collection :  ', 'python'),
+    ('**bold** and more text', None),
+    ('#hashtag not heading', None),
+    ('#\theading tab', 'markdown'),
+    ('public class Foo', None),
+    ('printf("x")', None),
+    ('#include <stdlib.h>', 'c'),
+    ('#include "local.h"', None),
+    ("<?php echo 'x'; ?>", None),
+    ('From: someone@example.com\nSubject: hi\n', None),
+    ('10.0.0.1 - - [10/Oct/2000:13:55:36 -0700] "GET /a.gif HTTP/1.0" 200 2326 "-" "Mozilla"\n', None),
+    ('def\n', None),
+    ('class\n', None),
+    ('window.', 'js'),
+    ('document.write(1); // window.', 'js'),
+    ('cout << x;', 'cpp'),
+    ('int main(', None),
+    ('int main( {', 'c'),
+]
+
+
+def legacy_detect_language(text):
+    """The cascade classify_language replaced, as it was minus the Gio step."""
+    text = text.strip()
+    if not text:
+        return None
+
+    first_line = text.splitlines()[0]
+    if first_line.startswith("#!"):
+        if "python" in first_line: return "python"
+        if "bash" in first_line or "sh" in first_line: return "sh"
+        if "node" in first_line: return "js"
+        if "perl" in first_line: return "perl"
+        if "ruby" in first_line: return "ruby"
+        if "php" in first_line: return "php"
+
+    sample = text[:1500]
+
+    if "public class " in sample and "{" in sample: return "java"
+    if "public static void main" in sample: return "java"
+    if "package " in sample and ";" in sample: return "java"
+    if "package main" in sample and "func main" in sample: return "go"
+    if "#include <iostream>" in sample: return "cpp"
+    if "#include <vector>" in sample: return "cpp"
+    if "using namespace std;" in sample: return "cpp"
+    if "#include <" in sample and ".h>" in sample: return "c"
+    if re.search(r'^import [a-zA-Z0-9_]+', sample, re.MULTILINE): return "python"
+    if re.search(r'^from [a-zA-Z0-9_]+ import', sample, re.MULTILINE): return "python"
+    if re.search(r'def [a-zA-Z0-9_]+\(', sample): return "python"
+    if re.search(r'class [a-zA-Z0-9_]+(\(|:)', sample): return "python"
+    if "if __name__ == " in sample: return "python"
+    if "<" in text and ">" in text:
+        if re.search(r'<[a-zA-Z0-9_-]+.*?>', text):
+            if "</body>" in text or "</div>" in text or "<script" in text or "<br" in text or "<p>" in text: return "html"
+
+    # (Gio content sniffing was here)
+
+    if (text.startswith("{") and text.endswith("}")) or \
+       (text.startswith("[") and text.endswith("]")):
+        try:
+            no_space = "".join(text.split())
+            if no_space == "{}" or no_space == "[]": return None
+            json.loads(text)
+            return "json"
+        except:
+            if text.startswith("{") and re.search(r'"[^"]*"\s*:', text): return "json"
+            elif text.startswith("["): return "json"
+
+    if "int main(" in sample and "{" in sample:
+        if "std::" in sample or "cout <<" in sample: return "cpp"
+        return "c"
+    if "printf(" in sample and ";" in sample: return "c"
+    if "std::" in sample or "cout <<" in sample: return "cpp"
+    if "System.out.println" in sample: return "java"
+    if re.search(r'^\s*for\s+[a-zA-Z0-9_, ]+\s+in\s+.+:\s*$', sample, re.MULTILINE): return "python"
+    if re.search(r'(^|\s)print\s*\(["\']', sample): return "python"
+    if "function " in sample and "{" in sample: return "js"
+    if "console.log(" in sample: return "js"
+    if "const " in sample and "=" in sample: return "js"
+    if "let " in sample and "=" in sample: return "js"
+    if "document." in sample or "window." in sample: return "js"
+    if "body {" in sample or ".class" in sample or "div {" in sample:
+        if "{" in sample and ":" in sample and ";" in sample: return "css"
+    if "@media" in sample or "@import" in sample: return "css"
+    if re.search(r'^#\s', sample, re.MULTILINE) or re.search(r'^\*\*.*\*\*$', sample, re.MULTILINE):
+        return "markdown"
+    if "<" in text and ">" in text:
+        if re.search(r'<[a-zA-Z0-9_-]+.*?>', text):
+            if "</body>" in text or "</div>" in text: return "html"
+            if "<?xml" in text: return "xml"
+    return None
+
+
+def check_corpus():
+    """Returns the samples whose detected language changed."""
+    failures = []
+    for text, expected in CORPUS:
+        detected = analysis.detect_language_by_content(text)
+        if detected != expected:
+            failures.append((text, expected, detected))
+    return failures
+
+
+def source_samples():
+    """The first 1000 characters of this repository's own source and docs."""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    samples = []
+    for path in sorted(glob.glob(os.path.join(root, "**", "*.py"), recursive=True)
+                       + glob.glob(os.path.join(root, "**", "*.md"), recursive=True)):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            samples.append(f.read(1000))
+    return samples
+
+
+def time_per_call(classify, texts, repeat):
+    """Best-of-5 average time per call, in microseconds."""
+    timer = timeit.Timer(lambda: [classify(text) for text in texts])
+    best = min(timer.repeat(5, repeat))
+    return best / repeat / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content-based language detection")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per sample and round")
+    args = parser.parse_args()
+
+    failures = check_corpus()
+    for text, expected, detected in failures:
+        print(f"MISMATCH {text[:40]!r}: expected {expected}, got {detected}")
+    print(f"Corpus: {len(CORPUS) - len(failures)}/{len(CORPUS)} samples match")
+
+    short = [text for text, expected in CORPUS]
+    # Same samples repeated up to the size the editor actually samples
+    long = [(text + "\n") * (1000 // (len(text) + 1) + 1) for text in short]
+    long = [text[:1000] for text in long]
+
+    for name, texts in (("Short samples", short), ("1000-char samples", long), ("Source files", source_samples())):
+        before = time_per_call(legacy_detect_language, texts, args.repeat)
+        after = time_per_call(analysis.classify_language, texts, args.repeat)
+        print(f"{name + ':':19} {after:8.2f} us/call, cascade {before:8.2f} us/call ({before / after:.1f}x)")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
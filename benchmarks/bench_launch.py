@@ -0,0 +1,140 @@
+"""
+Launch benchmark: how long `zenpad FILE` takes when Zenpad is already
+running.
+
+Starts a Zenpad instance (on a private session bus and, without a
+display, an X server), then times complete runs of both ways to hand a
+file to it, from process start to exit:
+
+- launcher: zenpad.launcher, the `zenpad` command, which forwards over
+  D-Bus with Gio only
+- full:     zenpad.main, which imports Gtk, GtkSource and the window
+  before GApplication forwards the same call
+
+Usage:
+    python benchmarks/bench_launch.py
+    python benchmarks/bench_launch.py --repeat 20 --json launch.json
+    python benchmarks/bench_launch.py --backend broadway
+
+The run uses a throwaway HOME, so settings and sessions are not touched.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from bench_keystrokes import start_display
+from zenpad.launcher import APP_ID
+
+ENTRIES = {
+    "launcher": "zenpad.launcher",
+    "full": "zenpad.main",
+}
+STARTUP_TIMEOUT = 30.0
+
+
+def start_bus():
+    """A session bus of our own, so a Zenpad the user is running is not involved."""
+    bus = subprocess.Popen(["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+                           stdout=subprocess.PIPE, text=True)
+    os.environ["DBUS_SESSION_BUS_ADDRESS"] = bus.stdout.readline().strip()
+    return bus
+
+
+def wait_for_instance():
+    from gi.repository import Gio, GLib
+    connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        reply = connection.call_sync("org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                                     "NameHasOwner", GLib.Variant("(s)", (APP_ID,)), GLib.VariantType("(b)"),
+                                     Gio.DBusCallFlags.NONE, -1, None)
+        if reply.unpack()[0]:
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"Zenpad did not register {APP_ID} within {STARTUP_TIMEOUT:.0f} s")
+
+
+def launcher_imports_gtk():
+    """True if importing the launcher pulls in Gtk, which it must not."""
+    code = "import sys, zenpad.launcher; print('gi.repository.Gtk' in sys.modules)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return proc.stdout.strip() == "True"
+
+
+def launch(module, path):
+    """Milliseconds one `python -m module path` takes until it exits."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-m", module, path], cwd=ROOT,
+                          stdin=subprocess.DEVNULL, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} exited with {proc.returncode}:\n{proc.stderr.strip()[-2000:]}")
+    return elapsed
+
+
+def run(repeat, directory):
+    results = {}
+    for name, module in ENTRIES.items():
+        times = []
+        for i in range(repeat):
+            path = os.path.join(directory, f"{name}_{i}.txt")
+            with open(path, "w") as f:
+                f.write("hello\n")
+            times.append(launch(module, path))
+        results[name] = {
+            "runs": repeat,
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(min(times), 1),
+            "max_ms": round(max(times), 1),
+        }
+        r = results[name]
+        print(f"{name:10} median {r['median_ms']:8.1f}  min {r['min_ms']:8.1f}  max {r['max_ms']:8.1f} ms", flush=True)
+    speedup = results["full"]["median_ms"] / results["launcher"]["median_ms"]
+    print(f"\nlauncher is {speedup:.1f}x faster than the full start")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time handing a file to a running Zenpad")
+    parser.add_argument("--backend", choices=["xvfb", "broadway"], default="xvfb")
+    parser.add_argument("--repeat", type=int, default=10, help="Launches per path")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args()
+
+    if launcher_imports_gtk():
+        print("FAIL: zenpad.launcher imports Gtk")
+        return 1
+
+    home = tempfile.mkdtemp(prefix="zenpad-home-")
+    os.environ["HOME"] = home
+    server = start_display(args.backend)
+    bus = start_bus()
+    instance = subprocess.Popen([sys.executable, "-m", "zenpad.main"], cwd=ROOT, stdin=subprocess.DEVNULL)
+    try:
+        wait_for_instance()
+        results = run(args.repeat, home)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=4)
+                f.write("\n")
+    finally:
+        instance.terminate()
+        instance.wait()
+        bus.terminate()
+        if server:
+            server.terminate()
+        shutil.rmtree(home, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
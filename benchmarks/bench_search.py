@@ -0,0 +1,131 @@
+"""
+Incremental search benchmark: cost of typing into the search entry
+against the number of open tabs, under a virtual display.
+
+For each tab count a window is filled with that many log-like tabs and
+a query is typed into the search entry one character at a time. Each
+keystroke is timed until the main loop is idle again, which includes
+every background occurrence scan it started, and the active tab's match
+count is checked. Only the tab in front holds a search context, so the
+times should depend on the size of that buffer and stay flat as tabs
+are added.
+
+Needs a display. Without one, an X server is started for the run:
+    python benchmarks/bench_search.py                     # Xvfb
+    python benchmarks/bench_search.py --tabs 1,50,200 --lines 20000 --json search.json
+    python benchmarks/bench_search.py --backend broadway
+
+The run uses a throwaway HOME, so settings and sessions are not touched.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_keystrokes import start_display
+
+DEFAULT_TABS = "1,25,100"
+DEFAULT_LINES = 5000
+QUERY = "timeout"
+
+
+def drain():
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def make_log(lines):
+    levels = ("INFO", "DEBUG", "WARN", "ERROR")
+    return "".join(f"2024-05-01 12:{n // 60 % 60:02}:{n % 60:02} {levels[n % 4]} worker-{n % 7} "
+                   f"request {n} {'timeout after 30s' if n % 50 == 0 else 'done in 12ms'}\n"
+                   for n in range(lines))
+
+
+def run(tab_counts, lines):
+    app = Gtk.Application(application_id="com.zenpad.benchmark", flags=Gio.ApplicationFlags.NON_UNIQUE)
+    app.register(None)
+    text = make_log(lines)
+    expected = (lines + 49) // 50
+    results = {}
+
+    for count in tab_counts:
+        window = ZenpadWindow(application=app)
+        window.set_default_size(1000, 800)
+        window.show_all()
+        for i in range(count):
+            window.add_tab(text, f"log_{i}.txt", select=False)
+        window.notebook.set_current_page(window.notebook.get_n_pages() - 1)
+        window.on_find_clicked()
+        drain()
+
+        times = []
+        for length in range(1, len(QUERY) + 1):
+            start = time.perf_counter()
+            window.search_entry.set_text(QUERY[:length])
+            drain()
+            times.append((time.perf_counter() - start) * 1000)
+        context = window.search_editor.search_context if window.search_editor else None
+        found = context.get_occurrences_count() if context else -1
+        contexts = sum(1 for i in range(window.notebook.get_n_pages())
+                       if window.notebook.get_nth_page(i).search_context is not None)
+
+        results[str(count)] = {
+            "keystrokes": len(times),
+            "median_ms": round(statistics.median(times), 3),
+            "max_ms": round(max(times), 3),
+            "total_ms": round(sum(times), 3),
+            "matches": found,
+            "search_contexts": contexts,
+        }
+        r = results[str(count)]
+        print(f"{count:5} tabs  median {r['median_ms']:9.3f}  max {r['max_ms']:9.3f}  total {r['total_ms']:9.3f} ms  "
+              f"{found} matches (expected {expected}), {contexts} search context(s)", flush=True)
+
+        window.search_entry.set_text("")
+        for i in range(window.notebook.get_n_pages()):
+            window.notebook.get_nth_page(i).buffer.set_modified(False)
+        window.destroy()
+        drain()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time incremental search against the number of open tabs")
+    parser.add_argument("--backend", choices=["xvfb", "broadway"], default="xvfb")
+    parser.add_argument("--tabs", default=DEFAULT_TABS, help="Comma separated tab counts")
+    parser.add_argument("--lines", type=int, default=DEFAULT_LINES, help="Lines per tab")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args()
+
+    home = tempfile.mkdtemp(prefix="zenpad-home-")
+    os.environ["HOME"] = home
+    server = start_display(args.backend)
+
+    # Gtk can only be imported once the display is known
+    global Gtk, Gio, ZenpadWindow
+    import gi
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import Gtk, Gio
+    from zenpad.window import ZenpadWindow
+
+    try:
+        results = run([int(count) for count in args.tabs.split(",")], args.lines)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=4)
+                f.write("\n")
+    finally:
+        if server:
+            server.terminate()
+        shutil.rmtree(home, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
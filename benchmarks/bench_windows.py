@@ -0,0 +1,121 @@
+"""
+Window construction benchmark under a virtual display.
+
+Builds ZenpadWindows one after another in the same application and times
+each from the constructor until it is shown and the main loop is idle.
+The first window also pays for the application's menubar model and
+actions (zenpad.menus); every later one should only pay for its own
+widgets, so "next" is the number to watch as the menus grow. The lazy
+submenus (recent files, color schemes, filetypes) are timed separately,
+as filling them on first open.
+
+Needs a display. Without one, an X server is started for the run:
+    python benchmarks/bench_windows.py                     # Xvfb
+    python benchmarks/bench_windows.py --backend broadway  # broadwayd
+    python benchmarks/bench_windows.py --windows 20 --json windows.json
+
+The run uses a throwaway HOME, so settings and sessions are not touched.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_keystrokes import start_display
+
+
+def drain():
+    while Gtk.events_pending():
+        Gtk.main_iteration_do(False)
+
+
+def build_window(app):
+    """Milliseconds from the constructor until the window is shown and idle."""
+    start = time.perf_counter()
+    window = ZenpadWindow(application=app)
+    window.show_all()
+    drain()
+    return window, (time.perf_counter() - start) * 1000
+
+
+def run(count):
+    app = Gtk.Application(application_id="com.zenpad.benchmark", flags=Gio.ApplicationFlags.NON_UNIQUE)
+    app.register(None)
+
+    windows = []
+    try:
+        window, first = build_window(app)
+        windows.append(window)
+        times = []
+        for _ in range(count - 1):
+            window, elapsed = build_window(app)
+            windows.append(window)
+            times.append(elapsed)
+
+        registry = menus.get_registry(app)
+        submenus = {}
+        for name, fill in menus.LAZY_SUBMENUS.items():
+            start = time.perf_counter()
+            fill(registry, Gio.Menu())
+            submenus[name] = round((time.perf_counter() - start) * 1000, 3)
+    finally:
+        for window in windows:
+            window.destroy()
+        drain()
+
+    results = {"first_ms": round(first, 3), "windows": count}
+    if times:
+        results["next_median_ms"] = round(statistics.median(times), 3)
+        results["next_max_ms"] = round(max(times), 3)
+    results["submenus_ms"] = submenus
+
+    print(f"first window       {results['first_ms']:9.3f} ms")
+    if times:
+        print(f"next {len(times):3} windows   median {results['next_median_ms']:9.3f} ms  max {results['next_max_ms']:9.3f} ms")
+    for name, ms in submenus.items():
+        print(f"fill {name:13} {ms:9.3f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time building Zenpad windows and their menus")
+    parser.add_argument("--backend", choices=["xvfb", "broadway"], default="xvfb")
+    parser.add_argument("--windows", type=int, default=10, help="Windows to build (the first one included)")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE")
+    args = parser.parse_args()
+    if args.windows < 1:
+        parser.error("--windows must be at least 1")
+
+    home = tempfile.mkdtemp(prefix="zenpad-home-")
+    os.environ["HOME"] = home
+    server = start_display(args.backend)
+
+    # Gtk can only be imported once the display is known
+    global Gtk, Gio, ZenpadWindow, menus
+    import gi
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import Gtk, Gio
+    from zenpad.window import ZenpadWindow
+    from zenpad import menus
+
+    try:
+        results = run(args.windows)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=4)
+                f.write("\n")
+    finally:
+        if server:
+            server.terminate()
+        shutil.rmtree(home, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,7 @@ setup(
     packages=find_packages(),
     entry_points={
         "console_scripts": [
-            "zenpad=zenpad.main:main",
+            "zenpad=zenpad.launcher:main",
         ],
     },
     install_requires=[
@@ -5,6 +5,17 @@ import re
 import csv
 import io
 
+try:
+    import gi
+    try:
+        gi.require_version('GtkSource', '4')
+    except ValueError:
+        gi.require_version('GtkSource', '3.0')
+    from gi.repository import Gio, GtkSource
+except (ImportError, ValueError):
+    # Headless use (scripts, benchmarks): no system content sniffing
+    Gio = GtkSource = None
+
 def format_json(text):
     """
     Formats a JSON string with 4-space indentation.
@@ -96,135 +107,308 @@ def convert_to_json(text):
     return True, json.dumps(fallback, indent=4), None
 
 
-def detect_language_by_content(text):
+# Language detection only looks at the start of the text
+SAMPLE_SIZE = 1500
+
+# Confidence levels returned by classify_language
+CONFIDENCE_HIGH = 0.9
+CONFIDENCE_MEDIUM = 0.6
+# Added for every further rule agreeing with the winning one
+AGREEMENT_BONUS = 0.05
+
+# Shebang interpreters, checked in order against the first line
+SHEBANG_RULES = (
+    ("python", "python"),
+    ("bash", "sh"),
+    ("sh", "sh"),
+    ("node", "js"),
+    ("perl", "perl"),
+    ("ruby", "ruby"),
+    ("php", "php"),
+)
+
+# Features: (names, pattern)
+# Each pattern marks the features in names as present wherever it
+# matches. They are merged into one regex and found in a single scan of
+# the sample, which has a newline put in front, so "\n" is a line start.
+# A pattern must start with a literal character: alternatives sharing it
+# are merged, which keeps the scan fast.
+FEATURES = (
+    # Java / Go
+    (("java_class",), r"public class "),
+    (("java_main",), r"public static void main"),
+    (("package", "package_main"), r"package main"),
+    (("package",), r"package "),
+    (("func_main",), r"func main"),
+    (("sysout",), r"System\.out\.println"),
+    # C / C++
+    (("include", "include_iostream"), r"#include <iostream>"),
+    (("include", "include_vector"), r"#include <vector>"),
+    (("include",), r"#include <"),
+    (("dot_h",), r"\.h>"),
+    (("using_std",), r"using namespace std;"),
+    (("int_main",), r"int main\("),
+    (("printf",), r"printf\("),
+    (("std",), r"std::"),
+    (("cout",), r"cout <<"),
+    # Python
+    (("py_import",), r"\nimport [a-zA-Z0-9_]"),
+    (("py_from_import",), r"\nfrom [a-zA-Z0-9_]+ import"),
+    (("py_def",), r"def [a-zA-Z0-9_]+\("),
+    (("py_class",), r"class [a-zA-Z0-9_]+[(:]"),
+    (("py_name_main",), r"if __name__ == "),
+    (("py_for",), r"\n[^\S\n]*for\s+[a-zA-Z0-9_, ]+\s+in\s+.+:\s*$"),
+    # print( after whitespace, not e.g. System.out.print(
+    (("py_print",), r"p(?<!\Sp)rint\s*\([\"']"),
+    # JavaScript
+    (("js_function",), r"function "),
+    (("js_console",), r"console\.log\("),
+    (("js_const",), r"const "),
+    (("js_let",), r"let "),
+    (("js_dom",), r"document\."),
+    (("js_dom",), r"window\."),
+    # CSS
+    (("css_selector",), r"body \{"),
+    (("css_selector",), r"div \{"),
+    (("css_selector",), r"\.class"),
+    (("css_at_rule",), r"@media"),
+    (("css_at_rule",), r"@import"),
+    # Markdown
+    (("md_heading",), r"\n#\s"),
+    (("md_bold_line",), r"\n\*\*.*\*\*$"),
+    # HTML / XML
+    (("tag", "html_script"), r"<script[^\n>]*>"),
+    (("tag", "html_br"), r"<br[^\n>]*>"),
+    (("tag", "html_p"), r"<p>"),
+    (("tag",), r"<[a-zA-Z0-9_-][^\n>]*>"),
+    (("html_script",), r"<script"),
+    (("html_br",), r"<br"),
+    (("html_close",), r"</body>"),
+    (("html_close",), r"</div>"),
+    (("xml_decl",), r"<\?xml"),
+)
+
+# Punctuation the rules test for, checked with plain substring tests
+CHAR_FEATURES = ("{", ";", "=", ":")
+
+# Rules: (language, weight, required features)
+# Within a tier the first rule that fires wins (the historic precedence);
+# the weight is the confidence it gives on its own, and every further
+# rule firing for the same language adds AGREEMENT_BONUS.
+STRONG_RULES = (
+    ("java", 0.8, ("java_class", "{")),
+    ("java", 0.8, ("java_main",)),
+    ("java", 0.8, ("package", ";")),
+    ("go", 0.8, ("package_main", "func_main")),
+    ("cpp", 0.8, ("include_iostream",)),
+    ("cpp", 0.8, ("include_vector",)),
+    ("cpp", 0.8, ("using_std",)),
+    ("c", 0.8, ("include", "dot_h")),
+    ("python", 0.8, ("py_import",)),
+    ("python", 0.8, ("py_from_import",)),
+    ("python", 0.8, ("py_def",)),
+    ("python", 0.8, ("py_class",)),
+    ("python", 0.8, ("py_name_main",)),
+    ("html", 0.8, ("tag", "html_close")),
+    ("html", 0.8, ("tag", "html_script")),
+    ("html", 0.8, ("tag", "html_br")),
+    ("html", 0.8, ("tag", "html_p")),
+)
+
+LOOSE_RULES = (
+    ("cpp", 0.5, ("int_main", "{", "std")),
+    ("cpp", 0.5, ("int_main", "{", "cout")),
+    ("c", 0.5, ("int_main", "{")),
+    ("c", 0.5, ("printf", ";")),
+    ("cpp", 0.5, ("std",)),
+    ("cpp", 0.5, ("cout",)),
+    ("java", 0.5, ("sysout",)),
+    ("python", 0.5, ("py_for",)),
+    ("python", 0.5, ("py_print",)),
+    ("js", 0.5, ("js_function", "{")),
+    ("js", 0.5, ("js_console",)),
+    ("js", 0.5, ("js_const", "=")),
+    ("js", 0.5, ("js_let", "=")),
+    ("js", 0.5, ("js_dom",)),
+    ("css", 0.5, ("css_selector", "{", ":", ";")),
+    ("css", 0.5, ("css_at_rule",)),
+    ("markdown", 0.4, ("md_heading",)),
+    ("markdown", 0.4, ("md_bold_line",)),
+    ("html", 0.5, ("tag", "html_close")),
+    ("xml", 0.5, ("tag", "xml_decl")),
+)
+
+
+def _compile_features(features):
+    """Merges the feature patterns into one regex, grouped by first character."""
+    groups = {}
+    for names, pattern in features:
+        head = pattern[:2] if pattern[0] == "\\" else pattern[0]
+        groups.setdefault(head, []).append(pattern[len(head):])
+
+    alternatives = []
+    for head, tails in groups.items():
+        if len(tails) == 1:
+            alternatives.append(head + tails[0])
+        else:
+            alternatives.append(head + "(?:" + "|".join(tails) + ")")
+    return re.compile("|".join(alternatives), re.MULTILINE)
+
+
+_FEATURE_RE = _compile_features(FEATURES)
+# Each pattern on its own, to tell which features a matched text stands for
+_FEATURE_PATTERNS = tuple((frozenset(names), re.compile(pattern, re.MULTILINE)) for names, pattern in FEATURES)
+_JSON_KEY_RE = re.compile(r'"[^"]*"\s*:')
+
+# Caches: matched text -> feature names, feature set -> rules it satisfies,
+# Gio content type -> language id
+_token_features = {}
+_rule_matches = {}
+_content_type_languages = {}
+
+
+def _features_of(token):
+    """The features a matched text stands for: those whose pattern matches all of it."""
+    names = frozenset()
+    for feature_names, pattern in _FEATURE_PATTERNS:
+        if pattern.fullmatch(token):
+            names |= feature_names
+
+    if len(_token_features) > 4096:
+        _token_features.clear()
+    _token_features[token] = names
+    return names
+
+
+def _scan_features(sample):
+    """Single pass over the sample. Returns the set of features present."""
+    found = set()
+    for token in set(_FEATURE_RE.findall("\n" + sample)):
+        names = _token_features.get(token)
+        if names is None:
+            names = _features_of(token)
+        found |= names
+    return found
+
+
+def _matching_rules(rules, found):
+    """The rules whose features are all found, in order, as (language, weight, characters still to check)."""
+    matching = []
+    for language, weight, required in rules:
+        features = [name for name in required if name not in CHAR_FEATURES]
+        if found.issuperset(features):
+            chars = tuple(name for name in required if name in CHAR_FEATURES)
+            matching.append((language, weight, chars))
+    return tuple(matching)
+
+
+def _rules_for(found):
+    """(strong, loose) rules satisfied by found, worked out once per distinct set."""
+    key = frozenset(found)
+    rules = _rule_matches.get(key)
+    if rules is None:
+        if len(_rule_matches) > 4096:
+            _rule_matches.clear()
+        rules = _rule_matches[key] = (_matching_rules(STRONG_RULES, key), _matching_rules(LOOSE_RULES, key))
+    return rules
+
+
+def _score(rules, sample):
+    """
+    Scores the rules that fire. The first one picks the language; every
+    other rule voting for it adds AGREEMENT_BONUS.
+    Returns: (language_id or None, confidence: float 0.0 - 1.0)
+    """
+    winner = None
+    for language, weight, chars in rules:
+        for char in chars:
+            if char not in sample:
+                break
+        else:
+            if winner is None:
+                winner, confidence = language, weight
+            elif language == winner:
+                confidence += AGREEMENT_BONUS
+    if winner is None:
+        return None, 0.0
+    return winner, round(min(confidence, 1.0), 2)
+
+
+def _guess_by_content_type(sample):
+    """Asks Gio to sniff the content. Returns a language id or None."""
+    if Gio is None:
+        return None
+
+    content_type, uncertain = Gio.content_type_guess(None, sample.encode("utf-8"))
+
+    # Only trust Gio if it's confident and it's not just generic text
+    if uncertain or content_type == "text/plain":
+        return None
+    # Gio often sees C++ or even Python/Java as partial C source.
+    # Let our strict/loose heuristics confirm those.
+    if content_type in ("text/x-csrc", "text/x-c++src", "text/x-chdr"):
+        return None
+
+    if content_type not in _content_type_languages:
+        language = GtkSource.LanguageManager.get_default().guess_language(None, content_type)
+        _content_type_languages[content_type] = language.get_id() if language else None
+    return _content_type_languages[content_type]
+
+
+def classify_language(text):
     """
     Analyzes text content to guess the programming language.
-    Returns a GtkSourceView language ID or None.
+    Only the first SAMPLE_SIZE characters are examined.
+    Returns: (GtkSourceView language ID or None, confidence: float 0.0 - 1.0)
     """
     text = text.strip()
     if not text:
-        return None
-        
+        return None, 0.0
+
     # 1. Shebang (Highest Priority)
-    first_line = text.splitlines()[0]
-    if first_line.startswith("#!"):
-        if "python" in first_line: return "python"
-        if "bash" in first_line or "sh" in first_line: return "sh"
-        if "node" in first_line: return "js"
-        if "perl" in first_line: return "perl"
-        if "ruby" in first_line: return "ruby"
-        if "php" in first_line: return "php"
-
-    # 2. Strong Structure Indicators (Java, C++, Go, Python Defs, XML/HTML)
-    sample = text[:1500]
-    
-    # Java (Strong)
-    if "public class " in sample and "{" in sample: return "java"
-    if "public static void main" in sample: return "java"
-    if "package " in sample and ";" in sample: return "java"
-    
-    # Go (Strong)
-    if "package main" in sample and "func main" in sample: return "go"
-    
-    # C/C++ Includes (Strong)
-    if "#include <iostream>" in sample: return "cpp"
-    if "#include <vector>" in sample: return "cpp"
-    if "using namespace std;" in sample: return "cpp"
-    if "#include <" in sample and ".h>" in sample: return "c"
-    
-    # Python Imports/Defs (Strong)
-    if re.search(r'^import [a-zA-Z0-9_]+', sample, re.MULTILINE): return "python"
-    if re.search(r'^from [a-zA-Z0-9_]+ import', sample, re.MULTILINE): return "python"
-    if re.search(r'def [a-zA-Z0-9_]+\(', sample): return "python"
-    if re.search(r'class [a-zA-Z0-9_]+(\(|:)', sample): return "python"
-    if "if __name__ == " in sample: return "python"
-
-    # HTML/XML Tags (Strong, if well-formed)
-    if "<" in text and ">" in text:
-        if re.search(r'<[a-zA-Z0-9_-]+.*?>', text):
-             if "</body>" in text or "</div>" in text or "<script" in text or "<br" in text or "<p>" in text: return "html"
-             # If strictly XML like, return XML. But C includes might trip this if logical operators are used.
-             pass
+    if text.startswith("#!"):
+        first_line = text.split("\n", 1)[0]
+        for needle, language in SHEBANG_RULES:
+            if needle in first_line:
+                return language, 1.0
 
-    # 3. System (Gio) Content Sniffing
-    import gi
-    try:
-        gi.require_version('GtkSource', '4')
-    except ValueError:
-        gi.require_version('GtkSource', '3.0')
-    from gi.repository import Gio, GtkSource
+    # 2. Strong Structure Indicators (Java, C++, Go, Python Defs, HTML)
+    sample = text[:SAMPLE_SIZE]
+    strong_rules, loose_rules = _rules_for(_scan_features(sample))
+    language, confidence = _score(strong_rules, sample)
+    if language:
+        return language, confidence
 
-    data = text.encode("utf-8")
-    content_type, uncertain = Gio.content_type_guess(None, data)
-    
-    # If Gio is confident and it's not just generic text
-    if not uncertain and content_type != "text/plain":
-        # Exception: Gio often sees C++ or even Python/Java as partial C source.
-        # We allow falling through for C/C++ types to let our strict/loose heuristics confirm.
-        if content_type in ["text/x-csrc", "text/x-c++src", "text/x-chdr"]:
-            pass # Fall through to heuristics
-        else:
-            manager = GtkSource.LanguageManager.get_default()
-            language = manager.guess_language(None, content_type)
-            if language:
-                return language.get_id()
+    # 3. System (Gio) Content Sniffing
+    language = _guess_by_content_type(sample)
+    if language:
+        return language, CONFIDENCE_HIGH
 
     # 4. JSON
-    if (text.startswith("{") and text.endswith("}")) or \
-       (text.startswith("[") and text.endswith("]")):
-        try:
-            import string
-            no_space = "".join(text.split())
-            if no_space == "{}" or no_space == "[]": return None
-            json.loads(text)
-            return "json"
-        except:
-             if text.startswith("{") and re.search(r'"[^"]*"\s*:', text): return "json"
-             elif text.startswith("["): return "json"
+    if (sample[0] == "{" and text[-1] == "}") or (sample[0] == "[" and text[-1] == "]"):
+        # Nothing but whitespace between the brackets
+        if sample[1:].strip() in ("}", "]", ""):
+            return None, 0.0
+        # Only parse documents that fit in the sample
+        if len(text) <= SAMPLE_SIZE:
+            try:
+                json.loads(text)
+                return "json", CONFIDENCE_HIGH
+            except (ValueError, RecursionError):
+                pass
+        if sample[0] == "[" or _JSON_KEY_RE.search(sample):
+            return "json", CONFIDENCE_MEDIUM
 
     # 5. Looser Keyword Heuristics (Fallback)
-    
-    # C/C++ bodies
-    if "int main(" in sample and "{" in sample:
-        if "std::" in sample or "cout <<" in sample: return "cpp"
-        return "c"
-    if "printf(" in sample and ";" in sample: return "c"
-    if "std::" in sample or "cout <<" in sample: return "cpp"
-
-    # Java System.out
-    if "System.out.println" in sample: return "java"
-
-    # Python Loose (Strict Regex required to avoid prose matches)
-    # Match 'for x in y:' on a SINGLE line
-    if re.search(r'^\s*for\s+[a-zA-Z0-9_, ]+\s+in\s+.+:\s*$', sample, re.MULTILINE): return "python"
-    # Match 'print("...")' but NOT 'System.out.print('
-    if re.search(r'(^|\s)print\s*\(["\']', sample): return "python"
-
-    # JavaScript
-    if "function " in sample and "{" in sample: return "js"
-    if "console.log(" in sample: return "js"
-    if "const " in sample and "=" in sample: return "js"
-    if "let " in sample and "=" in sample: return "js"
-    if "document." in sample or "window." in sample: return "js"
-            
-    # CSS
-    if "body {" in sample or ".class" in sample or "div {" in sample:
-        if "{" in sample and ":" in sample and ";" in sample: return "css"
-    if "@media" in sample or "@import" in sample: return "css"
+    return _score(loose_rules, sample)
 
-    # Markdown
-    if re.search(r'^#\s', sample, re.MULTILINE) or re.search(r'^\*\*.*\*\*$', sample, re.MULTILINE):
-         return "markdown"
 
-    # XML Fallback (Last resort)
-    if "<" in text and ">" in text:
-        if re.search(r'<[a-zA-Z0-9_-]+.*?>', text):
-             if "</body>" in text or "</div>" in text: return "html"
-             # Only return xml if it really looks like xml structure
-             if "<?xml" in text: return "xml"
-             # Don't default to XML for random brackets in text
-             
-    return None
+def detect_language_by_content(text):
+    """
+    Analyzes text content to guess the programming language.
+    Returns a GtkSourceView language ID or None.
+    """
+    return classify_language(text)[0]
 
 
 def format_xml(text):
@@ -282,7 +466,8 @@ def generate_hex_dump(text):
                     ascii_repr += "."
             
             result.append(f"{offset}  {hex_bytes}{padding}  |{ascii_repr}|")
-            
+
+        return "\n".join(result)
     except Exception as e:
         return f"Error generating hex dump: {e}"
 
@@ -0,0 +1,123 @@
+"""
+Editor appearance shared by every tab of every window.
+
+The editor font used to be set per view with the deprecated
+modify_font(), which gives each view a CSS provider of its own, so a
+font change restyled hundreds of providers one by one. Here one
+Gtk.CssProvider on the screen styles all views carrying EDITOR_CLASS;
+a font change reloads that one provider. Zoom levels are classes with
+a rule each in the same provider, so zooming a tab only swaps a class.
+
+Style schemes and languages are looked up once per id and cached.
+"""
+import gi
+gi.require_version('Gtk', '3.0')
+try:
+    gi.require_version('GtkSource', '4')
+except ValueError:
+    gi.require_version('GtkSource', '3.0')
+from gi.repository import Gtk, Gdk, GtkSource, Pango
+
+EDITOR_CLASS = "zenpad-editor"
+DEFAULT_FONT = "Monospace 12"
+# Points added per zoom step, and the bounds of the zoomed size
+ZOOM_STEP = 2
+MIN_FONT_SIZE = 6
+MAX_ZOOM = 20
+
+_appearance = None
+_schemes = {}
+_languages = {}
+
+
+def zoom_class(level):
+    """Style class of a zoom level; level 0 has none."""
+    if level == 0:
+        return None
+    return f"zenpad-zoom-{'in' if level > 0 else 'out'}{abs(level)}"
+
+
+def font_css(font_desc, size):
+    """CSS declarations for font_desc at size points."""
+    family = (font_desc.get_family() or "Monospace").replace("\\", "\\\\").replace('"', '\\"')
+    style = {Pango.Style.ITALIC: "italic", Pango.Style.OBLIQUE: "oblique"}.get(font_desc.get_style(), "normal")
+    return (f'font-family: "{family}"; font-size: {size:g}pt; '
+            f"font-weight: {int(font_desc.get_weight())}; font-style: {style};")
+
+
+class Appearance:
+    """The shared CSS provider with the editor font and its zoom levels."""
+
+    def __init__(self):
+        self.provider = Gtk.CssProvider()
+        screen = Gdk.Screen.get_default()
+        if screen is not None:
+            Gtk.StyleContext.add_provider_for_screen(screen, self.provider,
+                                                     Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+        self.font_name = None
+        self.font_desc = None
+        self.set_font(DEFAULT_FONT)
+
+    @property
+    def base_size(self):
+        size = self.font_desc.get_size() / Pango.SCALE
+        return size if size > 0 else 12
+
+    def set_font(self, font_name):
+        """Restyles every editor view with font_name (a Pango font description string)."""
+        font_name = font_name or DEFAULT_FONT
+        if font_name == self.font_name:
+            return
+        self.font_name = font_name
+        self.font_desc = Pango.FontDescription(font_name)
+
+        rules = [f"textview.{EDITOR_CLASS} {{ {font_css(self.font_desc, self.base_size)} }}"]
+        for level in range(self.min_zoom(), MAX_ZOOM + 1):
+            if level:
+                size = self.base_size + level * ZOOM_STEP
+                rules.append(f"textview.{EDITOR_CLASS}.{zoom_class(level)} {{ font-size: {size:g}pt; }}")
+        self.provider.load_from_data("\n".join(rules).encode("UTF-8"))
+
+    def min_zoom(self):
+        """Lowest zoom level that stays at MIN_FONT_SIZE or above."""
+        return -int(max(0, self.base_size - MIN_FONT_SIZE) // ZOOM_STEP)
+
+    def font_at(self, level):
+        """Pango.FontDescription of the font at a zoom level."""
+        font_desc = self.font_desc.copy()
+        font_desc.set_size(int((self.base_size + level * ZOOM_STEP) * Pango.SCALE))
+        return font_desc
+
+
+def get_appearance():
+    """The Appearance shared by all windows, created on first use."""
+    global _appearance
+    if _appearance is None:
+        _appearance = Appearance()
+    return _appearance
+
+
+def style_view(view, zoom_level=0, old_level=0):
+    """Puts view under the shared provider, at a zoom level."""
+    context = view.get_style_context()
+    context.add_class(EDITOR_CLASS)
+    old_class = zoom_class(old_level)
+    if old_class:
+        context.remove_class(old_class)
+    new_class = zoom_class(zoom_level)
+    if new_class:
+        context.add_class(new_class)
+
+
+def lookup_scheme(scheme_id):
+    """GtkSource.StyleScheme of scheme_id (None if not installed), cached."""
+    if scheme_id not in _schemes:
+        _schemes[scheme_id] = GtkSource.StyleSchemeManager.get_default().get_scheme(scheme_id) if scheme_id else None
+    return _schemes[scheme_id]
+
+
+def lookup_language(lang_id):
+    """GtkSource.Language of lang_id (None if not installed), cached."""
+    if lang_id not in _languages:
+        _languages[lang_id] = GtkSource.LanguageManager.get_default().get_language(lang_id) if lang_id else None
+    return _languages[lang_id]
@@ -0,0 +1,75 @@
+import gi
+import time
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad.dirty import is_dirty, file_signature
+
+# Seconds without an edit before an auto-save may start
+TYPING_PAUSE = 2.0
+
+
+class AutoSaver:
+    """
+    Saves a window's modified tabs every auto_save_interval minutes.
+
+    Each run only looks at tabs whose DirtyTracker says they changed (no
+    hashing) and hands them to window.save_to_path(), so the writes happen
+    on FileSaver's worker threads with its bounded concurrency. A run that
+    falls while the user is typing waits until typing pauses. Tabs whose
+    file was changed on disk since it was loaded or saved are left alone,
+    so an auto-save never overwrites someone else's changes.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.last_edit = 0.0
+        self._timer_id = 0
+        self._retry_id = 0
+
+    def configure(self, enabled, interval):
+        """(Re)starts the timer; interval is in minutes."""
+        self.stop()
+        if enabled and interval:
+            self._timer_id = GLib.timeout_add_seconds(int(interval * 60), self.on_timer)
+
+    def stop(self):
+        for source_id in (self._timer_id, self._retry_id):
+            if source_id:
+                GLib.source_remove(source_id)
+        self._timer_id = self._retry_id = 0
+
+    def note_edit(self):
+        self.last_edit = time.monotonic()
+
+    def on_timer(self):
+        self.run()
+        return True
+
+    def on_retry(self):
+        self._retry_id = 0
+        self.run()
+        return False
+
+    def run(self):
+        quiet = time.monotonic() - self.last_edit
+        if quiet < TYPING_PAUSE:
+            # Back off until the user stops typing
+            if not self._retry_id:
+                self._retry_id = GLib.timeout_add(int((TYPING_PAUSE - quiet) * 1000) + 50, self.on_retry)
+            return
+
+        notebook = self.window.notebook
+        for i in range(notebook.get_n_pages()):
+            editor = notebook.get_nth_page(i)
+            if self.should_save(editor):
+                self.window.save_to_path(editor, editor.file_path, auto=True)
+
+    def should_save(self, editor):
+        if not editor.file_path or editor.read_only or editor.loader or editor.pending or editor.saver or editor.reloader or editor.follower:
+            return False
+        if not is_dirty(editor):
+            return False
+        if file_signature(editor.file_path) != editor.disk_signature:
+            print(f"Auto-save skipped {editor.file_path}: changed on disk")
+            return False
+        return True
@@ -0,0 +1,120 @@
+import hashlib
+import os
+
+
+def content_hash(text):
+    """Hash used to compare buffer content against the saved state."""
+    return hashlib.md5(text.encode("UTF-8")).hexdigest()
+
+
+def stat_signature(st):
+    """What identifies a version of a file on disk, from an os.stat() result."""
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def file_signature(path):
+    """stat_signature() of path, or None if it does not exist."""
+    try:
+        return stat_signature(os.stat(path))
+    except OSError:
+        return None
+
+
+class DirtyTracker:
+    """
+    Tracks whether a buffer differs from its last saved state without
+    copying or hashing the whole buffer on every keystroke.
+
+    Every insert/delete bumps a generation counter. Marking the buffer as
+    saved records that generation, the character count and a content hash.
+    Regular edits simply make the buffer dirty. Only when an undo/redo
+    brings the buffer back to its saved length is the content hashed once
+    to find out whether the saved state was actually reached.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+        self.generation = 0
+        self.saved_generation = 0
+        self.saved_length = buffer.get_char_count()
+        self.saved_hash = None
+
+        self._clean = True
+        self._needs_verify = False
+        self._in_history = False
+
+        buffer.connect_after("insert-text", self.on_edit)
+        buffer.connect_after("delete-range", self.on_edit)
+        buffer.connect("undo", self.on_history_begin)
+        buffer.connect("redo", self.on_history_begin)
+        buffer.connect_after("undo", self.on_history_end)
+        buffer.connect_after("redo", self.on_history_end)
+
+    def on_edit(self, buffer, *args):
+        self.generation += 1
+        if not self._in_history:
+            self._clean = False
+            self._needs_verify = False
+
+    def on_history_begin(self, buffer):
+        self._in_history = True
+
+    def on_history_end(self, buffer):
+        self._in_history = False
+        if self.generation == self.saved_generation:
+            return
+
+        # Undo/Redo can only have restored the saved state if the length matches
+        if self.saved_hash is not None and buffer.get_char_count() == self.saved_length:
+            self._needs_verify = True
+        else:
+            self._clean = False
+            self._needs_verify = False
+
+    def snapshot(self):
+        """Current (generation, length), to be passed back to mark_saved()."""
+        return self.generation, self.buffer.get_char_count()
+
+    def mark_saved(self, content=None, digest=None, snapshot=None):
+        """
+        Records the current buffer state as the saved one.
+        Pass the text already in hand (loaded or written), or its
+        content_hash as digest, to avoid copying it again.
+
+        A background save passes the snapshot() taken with its text: if the
+        buffer was edited since, that earlier state is recorded as saved
+        and the buffer stays dirty.
+        """
+        if digest is None:
+            if content is None:
+                start, end = self.buffer.get_bounds()
+                content = self.buffer.get_text(start, end, True)
+            digest = content_hash(content)
+        generation, length = snapshot or self.snapshot()
+
+        self.saved_hash = digest
+        self.saved_length = length
+        self.saved_generation = generation
+        self._clean = generation == self.generation
+        self._needs_verify = False
+
+    def is_dirty(self):
+        if not self.buffer.get_modified():
+            return False
+        if self.generation == self.saved_generation:
+            return False
+
+        if self._needs_verify:
+            # Single full-content check, cached until the next edit
+            start, end = self.buffer.get_bounds()
+            content = self.buffer.get_text(start, end, True)
+            self._clean = content_hash(content) == self.saved_hash
+            self._needs_verify = False
+
+        return not self._clean
+
+
+def is_dirty(editor):
+    """Returns True if the editor's buffer has unsaved changes."""
+    return editor.dirty.is_dirty()
@@ -5,8 +5,17 @@ try:
     gi.require_version('GtkSource', '4')
 except ValueError:
     gi.require_version('GtkSource', '3.0')
-from gi.repository import Gtk, GtkSource, Pango, Gdk
-from zenpad import analysis
+from gi.repository import Gtk, GtkSource, Gdk
+from zenpad.appearance import MAX_ZOOM, get_appearance, lookup_scheme, style_view
+from zenpad.dirty import DirtyTracker
+from zenpad.langdetect import LanguageDetector
+from zenpad.profiler import get_profiler
+
+# editor_padding setting -> margin in pixels
+PADDING = {"small": 2, "normal": 6, "large": 12}
+# Settings handled by EditorTab.apply_style
+STYLE_KEYS = ("show_line_numbers", "word_wrap", "highlight_current_line", "auto_indent",
+              "tab_width", "use_spaces", "theme", "editor_padding")
 
 class EditorTab(Gtk.ScrolledWindow):
     def __init__(self, search_settings=None):
@@ -14,19 +23,51 @@ class EditorTab(Gtk.ScrolledWindow):
         self.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
         
         self.buffer = GtkSource.Buffer()
-        self.last_buffer = None
+        self.dirty = DirtyTracker(self.buffer)
         self.view = GtkSource.View.new_with_buffer(self.buffer)
         
         self.file_path = None
+        # Background FileLoader while the content is still coming in
+        self.loader = None
+        # FileSaver while a save is being written
+        self.saver = None
+        # FileReloader while changes from disk are being merged in
+        self.reloader = None
+        # LogFollower while the tab follows its file (tail -f)
+        self.follower = None
+        # True when the buffer may hold only part of the file (after Follow);
+        # read-only until the whole file is loaded again
+        self.partial = False
+        # Restore state while the content is not loaded yet (lazy session tabs)
+        self.pending = None
+        # file_signature() when last loaded or saved, to notice outside changes
+        self.disk_signature = None
+        self.disk_hash = None  # md5 of the raw bytes, checked when the signature is ambiguous
+        # hashlib states behind disk_hash and dirty.saved_hash, so a reload of
+        # a file that only grew hashes just the new bytes (see zenpad.reload)
+        self.disk_md5 = None
+        self.text_md5 = None
+        # (path, callback) registered with zenpad.filewatch
+        self.file_watch = None
+        self.changed_on_disk = False
+        self.last_auto_save = None
+        # How the file is stored; set on load, reused on save
+        self.encoding = "utf-8"
+        self.newline = "\n"
+        self.bom = False
+        # Read-only tab types (large files) stay read-only in any mode
+        self.read_only = False
+        # Appearance settings that changed while the tab was hidden: key -> value
+        self.pending_style = {}
         
-        # Connect to changed signal for auto-detection
+        # Connect to changed signal for auto-detection (debounced)
+        self.language_detector = LanguageDetector(self.buffer)
         self.buffer.connect("changed", self.on_buffer_changed)
+        self.connect("destroy", self.on_destroy)
         
-        # Search Context
+        # Search Context: only while the tab is in front (see ZenpadWindow.attach_search)
+        self.search_settings = search_settings
         self.search_context = None
-        if search_settings:
-            self.search_context = GtkSource.SearchContext.new(self.buffer, search_settings)
-            self.search_context.set_highlight(True)
         
         # Default Settings
         self.view.set_show_line_numbers(True)
@@ -44,67 +85,69 @@ class EditorTab(Gtk.ScrolledWindow):
         # Load Default Theme
         self.set_scheme("tango")
 
-        # Font (Default Monospace)
-        self.font_desc = Pango.FontDescription("Monospace 12")
-        self.view.modify_font(self.font_desc)
+        # Font: the provider shared by all views (see zenpad.appearance); zoom is per tab
+        self.zoom_level = 0
+        get_appearance()
+        style_view(self.view)
         
         # Handle scrolling (for zoom-in-out)
         self.view.connect('scroll-event', self.on_scroll)
         
+        # Key press to paint timing (--profile); must see the key first
+        profiler = get_profiler()
+        if profiler:
+            profiler.watch_key_to_paint(self.view)
+
         # Handle smart indentation on Enter
         self.view.connect("key-press-event", self.on_key_press)
 
         self.add(self.view)
         self.show_all()
 
+    def on_destroy(self, widget):
+        self.language_detector.cancel()
+        if self.loader:
+            self.loader.cancel()
+        if self.reloader:
+            self.reloader.cancel()
+        if self.follower:
+            self.follower.stop()
+
     def on_buffer_changed(self, buffer):
-        """Triggers reliable auto-detection on content change"""
-        # We only auto-detect if we don't have a rigid file path override
-        # Or should we always? User said "Decouple from save state".
-        # Let's run it.
-        self.auto_detect_language()
+        """Schedules auto-detection on content change (runs once typing goes idle)"""
+        self.language_detector.schedule()
 
     def auto_detect_language(self):
-        # Limit to detecting from the first 1000 chars for speed
-        start = self.buffer.get_start_iter()
-        end = self.buffer.get_start_iter()
-        end.forward_chars(1000)
-        text = self.buffer.get_text(start, end, True)
-        
-        detected_id = analysis.detect_language_by_content(text)
-        
-        if detected_id:
-            manager = GtkSource.LanguageManager.get_default()
-            language = manager.get_language(detected_id)
-            current_lang = self.buffer.get_language()
-            
-            # Only switch if different, to avoid thrashing
-            if language and current_lang != language:
-                self.buffer.set_language(language)
+        """Runs content-based detection right away"""
+        self.language_detector.detect()
+
+    def set_language(self, language):
+        """Sets an explicit language; content detection will no longer override it"""
+        self.language_detector.pin(language)
+        self.buffer.set_language(language)
+
+    @property
+    def font_desc(self):
+        """The font the view is shown in, zoom included."""
+        return get_appearance().font_at(self.zoom_level)
+
+    def set_zoom(self, level):
+        level = max(get_appearance().min_zoom(), min(MAX_ZOOM, level))
+        if level != self.zoom_level:
+            style_view(self.view, level, self.zoom_level)
+            self.zoom_level = level
 
     def zoom_in(self):
-        size = self.font_desc.get_size()
-        # Pango size is in pango units (scaled by PANGO_SCALE usually, but string init might be different)
-        # If initialized from string "12", get_size() returns 12 * PANGO_SCALE.
-        
-        # However, checking behavior:
-        # If I set Absolute size, it might be different.
-        # Let's assume standard Pango unit handling.
-        
-        new_size = size + (2 * Pango.SCALE)
-        self.font_desc.set_size(new_size)
-        self.view.modify_font(self.font_desc)
+        self.set_zoom(self.zoom_level + 1)
 
     def zoom_out(self):
-        size = self.font_desc.get_size()
-        new_size = size - (2 * Pango.SCALE)
-        if new_size >= (6 * Pango.SCALE): # Minimum size 6
-            self.font_desc.set_size(new_size)
-            self.view.modify_font(self.font_desc)
+        self.set_zoom(self.zoom_level - 1)
 
     def zoom_reset(self):
-        self.font_desc.set_size(12 * Pango.SCALE)
-        self.view.modify_font(self.font_desc)
+        self.set_zoom(0)
+
+    def set_show_line_numbers(self, show):
+        self.view.set_show_line_numbers(show)
 
     def get_text(self):
         start_iter = self.buffer.get_start_iter()
@@ -115,11 +158,57 @@ class EditorTab(Gtk.ScrolledWindow):
         self.buffer.set_text(text)
 
     def set_scheme(self, scheme_id):
-        manager = GtkSource.StyleSchemeManager.get_default()
-        scheme = manager.get_scheme(scheme_id)
-        if scheme:
+        scheme = lookup_scheme(scheme_id)
+        # Setting the same scheme again would still re-highlight the buffer
+        if scheme and self.buffer.get_style_scheme() != scheme:
             self.buffer.set_style_scheme(scheme)
 
+    def apply_style(self, key, value):
+        """Applies one appearance setting (see ZenpadWindow.apply_setting) to the view."""
+        view = self.view
+        if key == "show_line_numbers":
+            self.set_show_line_numbers(value)
+        elif key == "word_wrap":
+            view.set_wrap_mode(Gtk.WrapMode.WORD if value else Gtk.WrapMode.NONE)
+        elif key == "highlight_current_line":
+            view.set_highlight_current_line(value)
+        elif key == "auto_indent":
+            view.set_auto_indent(value)
+        elif key == "tab_width":
+            view.set_tab_width(int(value))
+        elif key == "use_spaces":
+            view.set_insert_spaces_instead_of_tabs(value)
+        elif key == "theme":
+            self.set_scheme(value)
+        elif key == "editor_padding":
+            margin = PADDING.get(value, 6)
+            view.set_left_margin(margin)
+            view.set_right_margin(margin)
+
+    def attach_search(self, highlight=True):
+        """
+        The search context on the window's search settings, created if
+        needed. While attached it scans the whole buffer for matches in the
+        background whenever the search text changes.
+        """
+        if self.search_context is None and self.search_settings is not None:
+            self.search_context = GtkSource.SearchContext.new(self.buffer, self.search_settings)
+        if self.search_context is not None:
+            self.search_context.set_highlight(highlight)
+        return self.search_context
+
+    def detach_search(self):
+        """Drops the search context, with its scan and highlighting."""
+        if self.search_context is not None:
+            self.search_context.set_highlight(False)
+            self.search_context = None
+
+    def apply_pending_style(self):
+        """Catches up on the settings that changed while the tab was hidden."""
+        pending, self.pending_style = self.pending_style, {}
+        for key, value in pending.items():
+            self.apply_style(key, value)
+
     def get_cursor_position(self):
         insert = self.buffer.get_insert()
         iter = self.buffer.get_iter_at_mark(insert)
@@ -131,7 +220,7 @@ class EditorTab(Gtk.ScrolledWindow):
         manager = GtkSource.LanguageManager.get_default()
         language = manager.guess_language(filename, None)
         if language:
-            self.buffer.set_language(language)
+            self.set_language(language)
 
     def on_scroll(self, gpointer, event):
         if not (event.state & Gdk.ModifierType.CONTROL_MASK):
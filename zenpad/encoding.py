@@ -0,0 +1,143 @@
+import codecs
+
+# Bytes looked at to guess the charset of a file without a BOM
+SAMPLE_SIZE = 1024 * 1024
+
+# Longest first: the UTF-32 LE BOM starts with the UTF-16 LE one
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+LINE_ENDINGS = ("\n", "\r\n", "\r")
+
+
+def normalize(encoding):
+    """Canonical codec name ("UTF8" -> "utf-8"). Raises LookupError."""
+    return codecs.lookup(encoding).name
+
+
+def sniff_bom(data):
+    """Returns (encoding, BOM length), or (None, 0) without a BOM."""
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+
+def bom_for(encoding):
+    """The BOM written for encoding, or b"" if it has none."""
+    for bom, name in BOMS:
+        if name == encoding:
+            return bom
+    return b""
+
+
+def guess_encoding(sample):
+    """
+    Guesses the charset of a BOM-less sample from its byte statistics.
+
+    UTF-16/32 text is recognized by where its NUL bytes fall, then the
+    sample is tried as UTF-8 (a strict format, so passing is strong
+    evidence) and as Windows-1252. ISO-8859-1 is the last resort: it
+    decodes any byte sequence and writes it back unchanged.
+    """
+    sample = sample[:SAMPLE_SIZE]
+    if not sample:
+        return "utf-8"
+
+    nuls = sample.count(0)
+    if nuls > len(sample) // 4:
+        # Mostly-ASCII UTF-16 has a NUL in every other byte, UTF-32 in three of four
+        lanes = [sample[i::4].count(0) for i in range(4)]
+        quarter = len(sample) // 4 or 1
+        if lanes[1] > quarter * 0.9 and lanes[2] > quarter * 0.9:
+            if lanes[3] > quarter * 0.9:
+                return "utf-32-le"
+            if lanes[0] > quarter * 0.9:
+                return "utf-32-be"
+        even = lanes[0] + lanes[2]
+        odd = lanes[1] + lanes[3]
+        if odd > even * 4:
+            return "utf-16-le"
+        if even > odd * 4:
+            return "utf-16-be"
+
+    try:
+        # final=False: the sample may end inside a multi-byte sequence
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "iso8859-1"
+
+
+def detect(head):
+    """
+    Returns (encoding, BOM length) for a file starting with head: the BOM
+    if there is one, otherwise guess_encoding().
+    """
+    encoding, skip = sniff_bom(head)
+    if encoding:
+        return encoding, skip
+    return guess_encoding(head), 0
+
+
+class LineEndingCounter:
+    """Counts LF, CRLF and CR line endings in text fed in chunks."""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(LINE_ENDINGS, 0)
+        self._pending_cr = False
+
+    def feed(self, text):
+        if not text:
+            return
+        counts = self.counts
+        if self._pending_cr:
+            # A CRLF split across chunks was counted as a CR and an LF
+            if text[0] == "\n":
+                counts["\r"] -= 1
+                counts["\n"] -= 1
+                counts["\r\n"] += 1
+        crlf = text.count("\r\n")
+        counts["\r\n"] += crlf
+        counts["\n"] += text.count("\n") - crlf
+        counts["\r"] += text.count("\r") - crlf
+        self._pending_cr = text[-1] == "\r"
+
+    @property
+    def dominant(self):
+        """The most common line ending; LF if there are none."""
+        best = max(LINE_ENDINGS, key=lambda ending: self.counts[ending])
+        return best if self.counts[best] else "\n"
+
+
+def encode_text(text, encoding, newline="\n", bom=False):
+    """Encodes buffer text (LF line endings) the way the file is stored."""
+    if newline != "\n":
+        text = text.replace("\n", newline)
+    data = text.encode(encoding)
+    return bom_for(encoding) + data if bom else data
+
+
+def decode_bytes(data, encoding, bom=False):
+    """
+    Decodes a whole file the way FileLoader does: returns its text with
+    LF line endings and the dominant original line ending.
+    """
+    if bom and data.startswith(bom_for(encoding)):
+        data = data[len(bom_for(encoding)):]
+    text = data.decode(encoding)
+    counter = LineEndingCounter()
+    counter.feed(text)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, counter.dominant
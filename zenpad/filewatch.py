@@ -0,0 +1,114 @@
+import gi
+import hashlib
+import threading
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gio, GLib
+from zenpad.dirty import file_signature
+
+# Events for a path within this many ms are handled as one
+COALESCE_MS = 300
+HASH_CHUNK = 1024 * 1024
+
+
+class FileWatcher:
+    """
+    One Gio.FileMonitor per watched path, shared by every tab and window
+    that has the file open.
+
+    A save, checkout or rotation produces a burst of monitor events; they
+    are coalesced and the subscribers of the path are called once, after
+    COALESCE_MS of quiet. Nothing runs while files are not changing: there
+    is no polling.
+    """
+
+    def __init__(self):
+        self.watches = {}  # path -> [monitor, [callbacks], coalesce source id]
+
+    def watch(self, path, callback):
+        """Calls callback(path) on the main thread after path changed."""
+        watch = self.watches.get(path)
+        if watch is None:
+            monitor = Gio.File.new_for_path(path).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            monitor.connect("changed", self.on_changed, path)
+            watch = self.watches[path] = [monitor, [], 0]
+        watch[1].append(callback)
+
+    def unwatch(self, path, callback):
+        watch = self.watches.get(path)
+        if watch is None:
+            return
+        if callback in watch[1]:
+            watch[1].remove(callback)
+        if not watch[1]:
+            if watch[2]:
+                GLib.source_remove(watch[2])
+            watch[0].cancel()
+            del self.watches[path]
+
+    def on_changed(self, monitor, file, other_file, event_type, path):
+        if event_type == Gio.FileMonitorEvent.ATTRIBUTE_CHANGED:
+            return
+        watch = self.watches.get(path)
+        if watch is None:
+            return
+        # Restart the quiet period on every event of the burst
+        if watch[2]:
+            GLib.source_remove(watch[2])
+        watch[2] = GLib.timeout_add(COALESCE_MS, self.on_settled, path)
+
+    def on_settled(self, path):
+        watch = self.watches.get(path)
+        if watch is None:
+            return False
+        watch[2] = 0
+        for callback in list(watch[1]):
+            callback(path)
+        return False
+
+
+def check_file(path, signature, digest, on_result):
+    """
+    Finds out whether path still holds the version with the given
+    file_signature() and md5 digest of its raw bytes. A different size,
+    or a missing file, decides it right away. Otherwise the only sure
+    answer is the content, so the file is hashed on a worker thread.
+
+    on_result(changed, new signature) is called on the main thread;
+    changed is None when the file is gone.
+    """
+    current = file_signature(path)
+    if current is None:
+        on_result(None, None)
+        return
+    if current == signature:
+        on_result(False, current)
+        return
+    if signature is None or digest is None or current[1] != signature[1]:
+        on_result(True, current)
+        return
+
+    # Same size, new inode or mtime: touched, rewritten unchanged, or edited in place
+    def worker():
+        md5 = hashlib.md5()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    md5.update(chunk)
+            changed = md5.hexdigest() != digest
+        except OSError:
+            changed = None
+        GLib.idle_add(on_result, changed, current)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+
+_watcher = None
+
+
+def get_watcher():
+    """The FileWatcher shared by all windows."""
+    global _watcher
+    if _watcher is None:
+        _watcher = FileWatcher()
+    return _watcher
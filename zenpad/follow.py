@@ -0,0 +1,179 @@
+import gi
+import codecs
+import io
+import os
+import threading
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad import encoding as encodings
+from zenpad.dirty import stat_signature
+from zenpad.filewatch import get_watcher
+
+# Block size when scanning back from the end for the last lines
+TAIL_BLOCK = 64 * 1024
+# Stands in for the content hash while following (see LogFollower.apply)
+FOLLOWING = "following"
+
+
+def tail_offset(f, size, lines):
+    """Byte offset in f where its last `lines` lines start."""
+    pos = size
+    found = 0
+    while pos > 0:
+        start = max(0, pos - TAIL_BLOCK)
+        f.seek(start)
+        block = f.read(pos - start)
+        end = len(block)
+        while True:
+            i = block.rfind(b"\n", 0, end)
+            if i == -1:
+                break
+            # The newline that ends the file does not start a line
+            if start + i != size - 1:
+                found += 1
+                if found == lines:
+                    return start + i + 1
+            end = i
+        pos = start
+    return 0
+
+
+class LogFollower:
+    """
+    Follow mode (tail -f) for a tab: keeps appending what is written to
+    its file.
+
+    The byte offset read so far is remembered, and the shared FileWatcher
+    reports changes, so every change costs a read of just the new bytes,
+    on a worker thread, and one buffer insert. Text is decoded with an
+    incremental decoder, so a character or CRLF split by the writer is
+    completed by the next read. A different inode (the log was rotated) or
+    a file shorter than the offset (truncated) starts over from the top.
+
+    With max_lines, lines beyond it are trimmed from the top after each
+    append, and a restart only reads the last max_lines lines, so a tab
+    following a log for days stays the same size. The view stays pinned
+    to the end unless the user scrolled up.
+
+    The buffer takes these edits without undo history and stays clean.
+    on_update(follower) is called on the main thread after every read;
+    follower.error is set if the file could not be read (e.g. in the
+    middle of a rotation; the next change retries).
+    """
+
+    def __init__(self, editor, path, max_lines=0, on_update=None):
+        self.editor = editor
+        self.path = path
+        self.max_lines = max_lines
+        self.on_update = on_update
+        self.encoding = editor.encoding
+        self.bom = editor.bom
+
+        self.offset = 0
+        self.signature = None
+        self.error = None
+        self.stopped = False
+
+        self._decoder = None
+        self._translator = None
+        self._reading = False
+        self._again = False
+        self._restart = False
+
+    def start(self):
+        get_watcher().watch(self.path, self.on_change)
+        self.read(restart=True)
+
+    def stop(self):
+        if not self.stopped:
+            self.stopped = True
+            get_watcher().unwatch(self.path, self.on_change)
+
+    def on_change(self, path):
+        self.read()
+
+    def read(self, restart=False):
+        self._restart = self._restart or restart
+        if self._reading:
+            # One read at a time; go again once it is in
+            self._again = True
+            return
+        self._reading = True
+        restart, self._restart = self._restart, False
+        thread = threading.Thread(target=self.worker, args=(restart,), daemon=True)
+        thread.start()
+
+    # -- Worker thread: no Gtk calls here --
+
+    def worker(self, restart):
+        text = ""
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if self.signature and (st.st_ino != self.signature[0] or st.st_size < self.offset):
+                    # Rotated or truncated
+                    restart = True
+                if restart:
+                    self.offset = self.start_offset(f, st.st_size)
+                    self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+                    self._translator = io.IncrementalNewlineDecoder(None, translate=True)
+                f.seek(self.offset)
+                data = f.read(st.st_size - self.offset)
+            self.offset += len(data)
+            self.signature = stat_signature(st)
+            text = self._translator.decode(self._decoder.decode(data))
+            self.error = None
+        except Exception as e:
+            # apply() must run whatever happened: it clears _reading
+            self.error = e
+            text = ""
+            restart = False
+        GLib.idle_add(self.apply, text, restart)
+
+    def start_offset(self, f, size):
+        if self.max_lines and "\n".encode(self.encoding) == b"\n":
+            # Byte-oriented encoding: a b"\n" is a line break
+            offset = tail_offset(f, size, self.max_lines)
+            if offset:
+                return offset
+        return len(encodings.bom_for(self.encoding)) if self.bom else 0
+
+    # -- Main thread --
+
+    def apply(self, text, restart):
+        self._reading = False
+        if self.stopped:
+            return False
+        editor = self.editor
+        buffer = editor.buffer
+        view = editor.view
+        adjustment = view.get_vadjustment()
+        at_end = adjustment.get_value() + adjustment.get_page_size() >= adjustment.get_upper() - 1
+
+        if restart or text:
+            buffer.begin_not_undoable_action()
+            if restart:
+                buffer.set_text(text)
+            else:
+                buffer.insert(buffer.get_end_iter(), text)
+            if self.max_lines:
+                # get_line_count() includes the empty line after a final newline
+                excess = buffer.get_line_count() - 1 - self.max_lines
+                if excess > 0:
+                    buffer.delete(buffer.get_start_iter(), buffer.get_iter_at_line(excess))
+            buffer.end_not_undoable_action()
+            # Hashing the whole buffer on every append would defeat the point;
+            # the tab is read-only while following, and stopping loads the whole file again
+            editor.dirty.mark_saved(digest=FOLLOWING)
+            buffer.set_modified(False)
+
+            if restart or at_end:
+                buffer.place_cursor(buffer.get_end_iter())
+                view.scroll_to_mark(buffer.get_insert(), 0.0, False, 0.0, 1.0)
+
+        if self.on_update:
+            self.on_update(self)
+        if self._again:
+            self._again = False
+            self.read()
+        return False
@@ -0,0 +1,300 @@
+import gi
+import fcntl
+import glob
+import itertools
+import json
+import os
+import queue
+import threading
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad import encoding as encodings
+from zenpad.dirty import content_hash, is_dirty
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".config", "zenpad", "recovery")
+# Pending edits are handed to the writer this often
+FLUSH_INTERVAL_MS = 500
+# Journal bytes written before it is compacted into snapshots
+COMPACT_BYTES = 256 * 1024
+
+_journal_numbers = itertools.count()
+
+
+class RecoveryJournal:
+    """
+    Append-only journal of unsaved edits, one per window, for crash recovery.
+
+    Every buffer insert and delete becomes a small delta record. Consecutive
+    keystrokes are merged while they wait, and a timer hands the batch to a
+    writer thread every FLUSH_INTERVAL_MS, so typing costs a few bytes of
+    I/O per key and never blocks on the disk. A tab's starting point is
+    either the file it was loaded from (identified by its content hash) or a
+    snapshot of its text. Once COMPACT_BYTES were appended, the journal is
+    rewritten as one snapshot per dirty tab.
+
+    Records are JSON lines with short keys:
+        {"o": "base", "t": tab, "path": ..., "enc": ..., "bom": ..., "hash": ...}
+        {"o": "snap", "t": tab, "path": ..., "enc": ..., "text": ...}
+        {"o": "i", "t": tab, "p": offset, "s": text}
+        {"o": "d", "t": tab, "p": offset, "n": length}
+        {"o": "close", "t": tab}
+
+    A clean exit deletes the journal; one left behind by a crash is found
+    by find_orphans() and turned back into text by replay().
+    """
+
+    def __init__(self, directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"journal-{os.getpid()}-{next(_journal_numbers)}.log")
+        self.file = open(self.path, "a", encoding="utf-8")
+        # Held while we run, so other instances do not take it for a crash
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self.tabs = {}  # editor -> tab state
+        self._tab_ids = itertools.count()
+        self._pending = []
+        self._flush_id = 0
+        self.written = 0  # bytes since the last compaction
+        # Guards written, which the writer thread adds to
+        self._lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self.write_worker, daemon=True)
+        self._writer.start()
+
+    # -- Main thread --
+
+    def attach(self, editor):
+        """Starts journaling editor's edits."""
+        state = {"id": next(self._tab_ids), "announced": False, "on_disk": False, "handlers": []}
+        self.tabs[editor] = state
+        buffer = editor.buffer
+        # Before the default handler, while the offsets are still the old ones
+        state["handlers"] = [
+            buffer.connect("insert-text", self.on_insert, editor),
+            buffer.connect("delete-range", self.on_delete, editor),
+        ]
+
+    def detach(self, editor):
+        """The tab was closed: its edits are no longer worth recovering."""
+        state = self.tabs.pop(editor, None)
+        if not state:
+            return
+        for handler_id in state["handlers"]:
+            editor.buffer.disconnect(handler_id)
+        if state["announced"]:
+            self.append({"o": "close", "t": state["id"]})
+
+    def rebase(self, editor):
+        """
+        The tab now matches its file on disk (loaded or saved). Later edits
+        are recorded relative to that file instead of to older records.
+        """
+        state = self.tabs.get(editor)
+        if not state or is_dirty(editor):
+            # Edits made while a save was running still build on the old base
+            return
+        state["announced"] = False
+        state["on_disk"] = True
+
+    def announce(self, editor, state):
+        """Writes the tab's starting point before its first recorded edit."""
+        state["announced"] = True
+        record = {"t": state["id"], "path": editor.file_path, "enc": editor.encoding}
+        if state["on_disk"]:
+            record.update(o="base", bom=editor.bom, hash=editor.dirty.saved_hash)
+        else:
+            # Untitled or not from disk: store the text (still the one before this edit)
+            record.update(o="snap", text=editor.get_text())
+        self.append(record)
+
+    def is_ignored(self, editor):
+        # Loads and reloads are not edits, and large file tabs cannot be edited
+        reloading = editor.reloader and editor.reloader.applying
+        return editor.loader or reloading or editor.follower or editor.pending or editor.read_only
+
+    def on_insert(self, buffer, location, text, length, editor):
+        if self.is_ignored(editor):
+            return
+        state = self.tabs[editor]
+        if not state["announced"]:
+            self.announce(editor, state)
+        offset = location.get_offset()
+
+        last = self._pending[-1] if self._pending else None
+        if last and last["o"] == "i" and last["t"] == state["id"] and last["p"] + len(last["s"]) == offset:
+            # Typing: grow the previous insert
+            last["s"] += text
+        else:
+            self.append({"o": "i", "t": state["id"], "p": offset, "s": text})
+
+    def on_delete(self, buffer, start, end, editor):
+        if self.is_ignored(editor):
+            return
+        state = self.tabs[editor]
+        if not state["announced"]:
+            self.announce(editor, state)
+        offset = start.get_offset()
+        length = end.get_offset() - offset
+
+        last = self._pending[-1] if self._pending else None
+        if last and last["o"] == "d" and last["t"] == state["id"] and offset + length == last["p"]:
+            # Backspacing: grow the previous delete leftwards
+            last["p"] = offset
+            last["n"] += length
+        else:
+            self.append({"o": "d", "t": state["id"], "p": offset, "n": length})
+
+    def append(self, record):
+        self._pending.append(record)
+        if not self._flush_id:
+            self._flush_id = GLib.timeout_add(FLUSH_INTERVAL_MS, self.flush)
+
+    def flush(self):
+        self._flush_id = 0
+        if self._pending:
+            self._queue.put(("append", self._pending))
+            self._pending = []
+        with self._lock:
+            full = self.written >= COMPACT_BYTES
+        if full:
+            self.compact()
+        return False
+
+    def compact(self):
+        """Replaces the journal with one starting point per tab."""
+        records = []
+        for editor, state in self.tabs.items():
+            if self.is_ignored(editor):
+                continue
+            if is_dirty(editor) or not editor.file_path:
+                state["announced"] = True
+                records.append({"o": "snap", "t": state["id"], "path": editor.file_path,
+                                "enc": editor.encoding, "text": editor.get_text()})
+            else:
+                state["announced"] = False
+        with self._lock:
+            self.written = 0
+        self._queue.put(("compact", records))
+
+    def close(self):
+        """Clean exit: nothing needs recovering, so the journal goes away."""
+        if self._flush_id:
+            GLib.source_remove(self._flush_id)
+            self._flush_id = 0
+        self._pending = []
+        self._queue.put(("close", None))
+        self._writer.join()
+
+    # -- Writer thread --
+
+    def write_worker(self):
+        while True:
+            command, records = self._queue.get()
+            try:
+                if command == "append":
+                    data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+                    self.file.write(data)
+                    self.file.flush()
+                    with self._lock:
+                        self.written += len(data)
+                elif command == "compact":
+                    self.write_compacted(records)
+                elif command == "close":
+                    self.file.close()
+                    os.unlink(self.path)
+                    return
+            except OSError as e:
+                print(f"Recovery journal error: {e}")
+
+    def write_compacted(self, records):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        # Take the lock on the new file before the old one goes away
+        new_file = open(tmp_path, "a", encoding="utf-8")
+        fcntl.flock(new_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.replace(tmp_path, self.path)
+        self.file.close()
+        self.file = new_file
+
+
+def find_orphans(directory=JOURNAL_DIR):
+    """Journals left behind by instances that did not exit cleanly."""
+    orphans = []
+    for path in sorted(glob.glob(os.path.join(directory, "journal-*.log"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                # Still locked: a running instance owns it
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            continue
+        except OSError:
+            continue
+        orphans.append(path)
+    return orphans
+
+
+def read_file_text(path, encoding, bom=False):
+    """
+    The file's text as the loader puts it in the buffer (LF line endings).
+    Without an encoding it is detected from the file, as the loader does.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not encoding:
+        encoding, skip = encodings.detect(data)
+        bom = skip > 0
+    return encodings.decode_bytes(data, encoding, bom)[0]
+
+
+def replay(path):
+    """
+    Rebuilds the unsaved tabs recorded in a journal. Returns a list of
+    (file path or None, text, error) for every tab that still had changes;
+    error is set when the tab could not be rebuilt (e.g. its file changed).
+    """
+    tabs = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from the crash
+                break
+            op, tab = record["o"], record["t"]
+            if op in ("base", "snap"):
+                tabs[tab] = {"path": record.get("path"), "enc": record.get("enc"), "bom": record.get("bom", False),
+                             "base": record.get("hash"), "text": record.get("text"), "ops": [], "error": None}
+            elif op == "close":
+                tabs.pop(tab, None)
+            elif tab in tabs:
+                tabs[tab]["ops"].append(record)
+
+    recovered = []
+    for tab in tabs.values():
+        if not tab["ops"] and tab["base"]:
+            # Matches the file on disk
+            continue
+        text = tab["text"]
+        if text is None:
+            try:
+                text = read_file_text(tab["path"], tab["enc"], tab["bom"])
+            except (OSError, ValueError) as e:
+                recovered.append((tab["path"], None, str(e)))
+                continue
+            if content_hash(text) != tab["base"]:
+                recovered.append((tab["path"], None, "the file was changed since"))
+                continue
+        for record in tab["ops"]:
+            pos = record["p"]
+            if record["o"] == "i":
+                text = text[:pos] + record["s"] + text[pos:]
+            else:
+                text = text[:pos] + text[pos + record["n"]:]
+        if tab["ops"] or text:
+            recovered.append((tab["path"], text, None))
+    return recovered
@@ -0,0 +1,124 @@
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad import analysis
+from zenpad.appearance import lookup_language
+from zenpad import trace
+
+# Only the start of the buffer is used for content detection
+SAMPLE_CHARS = 1000
+# Wait for typing to pause before detecting
+IDLE_DELAY_MS = 400
+
+
+class LanguageDetector:
+    """
+    Schedules content-based language detection for a single buffer.
+
+    Detection waits until typing goes idle, only re-runs when an edit
+    touched the sampled prefix, and stops for good once the language is
+    pinned (file path, explicit choice or a high-confidence result).
+    """
+
+    def __init__(self, buffer, sample_chars=SAMPLE_CHARS, delay_ms=IDLE_DELAY_MS):
+        self.buffer = buffer
+        self.sample_chars = sample_chars
+        self.delay_ms = delay_ms
+
+        # Cached result
+        self.language_id = None
+        self.confidence = 0.0
+        self.pinned = False
+
+        # True when the sampled prefix changed since the last detection
+        self.stale = True
+        self._source_id = 0
+
+        # Counters (how often detection ran vs. was skipped/coalesced)
+        self.runs = 0
+        self.skipped = 0
+
+        buffer.connect("insert-text", self.on_insert_text)
+        buffer.connect("delete-range", self.on_delete_range)
+
+    def on_insert_text(self, buffer, location, text, length):
+        if not self.stale and location.get_offset() <= self.sample_chars:
+            self.stale = True
+
+    def on_delete_range(self, buffer, start, end):
+        if not self.stale and start.get_offset() < self.sample_chars:
+            self.stale = True
+
+    def schedule(self):
+        """Called on every buffer change; (re)arms the idle timer if needed."""
+        if self.pinned or not self.stale:
+            self.skipped += 1
+            return
+
+        if self._source_id:
+            # Still typing: push detection back
+            GLib.source_remove(self._source_id)
+            self.skipped += 1
+        self._source_id = GLib.timeout_add(self.delay_ms, self.on_idle_timeout)
+
+    def on_idle_timeout(self):
+        self._source_id = 0
+        self.detect()
+        return False
+
+    def cancel(self):
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+
+    def detect(self):
+        """Runs detection immediately on the sampled prefix."""
+        self.cancel()
+        if self.pinned:
+            return
+
+        start = self.buffer.get_start_iter()
+        end = self.buffer.get_iter_at_offset(self.sample_chars)
+        text = self.buffer.get_text(start, end, True)
+
+        self.runs += 1
+        self.stale = False
+        with trace.span("classify_language", category="tools", chars=len(text)) as span:
+            detected_id, confidence = analysis.classify_language(text)
+            span.set(language=detected_id, confidence=confidence)
+        self.language_id = detected_id
+        self.confidence = confidence
+
+        if not detected_id:
+            return
+
+        if confidence >= analysis.CONFIDENCE_HIGH:
+            self.pinned = True
+
+        language = lookup_language(detected_id)
+        current_lang = self.buffer.get_language()
+
+        # Only switch if different, to avoid thrashing
+        if language and current_lang != language:
+            self.buffer.set_language(language)
+
+    def pin(self, language):
+        """Stops probing; the language came from a file path or the user."""
+        self.cancel()
+        self.pinned = True
+        self.language_id = language.get_id() if language else None
+        self.confidence = 1.0
+
+    def unpin(self):
+        self.pinned = False
+        self.stale = True
+        self.confidence = 0.0
+
+    def get_stats(self):
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "language": self.language_id,
+            "confidence": self.confidence,
+            "pinned": self.pinned,
+        }
@@ -0,0 +1,326 @@
+import gi
+import mmap
+import re
+import threading
+from array import array
+from bisect import bisect_right
+gi.require_version('Gtk', '3.0')
+try:
+    gi.require_version('GtkSource', '4')
+except ValueError:
+    gi.require_version('GtkSource', '3.0')
+from gi.repository import Gtk, GtkSource, GLib
+from zenpad.editor import EditorTab
+from zenpad import encoding as encodings
+
+# Newlines are counted per block of this many bytes
+INDEX_BLOCK = 64 * 1024
+# Lines decoded into the buffer at a time...
+WINDOW_LINES = 4000
+# ...but never more than this many bytes (very long lines)
+WINDOW_MAX_BYTES = 8 * 1024 * 1024
+# Bytes scanned per step when searching backwards
+SEARCH_CHUNK = 4 * 1024 * 1024
+
+
+class LineIndex:
+    """
+    Sparse line index over a memory-mapped file.
+
+    Instead of one offset per line it stores, per INDEX_BLOCK bytes, how
+    many newlines come before the block: 8 bytes per 64 KiB, about 128 KiB
+    per GB. A line start is found by jumping to its block and skipping the
+    few newlines inside it. build() runs on a background thread; lookups
+    only cover the part indexed so far.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        self.block_starts = array('q')  # newlines before each block
+        self.newlines = 0
+        self.indexed = 0  # bytes covered so far
+        self.done = False
+        self.cancelled = False
+
+    def build(self):
+        data = self.data
+        for pos in range(0, self.size, INDEX_BLOCK):
+            if self.cancelled:
+                return
+            count = data[pos:pos + INDEX_BLOCK].count(b"\n")
+            self.block_starts.append(self.newlines)
+            self.newlines += count
+            self.indexed = min(self.size, pos + INDEX_BLOCK)
+        self.done = True
+
+    @property
+    def fraction(self):
+        return self.indexed / self.size if self.size else 1.0
+
+    @property
+    def line_count(self):
+        """Lines known so far (the final count once done)."""
+        return self.newlines + 1
+
+    def line_offset(self, line):
+        """Byte offset where line (0-based) starts, clamped to the indexed part."""
+        if line <= 0:
+            return 0
+        newline = min(line, self.newlines) - 1  # the newline ending the previous line
+        if newline < 0:
+            return 0
+        block = bisect_right(self.block_starts, newline, 0, len(self.block_starts)) - 1
+        pos = block * INDEX_BLOCK
+        for _ in range(newline - self.block_starts[block] + 1):
+            pos = self.data.find(b"\n", pos) + 1
+        return pos
+
+    def line_at(self, offset):
+        """Line number (0-based) containing byte offset."""
+        block = min(offset // INDEX_BLOCK, len(self.block_starts) - 1)
+        if block < 0:
+            return self.data[:offset].count(b"\n")
+        pos = block * INDEX_BLOCK
+        return self.block_starts[block] + self.data[pos:offset].count(b"\n")
+
+
+class LineNumberRenderer(GtkSource.GutterRendererText):
+    """Gutter line numbers offset by the first line in the window."""
+
+    def __init__(self, tab):
+        super().__init__()
+        self.tab = tab
+        self.set_alignment(1.0, 0.5)
+        self.set_padding(4, 0)
+
+    def do_query_data(self, start, end, state):
+        self.set_text(str(self.tab.first_line + start.get_line() + 1), -1)
+
+
+class LargeFileTab(EditorTab):
+    """
+    Read-only tab for files too big to load into a buffer.
+
+    The file is memory-mapped and indexed in the background. The buffer only
+    ever holds a window of WINDOW_LINES lines; scrolling near either end
+    slides the window, and goto/search work on the mapped bytes, so memory
+    stays constant whatever the file size.
+    """
+
+    def __init__(self, path, search_settings=None, encoding=None):
+        super().__init__(search_settings)
+        self.file_path = path
+        self.read_only = True
+        self.view.set_editable(False)
+
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if encoding:
+            self.encoding = encodings.normalize(encoding)
+        else:
+            self.encoding, skip = encodings.detect(self.data[:encodings.SAMPLE_SIZE])
+            self.bom = skip > 0
+        if self.encoding.startswith(("utf-16", "utf-32")):
+            # Lines are found by their b"\n" byte, which these do not have
+            self.data.close()
+            raise ValueError(f"{self.encoding.upper()} files cannot be opened in large file mode")
+        self.index = LineIndex(self.data)
+        self.first_line = 0
+        self.window_lines = 0
+        self._shifting = False
+
+        self.index_thread = threading.Thread(target=self.index.build, daemon=True)
+        self.index_thread.start()
+
+        # Real line numbers instead of window-relative ones
+        self.line_numbers = LineNumberRenderer(self)
+        self.view.get_gutter(Gtk.TextWindowType.LEFT).insert(self.line_numbers, -30)
+        self.view.set_show_line_numbers(False)
+
+        self.view.get_vadjustment().connect("value-changed", self.on_scrolled)
+        self.load_window(0)
+
+    def on_destroy(self, widget):
+        super().on_destroy(widget)
+        self.index.cancelled = True
+        # build() checks cancelled every block, so this is short; then the
+        # mapping and its file descriptor can go
+        self.index_thread.join()
+        self.data.close()
+
+    def reload(self):
+        """
+        Maps the file again after it changed on disk and indexes it anew,
+        keeping the cursor's line once the index has reached it. Memory
+        stays constant, as for the first load. Raises OSError or ValueError
+        (e.g. the file is now empty) and keeps the old mapping then.
+        """
+        line, column = self.get_cursor_position()
+        with open(self.file_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.index.cancelled = True
+        self.index_thread.join()
+        self.data.close()
+        self.data = data
+        self.index = LineIndex(data)
+        self.index_thread = threading.Thread(target=self.index.build, daemon=True)
+        self.index_thread.start()
+        self.load_window(0)
+
+        def restore():
+            index = self.index
+            if index.cancelled:
+                return False
+            if index.newlines < line - 1 and not index.done:
+                # Not indexed that far yet
+                return True
+            self.show_line(line - 1, column=column - 1)
+            return False
+        if line > 1:
+            GLib.timeout_add(50, restore)
+
+    def set_show_line_numbers(self, show):
+        self.line_numbers.set_visible(show)
+
+    def decode(self, data):
+        return data.decode(self.encoding, errors="replace").replace("\r\n", "\n")
+
+    def load_window(self, first_line):
+        """Decodes lines [first_line, first_line + WINDOW_LINES) into the buffer."""
+        first_line = max(0, min(first_line, self.index.line_count - 1))
+        start = self.index.line_offset(first_line)
+        end = self.index.line_offset(first_line + WINDOW_LINES)
+        if end <= start or first_line + WINDOW_LINES > self.index.newlines:
+            # Last window or not indexed yet: scan forward from start instead
+            end = start
+            for _ in range(WINDOW_LINES):
+                found = self.data.find(b"\n", end, start + WINDOW_MAX_BYTES)
+                if found == -1:
+                    end = min(self.index.size, start + WINDOW_MAX_BYTES)
+                    break
+                end = found + 1
+        end = min(end, start + WINDOW_MAX_BYTES)
+
+        text = self.decode(self.data[start:end])
+        self.first_line = first_line
+        self.window_start = start
+        self.window_end = end
+
+        buffer = self.buffer
+        buffer.begin_not_undoable_action()
+        buffer.set_text(text)
+        buffer.end_not_undoable_action()
+        self.window_lines = buffer.get_line_count()
+        buffer.set_modified(False)
+        self.dirty.mark_saved(text)
+
+    def on_scrolled(self, adjustment):
+        if self._shifting:
+            return
+        value = adjustment.get_value()
+        page = adjustment.get_page_size()
+        upper = adjustment.get_upper()
+
+        if value < page and self.first_line > 0:
+            shift = -min(self.first_line, WINDOW_LINES // 2)
+        elif value + 2 * page > upper and self.window_end < self.index.size:
+            shift = WINDOW_LINES // 2
+        else:
+            return
+
+        # Keep the line at the top of the view where it is
+        top_iter, _ = self.view.get_line_at_y(int(value))
+        top_line = self.first_line + top_iter.get_line()
+        self.show_line(top_line, self.first_line + shift, align_top=True)
+
+    def show_line(self, line, first_line=None, column=0, align_top=False):
+        """Moves the window so line (0-based) is loaded, then scrolls to it."""
+        if first_line is None:
+            if self.first_line <= line < self.first_line + self.window_lines - 1:
+                first_line = self.first_line
+            else:
+                first_line = max(0, line - WINDOW_LINES // 2)
+
+        self._shifting = True
+        if first_line != self.first_line or not self.window_lines:
+            self.load_window(first_line)
+
+        iter_ = self.buffer.get_iter_at_line(max(0, line - self.first_line))
+        if column:
+            iter_.forward_chars(column)
+        self.buffer.place_cursor(iter_)
+
+        def scroll():
+            self.view.scroll_to_iter(iter_, 0.0, True, 0.0, 0.0 if align_top else 0.5)
+            self._shifting = False
+            return False
+        # Scroll once the new text has been laid out
+        GLib.idle_add(scroll)
+        return iter_
+
+    def goto_line(self, line, column=0):
+        """1-based, like ZenpadWindow.goto_line."""
+        self.show_line(line - 1, column=column)
+        self.view.grab_focus()
+
+    def get_cursor_position(self):
+        line, col = super().get_cursor_position()
+        return self.first_line + line, col
+
+    def cursor_offset(self):
+        """Byte offset of the cursor in the file."""
+        insert = self.buffer.get_iter_at_mark(self.buffer.get_insert())
+        line_start = self.index.line_offset(self.first_line + insert.get_line())
+        prefix = self.buffer.get_text(self.buffer.get_iter_at_line(insert.get_line()), insert, True)
+        return line_start + len(prefix.encode(self.encoding))
+
+    def find(self, text, forward=True, case_sensitive=False):
+        """
+        Searches the mapped bytes from the cursor (wrapping around) and
+        selects the match. Returns True if found.
+        """
+        if not text:
+            return False
+        pattern = re.compile(re.escape(text.encode(self.encoding)), 0 if case_sensitive else re.IGNORECASE)
+
+        # Start past the current selection, so repeated searches advance
+        bounds = self.buffer.get_selection_bounds()
+        origin = self.cursor_offset()
+        if bounds and forward:
+            origin += len(self.buffer.get_text(bounds[0], bounds[1], True).encode(self.encoding))
+        if bounds and not forward:
+            origin -= len(self.buffer.get_text(bounds[0], bounds[1], True).encode(self.encoding))
+
+        if forward:
+            match = pattern.search(self.data, origin) or pattern.search(self.data, 0, origin)
+        else:
+            match = self.search_backward(pattern, origin) or self.search_backward(pattern, self.index.size, origin)
+        if not match:
+            return False
+
+        start, end = match.span()
+        line = self.index.line_at(start)
+        line_start = self.index.line_offset(line)
+        column = len(self.decode(self.data[line_start:start]))
+        match_start = self.show_line(line, column=column)
+        match_end = match_start.copy()
+        match_end.forward_chars(len(self.decode(self.data[start:end])))
+        self.buffer.select_range(match_end, match_start)
+        return True
+
+    def search_backward(self, pattern, end, stop=0):
+        """Last match that ends before end, scanning backwards in chunks."""
+        while end > stop:
+            start = max(stop, end - SEARCH_CHUNK)
+            last = None
+            for last in pattern.finditer(self.data, start, end):
+                pass
+            if last:
+                return last
+            if start == stop:
+                break
+            # Overlap so matches across the chunk border are not missed
+            end = start + len(pattern.pattern)
+        return None
@@ -0,0 +1,155 @@
+"""
+The `zenpad` command.
+
+When Zenpad is already running, a launch only hands its arguments to the
+running instance, yet starting the full application for that means
+importing Gtk, GtkSource and all of zenpad.window first. This module
+speaks GApplication's D-Bus protocol itself with nothing but Gio: it
+calls org.gtk.Application.CommandLine on the running instance with
+argv, the working directory and stdin, exactly as a second
+ZenpadApplication would, so do_command_line() sees no difference.
+
+Only when no instance owns the bus name (or the bus is not there, or
+the command asks for an instance of its own) is zenpad.main started.
+
+benchmarks/bench_launch.py compares both paths.
+"""
+import argparse
+import os
+import sys
+
+from zenpad import trace
+from gi.repository import Gio, GLib
+
+APP_ID = "com.zenpad.editor"
+# Where GApplication exports its interfaces: the id as a path
+OBJECT_PATH = "/" + APP_ID.replace(".", "/")
+# Where the remote instance sends Print/PrintError for this command line
+COMMAND_LINE_PATH = "/org/gtk/Application/CommandLine"
+
+COMMAND_LINE_XML = """
+<node>
+  <interface name="org.gtk.private.CommandLine">
+    <method name="Print"><arg type="s" name="message" direction="in"/></method>
+    <method name="PrintError"><arg type="s" name="message" direction="in"/></method>
+  </interface>
+</node>
+"""
+
+
+def parse_options(argv):
+    """The options that matter before the instance is known (see zenpad.main.main)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--disable-server", action="store_true")
+    parser.add_argument("-o", "--opening-mode")
+    parser.add_argument("--trace-file")
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+
+def needs_own_instance(options):
+    """True for the options that start a separate instance."""
+    return options.disable_server or options.opening_mode == "window"
+
+
+def bytestring(text):
+    """A nul-terminated "ay", as GApplication passes paths and arguments."""
+    return os.fsencode(text) + b"\0"
+
+
+class RemoteCommandLine:
+    """
+    One CommandLine call to the running instance. run() returns its exit
+    status, or None if there is no instance to talk to.
+    """
+
+    def __init__(self, argv):
+        self.argv = argv
+        self.status = None
+        self.error = None
+        self.loop = GLib.MainLoop()
+
+    def run(self):
+        try:
+            self.connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+            running = self.connection.call_sync(
+                "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "NameHasOwner",
+                GLib.Variant("(s)", (APP_ID,)), GLib.VariantType("(b)"), Gio.DBusCallFlags.NONE, -1, None)
+        except GLib.Error:
+            return None
+        if not running.unpack()[0]:
+            return None
+
+        interface = Gio.DBusNodeInfo.new_for_xml(COMMAND_LINE_XML).interfaces[0]
+        registration = self.connection.register_object(COMMAND_LINE_PATH, interface, self.on_method_call)
+        try:
+            self.connection.call_with_unix_fd_list(
+                APP_ID, OBJECT_PATH, "org.gtk.Application", "CommandLine", self.parameters(),
+                GLib.VariantType("(i)"), Gio.DBusCallFlags.NO_AUTO_START,
+                # The instance may run a dialog before it answers, as it would for a second instance
+                GLib.MAXINT, self.stdin_fds(), None, self.on_reply)
+            self.loop.run()
+        finally:
+            self.connection.unregister_object(registration)
+        # E.g. the instance quit between the check and the call
+        return None if self.error else self.status
+
+    def parameters(self):
+        platform_data = {"cwd": GLib.Variant("ay", bytestring(os.getcwd()))}
+        # What GtkApplication would add from the display, for focus stealing prevention
+        for key, variable in (("desktop-startup-id", "DESKTOP_STARTUP_ID"),
+                              ("activation-token", "XDG_ACTIVATION_TOKEN")):
+            if os.environ.get(variable):
+                platform_data[key] = GLib.Variant("s", os.environ[variable])
+        arguments = [bytestring(arg) for arg in self.argv]
+        return GLib.Variant("(oaaya{sv})", (COMMAND_LINE_PATH, arguments, platform_data))
+
+    def stdin_fds(self):
+        """stdin for command_line.get_stdin(), so `zenpad -` works remotely too."""
+        fd_list = Gio.UnixFDList()
+        try:
+            fd_list.append(0)
+        except GLib.Error:
+            # stdin is closed
+            pass
+        return fd_list
+
+    def on_method_call(self, connection, sender, path, interface_name, method, parameters, invocation):
+        message = parameters.unpack()[0]
+        stream = sys.stdout if method == "Print" else sys.stderr
+        stream.write(message)
+        stream.flush()
+        invocation.return_value(None)
+
+    def on_reply(self, connection, result):
+        try:
+            reply, _ = connection.call_with_unix_fd_list_finish(result)
+            self.status = reply.unpack()[0]
+        except GLib.Error as e:
+            self.error = e
+        self.loop.quit()
+
+
+def main():
+    options = parse_options(sys.argv)
+    # First thing, so the trace covers importing the application below
+    if options.trace_file:
+        trace.enable(options.trace_file)
+    else:
+        trace.enable_from_environment()
+
+    if not needs_own_instance(options):
+        with trace.span("forward to running instance", category="startup"):
+            status = RemoteCommandLine(sys.argv).run()
+        if status is not None:
+            trace.write_trace()
+            return status
+
+    # Nobody to forward to: this process becomes the instance
+    with trace.span("import zenpad.main", category="startup"):
+        from zenpad import main as application
+    return application.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
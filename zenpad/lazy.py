@@ -0,0 +1,59 @@
+"""
+Optional and rarely used parts of Zenpad, imported the first time they
+are needed instead of on every launch.
+
+Importing zenpad.markdown_preview loads the WebKit2 typelib and the
+markdown package; diff_viewer loads difflib; the preferences dialog
+builds on GtkSource's scheme and font machinery. None of that is needed
+to show a window, so window.py reaches them through load(). Whether the
+Markdown preview can work at all is answered by missing_markdown_deps(),
+which looks for the typelib and package without loading them.
+
+benchmarks/bench_imports.py keeps an eye on what the startup imports.
+"""
+import importlib
+import importlib.util
+import time
+from zenpad import trace
+
+# Subsystems that must not be imported while the window starts up
+DEFERRED = ("zenpad.markdown_preview", "zenpad.diff_viewer", "zenpad.preferences",
+            "markdown", "difflib", "gi.repository.WebKit2")
+
+# Milliseconds each first load() took; part of the --profile dump
+import_times = {}
+
+
+def load(name):
+    """
+    Returns the zenpad.<name> module, importing it on first use.
+    Errors of the import (ImportError, or ValueError for a missing
+    typelib version) are raised to the caller.
+    """
+    full_name = f"zenpad.{name}"
+    start = time.perf_counter()
+    with trace.span(f"import {full_name}", category="startup"):
+        module = importlib.import_module(full_name)
+    if full_name not in import_times:
+        import_times[full_name] = (time.perf_counter() - start) * 1000
+    return module
+
+
+def has_typelib(namespace, versions):
+    """True if one of the versions of a GObject introspection namespace is installed."""
+    try:
+        import gi
+        available = gi.Repository.get_default().enumerate_versions(namespace)
+    except (ImportError, AttributeError):
+        return False
+    return any(version in available for version in versions)
+
+
+def missing_markdown_deps():
+    """Packages the Markdown preview still needs (Debian names); empty if none."""
+    missing = []
+    if not has_typelib("WebKit2", ("4.1", "4.0")):
+        missing.append("gir1.2-webkit2-4.1")
+    if importlib.util.find_spec("markdown") is None:
+        missing.append("python3-markdown")
+    return missing
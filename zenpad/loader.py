@@ -0,0 +1,315 @@
+import gi
+import codecs
+import hashlib
+import io
+import os
+import threading
+import time
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+from zenpad import encoding as encodings
+from zenpad import trace
+from zenpad.dirty import is_dirty, stat_signature
+
+# Bytes read and decoded per step on the worker thread
+CHUNK_SIZE = 1024 * 1024
+# Characters inserted into the buffer per idle slice
+INSERT_CHARS = 256 * 1024
+# Decoded chunks allowed to wait for insertion (bounds memory on fast disks)
+MAX_PENDING_CHUNKS = 4
+# Fallback when the file turns out not to match the detected encoding
+FALLBACK_ENCODING = "iso8859-1"
+
+
+class FileLoader:
+    """
+    Loads a file into an EditorTab without blocking the main loop.
+
+    A worker thread reads the file once, in CHUNK_SIZE blocks. Unless an
+    encoding is given, the first block decides it: a BOM if there is one,
+    otherwise a guess from its bytes (see zenpad.encoding). Each block is
+    decoded with an incremental decoder, its line endings are counted and
+    translated to LF for the buffer, and the text is hashed for dirty
+    tracking. The main thread inserts the decoded text in INSERT_CHARS
+    slices from an idle callback, so the window keeps drawing and reacting
+    to input. The load can be cancelled at any time.
+
+    Afterwards loader.encoding, loader.newline and loader.bom describe the
+    file and are copied to the tab, so saving writes it back the same way.
+    Only if a later block does not decode after all does the load start
+    over with fallback (loader.used_fallback). on_done(loader) is called on
+    the main thread once the load finished, failed (loader.error) or was
+    cancelled (loader.cancelled). A tab that had text (a reload) gets that
+    text, its dirty state and its cursor back if the load fails or is
+    cancelled, and the view is as editable as it was before.
+    """
+
+    def __init__(self, editor, path, encoding=None, on_done=None, fallback=FALLBACK_ENCODING):
+        self.editor = editor
+        self.path = path
+        # None: detect from the file
+        self.encoding = encoding
+        self.newline = "\n"
+        self.bom = False
+        self.fallback = fallback
+        self.used_fallback = False
+        self.on_done = on_done
+
+        self.size = 0
+        self.inserted_bytes = 0
+        self.digest = None
+        self.raw_digest = None  # of the bytes on disk, for zenpad.filewatch
+        self.raw_md5 = self.text_md5 = None  # hashlib states of the two digests
+        self.signature = None
+        self.error = None
+        self.cancelled = False
+        self.finished = False
+        self.started = None
+        # What the tab had before, put back unless the load succeeds
+        self.previous = None
+        self.previous_dirty = False
+        self.previous_cursor = 0
+        self.editable = True
+
+        self._pending = []  # [(text, byte count)] waiting for insertion
+        self._offset = 0  # characters of _pending[0] already inserted
+        self._worker_done = False
+        self._source_id = 0
+        self._slots = threading.Semaphore(MAX_PENDING_CHUNKS)
+        self._stop = threading.Event()
+
+    @property
+    def fraction(self):
+        if not self.size:
+            return 1.0 if self.finished else 0.0
+        return min(1.0, self.inserted_bytes / self.size)
+
+    def start(self):
+        editor = self.editor
+        buffer = editor.buffer
+        self.editable = editor.view.get_editable()
+        if buffer.get_char_count():
+            self.previous = editor.get_text()
+            self.previous_dirty = is_dirty(editor)
+            self.previous_cursor = buffer.get_iter_at_mark(buffer.get_insert()).get_offset()
+        buffer.begin_not_undoable_action()
+        buffer.set_text("")
+        editor.view.set_editable(False)
+        editor.loader = self
+        self.started = time.perf_counter()
+
+        thread = threading.Thread(target=self.read_worker, name="FileLoader", daemon=True)
+        thread.start()
+
+    def cancel(self):
+        if self.finished:
+            return
+        self.cancelled = True
+        self._stop.set()
+        # Unblock a worker waiting for a free slot
+        self._slots.release()
+        self.finish()
+
+    # -- Worker thread: no Gtk calls here --
+
+    def read_worker(self):
+        with trace.span("read and decode", category="io", path=self.path) as span:
+            self.read_file()
+            span.set(bytes=self.size, encoding=self.encoding)
+        GLib.idle_add(self.on_worker_done)
+
+    def read_file(self):
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                self.size = st.st_size
+                self.signature = stat_signature(st)
+                head = f.read(CHUNK_SIZE)
+                if self.encoding:
+                    encoding, skip = encodings.normalize(self.encoding), 0
+                else:
+                    encoding, skip = encodings.detect(head)
+                if not self.read_chunks(f, head[skip:], encoding, hashlib.md5(head[:skip])):
+                    # The guess was wrong further in (rare): start over
+                    f.seek(0)
+                    GLib.idle_add(self.on_restart)
+                    encoding, skip = self.fallback, 0
+                    self.read_chunks(f, f.read(CHUNK_SIZE), encoding, hashlib.md5())
+                self.encoding = encoding
+                self.bom = skip > 0
+        except Exception as e:
+            self.error = e
+
+    def read_chunks(self, f, data, encoding, raw_digest):
+        """
+        Decodes data and the rest of f, adding the raw bytes to raw_digest.
+        Returns False if the file turned out not to be valid in encoding.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)()
+        translator = io.IncrementalNewlineDecoder(None, translate=True)
+        line_endings = encodings.LineEndingCounter()
+        digest = hashlib.md5()
+        while not self._stop.is_set():
+            final = not data
+            raw_digest.update(data)
+            try:
+                text = decoder.decode(data, final=final)
+            except UnicodeDecodeError:
+                if not self.fallback or encoding == self.fallback:
+                    raise
+                return False
+            line_endings.feed(text)
+            text = translator.decode(text, final=final)
+            if text:
+                digest.update(text.encode("UTF-8"))
+                self._slots.acquire()
+                if self._stop.is_set():
+                    break
+                GLib.idle_add(self.on_chunk, text, len(data))
+            if final:
+                break
+            data = f.read(CHUNK_SIZE)
+        self.digest = digest.hexdigest()
+        self.raw_digest = raw_digest.hexdigest()
+        self.text_md5, self.raw_md5 = digest, raw_digest
+        self.newline = line_endings.dominant
+        return True
+
+    # -- Main thread --
+
+    def on_restart(self):
+        """The file is not in the detected encoding: start over with the fallback."""
+        if self.finished:
+            return False
+        self.used_fallback = True
+        for _ in self._pending:
+            self._slots.release()
+        self._pending = []
+        self._offset = 0
+        self.inserted_bytes = 0
+        self.editor.buffer.set_text("")
+        return False
+
+    def on_chunk(self, text, byte_count):
+        if self.finished:
+            return False
+        self._pending.append((text, byte_count))
+        if not self._source_id:
+            # Below redraw priority, so the view repaints between slices
+            self._source_id = GLib.idle_add(self.on_insert_slice, priority=GLib.PRIORITY_DEFAULT_IDLE)
+        return False
+
+    def on_insert_slice(self):
+        if self.finished or not self._pending:
+            self._source_id = 0
+            return False
+
+        text, byte_count = self._pending[0]
+        piece = text[self._offset:self._offset + INSERT_CHARS]
+        buffer = self.editor.buffer
+        buffer.insert(buffer.get_end_iter(), piece)
+        self._offset += len(piece)
+
+        if self._offset >= len(text):
+            self._pending.pop(0)
+            self._offset = 0
+            self.inserted_bytes += byte_count
+            self._slots.release()
+
+        if not self._pending:
+            self._source_id = 0
+            if self._worker_done:
+                self.finish()
+            return False
+        return True
+
+    def on_worker_done(self):
+        self._worker_done = True
+        if not self._pending and not self.finished:
+            self.finish()
+        return False
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+
+        editor = self.editor
+        buffer = editor.buffer
+        if (self.error or self.cancelled) and self.previous is not None:
+            self.restore_previous()
+        buffer.end_not_undoable_action()
+        editor.view.set_editable(self.editable)
+        editor.loader = None
+        self.previous = None
+
+        if not self.error and not self.cancelled:
+            buffer.place_cursor(buffer.get_start_iter())
+            editor.encoding = self.encoding
+            editor.newline = self.newline
+            editor.bom = self.bom
+            editor.disk_signature = self.signature
+            editor.disk_hash = self.raw_digest
+            editor.disk_md5, editor.text_md5 = self.raw_md5, self.text_md5
+            editor.dirty.mark_saved(digest=self.digest)
+            buffer.set_modified(False)
+
+        trace.complete("FileLoader", self.started, category="io", path=self.path, bytes=self.size,
+                       error=repr(self.error) if self.error else None, cancelled=self.cancelled)
+        if self.on_done:
+            self.on_done(self)
+
+    def restore_previous(self):
+        """Puts the text the tab had before back, so a failed reload loses nothing."""
+        editor = self.editor
+        buffer = editor.buffer
+        buffer.set_text(self.previous)
+        buffer.place_cursor(buffer.get_iter_at_offset(self.previous_cursor))
+        if not self.previous_dirty:
+            editor.dirty.mark_saved(self.previous)
+            buffer.set_modified(False)
+
+
+class LoadProgress(Gtk.Box):
+    """Progress bar and cancel button shown in a tab header while loading."""
+
+    def __init__(self, loader):
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=2)
+        self.loader = loader
+
+        self.bar = Gtk.ProgressBar()
+        self.bar.set_valign(Gtk.Align.CENTER)
+        self.bar.set_size_request(60, -1)
+        self.pack_start(self.bar, False, False, 0)
+
+        cancel_btn = Gtk.Button.new_from_icon_name("process-stop", Gtk.IconSize.MENU)
+        cancel_btn.set_relief(Gtk.ReliefStyle.NONE)
+        cancel_btn.set_tooltip_text("Cancel loading")
+        cancel_btn.connect("clicked", lambda btn: loader.cancel())
+        self.pack_start(cancel_btn, False, False, 0)
+
+        self._source_id = GLib.timeout_add(100, self.refresh)
+        self.connect("destroy", self.on_destroy)
+        self.show_all()
+
+    def refresh(self):
+        if self.loader.finished:
+            self._source_id = 0
+            return False
+        name = os.path.basename(self.loader.path)
+        if self.loader.fraction is None:
+            # A stream of unknown length (see zenpad.stream)
+            self.bar.pulse()
+            self.set_tooltip_text(f"Reading {name}: {self.loader.inserted_bytes // 1024} KB so far")
+        else:
+            self.bar.set_fraction(self.loader.fraction)
+            self.set_tooltip_text(f"Loading {name}: {self.loader.fraction:.0%}")
+        return True
+
+    def on_destroy(self, widget):
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
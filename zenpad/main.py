@@ -1,28 +1,36 @@
 import sys
 import argparse
 import gi
+from zenpad import trace
 
-gi.require_version('Gtk', '3.0')
-try:
-    gi.require_version('GtkSource', '4')
-except ValueError:
-    gi.require_version('GtkSource', '3.0')
+with trace.span("gi.require_version", category="startup"):
+    gi.require_version('Gtk', '3.0')
+    try:
+        gi.require_version('GtkSource', '4')
+    except ValueError:
+        gi.require_version('GtkSource', '3.0')
 
-from gi.repository import Gtk, Gio, GtkSource
-from .window import ZenpadWindow
+with trace.span("import Gtk, GtkSource", category="startup"):
+    from gi.repository import Gtk, Gio, GtkSource
+with trace.span("import zenpad.window", category="startup"):
+    from .window import ZenpadWindow
+from zenpad import profiler
+from zenpad.launcher import APP_ID
 
 class ZenpadApplication(Gtk.Application):
     def __init__(self):
-        super().__init__(application_id="com.zenpad.editor",
+        super().__init__(application_id=APP_ID,
                          flags=Gio.ApplicationFlags.HANDLES_COMMAND_LINE)
         self.window = None
         Gtk.Window.set_default_icon_name("accessories-text-editor")
 
+    @trace.traced("ZenpadApplication.do_activate", category="startup")
     def do_activate(self):  
         if not self.window:
-            self.window = ZenpadWindow(application=self)
+            self.window = ZenpadWindow(application=self, restore_session=True)
         self.window.present()
 
+    @trace.traced("ZenpadApplication.do_command_line", category="startup")
     def do_command_line(self, command_line):
         args = command_line.get_arguments()
         # args[0] is program name
@@ -38,6 +46,8 @@ class ZenpadApplication(Gtk.Application):
         parser.add_argument("--list-encodings", action="store_true", help="Display list of possible encodings to use and exit")
         parser.add_argument("-e", "--encoding", help="Set the character encoding to use for opening files")
         parser.add_argument("-o", "--opening-mode", default="tab", choices=["tab", "window", "mixed"], help="Set the file opening mode")
+        parser.add_argument("--profile", action="store_true", help=f"Record signal handler latencies (or set {profiler.ENV_VAR}=1|FILE)")
+        parser.add_argument("--trace-file", metavar="FILE", help=f"Write a Chrome trace of startup, file loads and tools to FILE on exit (or set {trace.ENV_VAR}=FILE)")
         
         # Parse arguments (skip program name)
         try:
@@ -70,27 +80,17 @@ class ZenpadApplication(Gtk.Application):
 
         # Open Files
         if parsed_args.files:
-            for filename in parsed_args.files:
+            last = len(parsed_args.files) - 1
+            for i, filename in enumerate(parsed_args.files):
                 if filename == "-":
-                    try:
-                        # Read from stdin stream provided by Gio
-                        stdin = command_line.get_stdin()
-                        if stdin:
-                            data_acc = b""
-                            while True:
-                                # Read in chunks
-                                chunk = stdin.read_bytes(8192, None)
-                                data = chunk.get_data()
-                                if not data:
-                                    break
-                                data_acc += data
-                                
-                            content = data_acc.decode("utf-8")
-                            self.window.add_tab(content, title="Stdin")
-                    except Exception as e:
-                        print(f"Error reading stdin: {e}")
+                    # Streamed in as it arrives, so `tail -f log | zenpad -` works
+                    stdin = command_line.get_stdin()
+                    if stdin:
+                        self.window.open_stream(stdin, title="Stdin", encoding=parsed_args.encoding)
                 else:
-                    self.window.open_file_from_path(filename, line=parsed_args.line, column=parsed_args.column, encoding=parsed_args.encoding)
+                    # Only the tab left in front is loaded right away
+                    self.window.open_file_from_path(filename, line=parsed_args.line, column=parsed_args.column,
+                                                    encoding=parsed_args.encoding, lazy=i < last)
 
         return 0
 
@@ -101,9 +101,23 @@ def main():
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("--disable-server", action="store_true")
     parser.add_argument("-o", "--opening-mode")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--trace-file")
     
     args, _ = parser.parse_known_args(sys.argv[1:])
 
+    # Normally already on: the launcher enables it before importing this module
+    if args.trace_file:
+        trace.enable(args.trace_file)
+    else:
+        trace.enable_from_environment()
+
+    # Must be on before the window connects its handlers
+    if args.profile:
+        profiler.enable()
+    else:
+        profiler.enable_from_environment()
+
     if args.disable_server or args.opening_mode == "window":
         flags = app.get_flags()
         flags |= Gio.ApplicationFlags.NON_UNIQUE
@@ -113,6 +127,13 @@ def main():
         return app.run(sys.argv)
     except KeyboardInterrupt:
         return 0
+    finally:
+        active = profiler.get_profiler()
+        if active and active.dump_path:
+            print(f"Handler latencies written to {active.dump(active.dump_path)}")
+        trace_path = trace.write_trace()
+        if trace_path:
+            print(f"Trace written to {trace_path}")
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -9,7 +9,165 @@ except ValueError:
         raise ImportError("WebKit2 (gir1.2-webkit2-4.1 or 4.0) not found")
 
 from gi.repository import Gtk, Gdk, WebKit2, GLib
+import json
+import re
+import threading
 import markdown
+from zenpad.dirty import content_hash
+
+# Wait for typing to pause before rendering...
+IDLE_DELAY_MS = 150
+# ...but never hold an update back for longer than this
+MAX_DELAY_MS = 500
+
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'sane_lists']
+
+# Reference links, footnotes and abbreviations resolve across blocks,
+# so documents using them are rendered in one piece
+CROSS_BLOCK_RE = re.compile(r'^ {0,3}(\[[^\]]+\]:|\*\[[^\]]+\]:)', re.MULTILINE)
+
+# Replaces children [start, start + count) of the content element with new HTML
+PATCH_SCRIPT = """
+(function(start, count, html) {
+    var content = document.getElementById("zp-content");
+    for (var i = 0; i < count && content.children[start]; i++)
+        content.removeChild(content.children[start]);
+    var template = document.createElement("template");
+    template.innerHTML = html;
+    content.insertBefore(template.content, content.children[start] || null);
+})(%d, %d, %s);
+"""
+
+
+# Blocks that Python-Markdown continues across a blank line: a list item
+# after a list of the same kind, a quote after a quote, a definition
+HR_RE = re.compile(r'^ {0,3}([-*_])(?: {0,2}\1){2,} *$')
+BULLET_RE = re.compile(r'^ {0,3}[*+-][ \t]+')
+ORDERED_RE = re.compile(r'^ {0,3}\d+\.[ \t]+')
+QUOTE_RE = re.compile(r'^ {0,3}>')
+DEFINITION_RE = re.compile(r'^ {0,3}:[ \t]+')
+
+# A fenced code block ends on a line with the same fence and nothing but spaces after
+FENCE_RE = re.compile(r'(`{3,}|~{3,})')
+
+# Raw HTML starting a block runs until its tag is closed, blank lines and all
+HTML_START_RE = re.compile(r'<(!--|[a-zA-Z][a-zA-Z0-9-]*)')
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+
+def block_kind(line):
+    """"ul", "ol" or "blockquote" for a line that starts one of them, else None."""
+    if HR_RE.match(line):
+        return None
+    if BULLET_RE.match(line):
+        return "ul"
+    if ORDERED_RE.match(line):
+        return "ol"
+    if QUOTE_RE.match(line):
+        return "blockquote"
+    return None
+
+
+def continues_block(block, line):
+    """True if line, coming after a blank line, still belongs to block."""
+    if line[0] in " \t" or DEFINITION_RE.match(line):
+        # Nested list content, indented code, another definition
+        return True
+    kind = block_kind(line)
+    return kind is not None and kind == block_kind(block[0])
+
+
+def html_tag(line):
+    """Tag of the raw HTML block line starts ("!--" for a comment), or None."""
+    match = HTML_START_RE.match(line)
+    if match and match.group(1).lower() not in VOID_TAGS:
+        return match.group(1).lower()
+    return None
+
+
+def html_depth(tag, line):
+    """How far line opens (or closes) the raw HTML block of tag."""
+    if tag == "!--":
+        return ("<!--" in line) - ("-->" in line)
+    opened = len(re.findall(rf'<{tag}\b', line, re.IGNORECASE))
+    closed = len(re.findall(rf'</{tag}\s*>', line, re.IGNORECASE))
+    return opened - closed
+
+
+def split_blocks(text):
+    """
+    Splits markdown into top-level blocks at the blank lines where
+    Python-Markdown starts something new, so rendering the blocks one by one
+    gives the same HTML as rendering the whole text. Fenced code and raw
+    HTML keep their blank lines; indented lines, loose list items, quotes
+    and definitions after a blank line stay with the block above them.
+    """
+    if CROSS_BLOCK_RE.search(text):
+        return [text]
+
+    blocks = []
+    current = []
+    fence = None
+    html = None  # [tag, depth] of a raw HTML block still open
+    for line in text.split("\n"):
+        stripped = line.lstrip()
+        if fence:
+            current.append(line)
+            if line.rstrip(" ") == fence:
+                fence = None
+            continue
+        if html:
+            current.append(line)
+            html[1] += html_depth(html[0], line)
+            if html[1] <= 0:
+                html = None
+            continue
+
+        if not stripped:
+            if current:
+                blocks.append(current)
+                current = []
+            continue
+        if not current:
+            if blocks and continues_block(blocks[-1], line):
+                current = blocks.pop()
+                current.append("")
+            tag = html_tag(line)
+            if tag and html_depth(tag, line) > 0:
+                html = [tag, html_depth(tag, line)]
+        match = FENCE_RE.match(stripped)
+        if match:
+            fence = match.group(1)
+        current.append(line)
+
+    if current:
+        blocks.append(current)
+    return ["\n".join(block) for block in blocks]
+
+
+class BlockRenderer:
+    """
+    Renders markdown blocks to HTML, caching each block by its content hash.
+    Only used from one worker thread at a time.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.cache = {}
+        self.max_entries = max_entries
+        self.md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+
+    def render(self, blocks, hashes):
+        html = []
+        for block, block_hash in zip(blocks, hashes):
+            rendered = self.cache.get(block_hash)
+            if rendered is None:
+                self.md.reset()
+                rendered = self.md.convert(block)
+                if len(self.cache) >= self.max_entries:
+                    self.cache.clear()
+                self.cache[block_hash] = rendered
+            html.append(rendered)
+        return html
 
 class MarkdownPreviewWindow(Gtk.Window):
     def __init__(self, parent=None):
@@ -21,8 +179,28 @@ class MarkdownPreviewWindow(Gtk.Window):
         # WebView Settings (Disable JS for security)
         self.webview = WebKit2.WebView()
         settings = self.webview.get_settings()
-        settings.set_enable_javascript(False)
+        # Scripts from the document stay disabled; our own patch script
+        # needs JS, which only WebKitGTK 2.24+ can allow separately
+        self.can_patch = hasattr(settings, "set_enable_javascript_markup")
+        if self.can_patch:
+            settings.set_enable_javascript(True)
+            settings.set_enable_javascript_markup(False)
+        else:
+            settings.set_enable_javascript(False)
         settings.set_enable_write_console_messages_to_stdout(False)
+        self.webview.connect("load-changed", self.on_load_changed)
+
+        # Rendering pipeline state
+        self.renderer = BlockRenderer()
+        self.page_ready = False
+        self.shown_hashes = []  # block hashes currently in the page
+        self.pending_text = None
+        self.get_pending_text = None
+        self.rendering = False
+        self.generation = 0
+        self._source_id = 0
+        self._first_queued = 0
+        self.connect("destroy", self.on_destroy)
         
         # Scrolled Window
         scrolled = Gtk.ScrolledWindow()
@@ -110,10 +288,107 @@ class MarkdownPreviewWindow(Gtk.Window):
         }
         """
 
+    def on_destroy(self, widget):
+        self.cancel_timer()
+        self.generation += 1
+
+    def on_load_changed(self, webview, event):
+        if event == WebKit2.LoadEvent.STARTED:
+            self.page_ready = False
+        elif event == WebKit2.LoadEvent.FINISHED:
+            self.page_ready = True
+
+    def cancel_timer(self):
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+
+    def queue_update(self, get_text):
+        """
+        Schedules a render once typing goes idle. get_text is only called
+        then, so keystrokes don't copy the buffer.
+        """
+        self.get_pending_text = get_text
+        now = GLib.get_monotonic_time()
+        if self._source_id:
+            if (now - self._first_queued) // 1000 >= MAX_DELAY_MS:
+                # Continuous typing: let the armed timer fire
+                return
+            GLib.source_remove(self._source_id)
+        else:
+            self._first_queued = now
+        self._source_id = GLib.timeout_add(IDLE_DELAY_MS, self.on_idle_timeout)
+
+    def on_idle_timeout(self):
+        self._source_id = 0
+        get_text, self.get_pending_text = self.get_pending_text, None
+        if get_text:
+            self.update_content(get_text())
+        return False
+
     def update_content(self, text):
-        # Use 'extra' extension for improved list handling, tables, etc.
-        html_body = markdown.markdown(text, extensions=['extra', 'codehilite', 'sane_lists'])
-        
+        """Renders text, re-using cached blocks and patching the loaded page."""
+        self.cancel_timer()
+        self.pending_text = text
+        if not self.rendering:
+            self.start_render()
+
+    def start_render(self):
+        text, self.pending_text = self.pending_text, None
+        self.rendering = True
+        self.generation += 1
+        thread = threading.Thread(target=self.render_worker, args=(text, self.generation), daemon=True)
+        thread.start()
+
+    def render_worker(self, text, generation):
+        # Runs on a worker thread: no Gtk calls here
+        blocks = split_blocks(text)
+        hashes = [content_hash(block) for block in blocks]
+        try:
+            html = self.renderer.render(blocks, hashes)
+        except Exception as e:
+            html = [f"<pre>Error rendering markdown: {e}</pre>"]
+            hashes = [None]
+        GLib.idle_add(self.on_render_done, hashes, html, generation)
+
+    def on_render_done(self, hashes, html, generation):
+        self.rendering = False
+        if generation != self.generation:
+            # Window destroyed meanwhile
+            return False
+
+        if self.can_patch and self.page_ready:
+            self.patch_page(hashes, html)
+        else:
+            self.load_page(html)
+        self.shown_hashes = hashes
+
+        if self.pending_text is not None:
+            self.start_render()
+        return False
+
+    def patch_page(self, hashes, html):
+        old = self.shown_hashes
+        # Keep the unchanged blocks at both ends, replace the rest
+        start = 0
+        limit = min(len(old), len(hashes))
+        while start < limit and old[start] == hashes[start] and old[start] is not None:
+            start += 1
+        end = 0
+        while end < limit - start and old[-1 - end] == hashes[-1 - end] and old[-1 - end] is not None:
+            end += 1
+
+        removed = len(old) - start - end
+        added = html[start:len(html) - end]
+        if not removed and not added:
+            return
+
+        blocks_html = "".join(f'<div class="zp-block">{block}</div>' for block in added)
+        script = PATCH_SCRIPT % (start, removed, json.dumps(blocks_html))
+        self.webview.run_javascript(script, None, None, None)
+
+    def load_page(self, html):
+        blocks_html = "".join(f'<div class="zp-block">{block}</div>' for block in html)
         full_html = f"""
         <!DOCTYPE html>
         <html>
@@ -122,7 +397,7 @@ class MarkdownPreviewWindow(Gtk.Window):
             <style>{self.css}</style>
         </head>
         <body>
-            {html_body}
+            <div id="zp-content">{blocks_html}</div>
         </body>
         </html>
         """
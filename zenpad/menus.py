@@ -0,0 +1,506 @@
+import gi
+import weakref
+gi.require_version('Gtk', '3.0')
+try:
+    gi.require_version('GtkSource', '4')
+except ValueError:
+    gi.require_version('GtkSource', '3.0')
+from gi.repository import Gtk, Gio, GLib, GtkSource
+from zenpad import profiler
+
+# The menubar, declared once. An entry is one of:
+#   (label, action, icon)         an item; action is "app.<name>" or "win.<name>"
+#   (label, action, icon, target) an item passing target to its action (radio items)
+#   (label, [entries])            a submenu
+#   (label, "lazy:<name>")        a submenu filled by LAZY_SUBMENUS[name] when first opened
+#   None                          a section break (separator)
+MENUBAR = [
+    ("File", [
+        ("New", "app.new_tab", "document-new"),
+        ("New Window", "app.new_window", "window-new"),
+        ("Open...", "app.open", "document-open"),
+        ("Open Recent", "lazy:recent"),
+        None,
+        ("Save", "app.save", "document-save"),
+        ("Save As...", "app.save_as", "document-save-as"),
+        ("Save All", "app.save_all", "document-save-all"),
+        None,
+        ("Reload", "app.reload", "view-refresh"),
+        None,
+        ("Print...", "app.print", "document-print"),
+        None,
+        ("Detach Tab", "app.detach_tab", None),
+        ("Reopen Closed Tab", "app.reopen_tab", None),
+        ("Close Tab", "app.close_tab", "window-close"),
+        ("Close Window", "app.close_window", None),
+        ("Quit", "app.quit", "application-exit"),
+    ]),
+    ("Edit", [
+        ("Undo", "app.undo", "edit-undo"),
+        ("Redo", "app.redo", "edit-redo"),
+        None,
+        ("Cut", "app.cut", "edit-cut"),
+        ("Copy", "app.copy", "edit-copy"),
+        ("Paste", "app.paste", "edit-paste"),
+        ("Delete Selection", "app.delete_selection", None),
+        ("Delete Line", "app.delete_line", None),
+        None,
+        ("Select All", "app.select_all", "edit-select-all"),
+        ("Convert", [
+            ("To Uppercase", "app.toc_upper", None),
+            ("To Lowercase", "app.toc_lower", None),
+            ("To Title Case", "app.toc_title", None),
+        ]),
+        ("Move", [
+            ("Line Up", "app.move_up", None),
+            ("Line Down", "app.move_down", None),
+        ]),
+        ("Duplicate Line / Selection", "app.duplicate", None),
+        ("Increase Indent", "app.indent", None),
+        ("Decrease Indent", "app.unindent", None),
+        None,
+        ("Sort Lines", "app.sort_lines", None),
+        ("Join Lines", "app.join_lines", None),
+        ("Toggle Comment", "app.toggle_comment", None),
+        ("Trim Trailing Whitespace", "app.trim_whitespace", None),
+        None,
+        ("Insert Date/Time", "app.insert_date", None),
+        None,
+        ("Preferences...", "app.preferences", "preferences-system"),
+    ]),
+    ("Search", [
+        ("Find", "app.find", "edit-find"),
+        ("Find Next", "app.find_next", None),
+        ("Find Previous", "app.find_prev", None),
+        ("Find and Replace...", "app.replace", "edit-find-replace"),
+        None,
+        ("Incremental Search", "win.incremental_search", None),
+        ("Highlight All", "win.highlight_all", None),
+        None,
+        ("Go to...", "app.goto_line", None),
+    ]),
+    ("View", [
+        ("Select Font...", "app.select_font", "preferences-desktop-font"),
+        ("Color Scheme", "lazy:schemes"),
+        None,
+        ("Line Numbers", "win.line_numbers", None),
+        ("Menubar", "win.toggle_menubar", None),
+        ("Toolbar", "win.toggle_toolbar", None),
+        ("Statusbar", "win.toggle_statusbar", None),
+        None,
+        ("Fullscreen", "win.toggle_fullscreen", None),
+        None,
+        ("Zoom In", "app.zoom_in", "zoom-in"),
+        ("Zoom Out", "app.zoom_out", "zoom-out"),
+        ("Reset Zoom", "app.zoom_reset", "zoom-original"),
+    ]),
+    ("Document", [
+        ("Word Wrap", "win.word_wrap", None),
+        ("Auto Indent", "win.auto_indent", None),
+        ("Tab Size", [
+            ("2", "win.tab_size", None, 2),
+            ("4", "win.tab_size", None, 4),
+            ("8", "win.tab_size", None, 8),
+        ]),
+        ("Filetype", "lazy:filetypes"),
+        ("Line Ending", [
+            ("Unix (LF)", "app.line_ending", None, "\n"),
+            ("Windows (CRLF)", "app.line_ending", None, "\r\n"),
+            ("Mac (CR)", "app.line_ending", None, "\r"),
+        ]),
+        ("Write Unicode BOM", "win.write_bom", None),
+        ("Viewer Mode", "win.viewer_mode", None),
+        ("Follow (tail -f)", "win.follow", None),
+        None,
+        ("Previous Tab", "app.prev_tab", None),
+        ("Next Tab", "app.next_tab", None),
+    ]),
+    ("Tools", [
+        ("Format JSON", "app.format_json", None),
+        ("Format XML", "app.format_xml", None),
+        ("Convert Log to JSON", "app.convert_json", None),
+        None,
+        ("Hex View", "app.hex_view", None),
+        ("Calculate Hash", "app.calculate_hash", None),
+        None,
+        ("Encryption / Encoding", [
+            ("Base64 Encode", "app.base64_enc", None),
+            ("Base64 Decode", "app.base64_dec", None),
+            None,
+            ("URL Encode", "app.url_enc", None),
+            ("URL Decode", "app.url_dec", None),
+        ]),
+        None,
+        ("Markdown Preview", "app.markdown_preview", None),
+        ("Compare with Tab...", "app.compare_tabs", None),
+    ]),
+    ("Help", [
+        ("About", "app.about", "help-about"),
+        ("Handler Latency...", "app.handler_latency", None),
+    ]),
+]
+
+# Application actions run on the active ZenpadWindow: name -> (method, arguments).
+# A (method, ...) tuple ending in PARAMETER also gets the action's target.
+PARAMETER = object()
+APP_ACTIONS = {
+    "new_tab": ("on_new_tab", None),
+    "new_window": ("on_new_window", None),
+    "open": ("on_open_file", None),
+    "open_recent": ("open_recent_uri", PARAMETER),
+    "save": ("on_save_file", None),
+    "save_as": ("on_save_as", None),
+    "save_all": ("on_save_all", None),
+    "reload": ("on_reload", None),
+    "print": ("on_print", None),
+    "detach_tab": ("on_detach_tab", None),
+    "reopen_tab": ("on_reopen_tab", None),
+    "close_tab": ("on_close_current_tab", None),
+    "close_window": ("close",),
+    "undo": ("on_undo", None),
+    "redo": ("on_redo", None),
+    "cut": ("on_cut", None),
+    "copy": ("on_copy", None),
+    "paste": ("on_paste", None),
+    "delete_selection": ("on_delete_selection", None),
+    "delete_line": ("on_delete_line", None),
+    "select_all": ("on_select_all", None),
+    "toc_upper": ("on_change_case", "upper"),
+    "toc_lower": ("on_change_case", "lower"),
+    "toc_title": ("on_change_case", "title"),
+    "move_up": ("on_move_line", "up"),
+    "move_down": ("on_move_line", "down"),
+    "duplicate": ("on_duplicate", None),
+    "indent": ("on_indent", True),
+    "unindent": ("on_indent", False),
+    "sort_lines": ("on_sort_lines", None),
+    "join_lines": ("on_join_lines", None),
+    "toggle_comment": ("on_toggle_comment", None),
+    "trim_whitespace": ("on_trim_whitespace", None),
+    "insert_date": ("on_insert_date", None),
+    "preferences": ("on_preferences_clicked", None),
+    "find": ("on_find_clicked", "find"),
+    "replace": ("on_find_clicked", "replace"),
+    "find_next": ("on_search_next", None),
+    "find_prev": ("on_search_prev", None),
+    "goto_line": ("on_goto_line", None),
+    "select_font": ("on_select_font", None),
+    "zoom_in": ("on_zoom_in", None),
+    "zoom_out": ("on_zoom_out", None),
+    "zoom_reset": ("on_zoom_reset", None),
+    "filetype": ("on_change_filetype", PARAMETER),
+    "line_ending": ("on_change_line_ending", PARAMETER),
+    "prev_tab": ("on_prev_tab", None),
+    "next_tab": ("on_next_tab", None),
+    "format_json": ("on_format_json", None, None),
+    "format_xml": ("on_format_xml", None, None),
+    "convert_json": ("on_convert_json", None, None),
+    "hex_view": ("on_hex_view", None, None),
+    "calculate_hash": ("on_calculate_hash", None, None),
+    "base64_enc": ("on_transform_text", "base64_enc"),
+    "base64_dec": ("on_transform_text", "base64_dec"),
+    "url_enc": ("on_transform_text", "url_enc"),
+    "url_dec": ("on_transform_text", "url_dec"),
+    "markdown_preview": ("on_markdown_preview", None, None),
+    "compare_tabs": ("on_compare_tabs", None, None),
+    "handler_latency": ("on_handler_latency", None, None),
+    "about": ("on_about", None),
+}
+
+# Parameter types of the app actions that take a target
+APP_PARAMETERS = {"open_recent": "s", "filetype": "s", "line_ending": "s"}
+
+# Window actions with a state of their own (check and radio items):
+# name -> (attribute holding the initial state, method called with the new value)
+WINDOW_ACTIONS = {
+    "incremental_search": ("incremental_search", "on_toggle_incremental"),
+    "highlight_all": ("highlight_all", "on_toggle_highlight"),
+    "line_numbers": ("show_line_numbers", "on_toggle_line_numbers"),
+    "toggle_menubar": ("show_menubar", "on_toggle_menubar_state"),
+    "toggle_toolbar": ("show_toolbar", "on_toggle_toolbar_state"),
+    "toggle_statusbar": ("show_statusbar", "on_toggle_statusbar_state"),
+    "toggle_fullscreen": ("is_fullscreen", "on_toggle_fullscreen_state"),
+    "word_wrap": ("doc_word_wrap", "on_toggle_word_wrap"),
+    "auto_indent": ("doc_auto_indent", "on_toggle_auto_indent"),
+    "tab_size": ("doc_tab_size", "on_change_tab_size"),
+    "color_scheme": ("doc_scheme", "on_change_scheme"),
+    "write_bom": ("doc_write_bom", "on_toggle_bom"),
+    "viewer_mode": ("doc_viewer_mode", "on_toggle_viewer_mode"),
+    "follow": ("doc_follow", "on_toggle_follow"),
+}
+
+# Settings shown as a window action: setting key -> action name
+SETTING_ACTIONS = {
+    "show_line_numbers": "line_numbers",
+    "word_wrap": "word_wrap",
+    "auto_indent": "auto_indent",
+    "tab_width": "tab_size",
+    "theme": "color_scheme",
+}
+
+ACCELS = {
+    "app.new_tab": ["<Primary>n"],
+    "app.new_window": ["<Primary><Shift>n"],
+    "app.open": ["<Primary>o"],
+    "app.save": ["<Primary>s"],
+    "app.save_as": ["<Primary><Shift>s"],
+    "app.reload": ["F5"],
+    "app.print": ["<Primary>p"],
+    "app.reopen_tab": ["<Primary><Shift>t"],
+    "app.close_tab": ["<Primary>w"],
+    "app.close_window": ["<Primary><Shift>w"],
+    "app.quit": ["<Primary>q"],
+    "app.undo": ["<Primary>z"],
+    "app.redo": ["<Primary>y", "<Primary><Shift>z"],
+    "app.delete_line": ["<Primary><Shift>k"],
+    "app.toc_upper": ["<Primary><Shift>u"],
+    "app.toc_lower": ["<Primary><Shift>l"],
+    "app.move_up": ["<Primary>Up"],
+    "app.move_down": ["<Primary>Down"],
+    "app.duplicate": ["<Primary>d"],
+    "app.indent": ["<Primary>i"],
+    "app.unindent": ["<Primary>u"],
+    "app.join_lines": ["<Primary>j"],
+    "app.toggle_comment": ["<Primary>slash"],
+    "app.preferences": ["<Primary>comma"],
+    "app.find": ["<Primary>f"],
+    "app.replace": ["<Primary>h", "<Primary>r"],
+    "app.find_next": ["<Primary>g", "F3"],
+    "app.find_prev": ["<Primary><Shift>g", "<Shift>F3"],
+    "app.goto_line": ["<Primary>l"],
+    "app.zoom_in": ["<Primary>plus", "<Primary>equal"],
+    "app.zoom_out": ["<Primary>minus"],
+    "app.zoom_reset": ["<Primary>0"],
+    "win.toggle_menubar": ["<Primary>m"],
+    "win.toggle_fullscreen": ["F11"],
+    "app.prev_tab": ["<Primary>Page_Up"],
+    "app.next_tab": ["<Primary>Page_Down"],
+    "app.format_json": ["<Primary><Shift>j"],
+    "app.format_xml": ["<Primary><Shift>x"],
+    "app.convert_json": ["<Primary><Alt>l"],
+    "app.hex_view": ["<Primary><Shift>h"],
+}
+
+# Shown next to the item only: the focused text view or entry handles these
+# keys itself, and a global accelerator would take them away from it
+DISPLAY_ACCELS = {
+    "app.cut": "<Primary>x",
+    "app.copy": "<Primary>c",
+    "app.paste": "<Primary>v",
+    "app.select_all": "<Primary>a",
+}
+
+RECENT_LIMIT = 10
+
+_installed = weakref.WeakKeyDictionary()  # application -> MenuRegistry
+
+
+class MenuRegistry:
+    """
+    The menubar model and the application actions behind it, built once
+    per application and shared by all of its windows.
+
+    Windows no longer construct a hundred menu items and actions each:
+    every window makes a Gtk.MenuBar from the same Gio.Menu, and menu
+    items and accelerators activate application actions, which run on the
+    active window. Only state that differs per window (check and radio
+    items) lives in a small set of window actions, see add_window_actions().
+
+    Submenus listing everything installed (color schemes, languages) or
+    changing all the time (recent files) start out empty and are filled
+    when first opened, through GTK's submenu-action hook.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.lazy = {}  # name -> [Gio.Menu, filled]
+        self.add_app_actions()
+        for action_name, accels in ACCELS.items():
+            application.set_accels_for_action(action_name, accels)
+        self.model = Gio.Menu()
+        for label, entries in MENUBAR:
+            self.model.append_submenu(label, self.build(entries))
+
+    def build(self, entries):
+        menu = Gio.Menu()
+        section = Gio.Menu()
+        for entry in entries:
+            if entry is None:
+                menu.append_section(None, section)
+                section = Gio.Menu()
+                continue
+            label, action = entry[0], entry[1]
+            if isinstance(action, list):
+                section.append_submenu(label, self.build(action))
+            elif action.startswith("lazy:"):
+                section.append_item(self.lazy_submenu(label, action[5:]))
+            elif action == "app.handler_latency" and not profiler.get_profiler():
+                # Only there when started with --profile / ZENPAD_PROFILE
+                continue
+            else:
+                section.append_item(self.make_item(*entry))
+        menu.append_section(None, section)
+        return menu
+
+    def make_item(self, label, action, icon=None, target=None):
+        item = Gio.MenuItem.new(label, None)
+        if target is None:
+            item.set_detailed_action(action)
+        elif isinstance(target, int):
+            item.set_action_and_target_value(action, GLib.Variant.new_int32(target))
+        else:
+            item.set_action_and_target_value(action, GLib.Variant.new_string(target))
+        if icon:
+            item.set_icon(Gio.ThemedIcon.new(icon))
+        if action in DISPLAY_ACCELS:
+            item.set_attribute_value("accel", GLib.Variant.new_string(DISPLAY_ACCELS[action]))
+        return item
+
+    def lazy_submenu(self, label, name):
+        submenu = Gio.Menu()
+        self.lazy[name] = [submenu, False]
+        # GTK flips this action's state to True when the submenu is about to open
+        action = Gio.SimpleAction.new_stateful(f"fill_{name}", None, GLib.Variant.new_boolean(False))
+        action.connect("change-state", self.on_submenu_shown, name)
+        self.application.add_action(action)
+
+        item = Gio.MenuItem.new_submenu(label, submenu)
+        item.set_attribute_value("submenu-action", GLib.Variant.new_string(f"app.fill_{name}"))
+        return item
+
+    def on_submenu_shown(self, action, value, name):
+        action.set_state(value)
+        if not value.get_boolean():
+            return
+        submenu, filled = self.lazy[name]
+        if filled and name != "recent":
+            return
+        # The recent files change, so that one is filled every time
+        submenu.remove_all()
+        LAZY_SUBMENUS[name](self, submenu)
+        self.lazy[name][1] = True
+
+    def fill_schemes(self, submenu):
+        manager = GtkSource.StyleSchemeManager.get_default()
+        for scheme_id in sorted(manager.get_scheme_ids()):
+            submenu.append_item(self.make_item(scheme_id, "win.color_scheme", None, scheme_id))
+
+    def fill_filetypes(self, submenu):
+        """Every installed language, grouped by section as GtkSource names them."""
+        manager = GtkSource.LanguageManager.get_default()
+        languages = [manager.get_language(lang_id) for lang_id in manager.get_language_ids()]
+        sections = {}
+        for language in languages:
+            if not language.get_hidden():
+                sections.setdefault(language.get_section(), []).append(language)
+
+        plain = Gio.Menu()
+        plain.append_item(self.make_item("Plain Text", "app.filetype", None, ""))
+        submenu.append_section(None, plain)
+        for section_name in sorted(sections):
+            section = Gio.Menu()
+            for language in sorted(sections[section_name], key=lambda language: language.get_name().lower()):
+                section.append_item(self.make_item(language.get_name(), "app.filetype", None, language.get_id()))
+            submenu.append_submenu(section_name, section)
+
+    def fill_recent(self, submenu):
+        items = [item for item in Gtk.RecentManager.get_default().get_items() if item.get_uri().startswith("file://")]
+        items.sort(key=lambda item: -item.get_modified())
+        for item in items[:RECENT_LIMIT]:
+            submenu.append_item(self.make_item(item.get_display_name(), "app.open_recent", None, item.get_uri()))
+        if not items:
+            empty = Gio.MenuItem.new("No Recent Files", "app.no_recent")
+            submenu.append_item(empty)
+
+    def add_app_actions(self):
+        for name, spec in APP_ACTIONS.items():
+            parameter_type = APP_PARAMETERS.get(name)
+            action = Gio.SimpleAction.new(name, GLib.VariantType.new(parameter_type) if parameter_type else None)
+            action.connect("activate", self.on_activate, spec)
+            self.application.add_action(action)
+
+        quit_action = Gio.SimpleAction.new("quit", None)
+        quit_action.connect("activate", self.on_quit)
+        self.application.add_action(quit_action)
+        # Disabled placeholder for an empty recent files menu
+        placeholder = Gio.SimpleAction.new("no_recent", None)
+        placeholder.set_enabled(False)
+        self.application.add_action(placeholder)
+
+    def active_window(self):
+        window = self.application.get_active_window()
+        if window is not None and hasattr(window, "notebook"):
+            return window
+        # E.g. the Markdown preview is focused: use the editor window behind it
+        for window in self.application.get_windows():
+            if hasattr(window, "notebook"):
+                return window
+        return None
+
+    def on_activate(self, action, parameter, spec):
+        window = self.active_window()
+        if window is None:
+            return
+        method, args = spec[0], list(spec[1:])
+        if args and args[-1] is PARAMETER:
+            args[-1] = parameter.unpack()
+        getattr(window, method)(*args)
+
+    def on_quit(self, action, parameter):
+        # Through each window's close handling (session, unsaved changes)
+        for window in list(self.application.get_windows()):
+            window.close()
+
+
+LAZY_SUBMENUS = {
+    "recent": MenuRegistry.fill_recent,
+    "schemes": MenuRegistry.fill_schemes,
+    "filetypes": MenuRegistry.fill_filetypes,
+}
+
+
+def get_registry(application):
+    """The MenuRegistry of application, created on first use."""
+    registry = _installed.get(application)
+    if registry is None:
+        registry = _installed[application] = MenuRegistry(application)
+    return registry
+
+
+def add_window_actions(window):
+    """Creates the stateful window actions of WINDOW_ACTIONS on window."""
+    for name, (attribute, method) in WINDOW_ACTIONS.items():
+        state = getattr(window, attribute)
+        if isinstance(state, bool):
+            variant = GLib.Variant.new_boolean(state)
+        elif isinstance(state, int):
+            variant = GLib.Variant.new_int32(state)
+        else:
+            variant = GLib.Variant.new_string(state)
+        # Check items toggle a boolean; radio items pass their target
+        parameter_type = None if isinstance(state, bool) else variant.get_type()
+        action = Gio.SimpleAction.new_stateful(name, parameter_type, variant)
+        action.connect("change-state", on_window_state_change, window, method)
+        window.add_action(action)
+
+
+def sync_window_action(window, key):
+    """Shows the window's value of setting key on its action, without running the handler."""
+    name = SETTING_ACTIONS.get(key)
+    if name is None:
+        return
+    action = window.lookup_action(name)
+    value = getattr(window, WINDOW_ACTIONS[name][0])
+    kind = action.get_state().get_type_string()
+    if kind == "b":
+        action.set_state(GLib.Variant.new_boolean(bool(value)))
+    elif kind == "i":
+        action.set_state(GLib.Variant.new_int32(int(value)))
+    else:
+        action.set_state(GLib.Variant.new_string(value))
+
+
+def on_window_state_change(action, value, window, method):
+    # The state first: the handler may correct it (e.g. Follow refused)
+    action.set_state(value)
+    getattr(window, method)(value.unpack())
@@ -1,66 +1,13 @@
 import gi
-import os
-import json
 gi.require_version('Gtk', '3.0')
 gi.require_version('GtkSource', '4')
 from gi.repository import Gtk, GtkSource, Pango, GLib
 
-DEFAULT_SETTINGS = {
-    # Editor
-    "font": "Monospace 12",
-    "word_wrap": True,
-    "show_line_numbers": True,
-    "highlight_current_line": False,
-    
-    # Indentation
-    "tab_width": 4,
-    "use_spaces": True,
-    "auto_indent": True,
-    
-    # Files
-    "auto_save": False,
-    "auto_save_interval": 5, # minutes
-    "restore_session": True,
-    "encoding": "UTF-8",
-    
-    # Appearance
-    "theme": "tango",
-    "editor_padding": "normal" # small, normal, large
-}
-
-class Settings:
-    def __init__(self):
-        self.config_dir = os.path.join(os.path.expanduser("~"), ".config", "zenpad")
-        self.config_file = os.path.join(self.config_dir, "settings.json")
-        self.data = DEFAULT_SETTINGS.copy()
-        self.load()
-
-    def load(self):
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, "r") as f:
-                    saved = json.load(f)
-                    self.data.update(saved)
-            except Exception as e:
-                print(f"Error loading settings: {e}")
-
-    def save(self):
-        if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir)
-        try:
-            with open(self.config_file, "w") as f:
-                json.dump(self.data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
-
-    def get(self, key):
-        return self.data.get(key, DEFAULT_SETTINGS.get(key))
-
-    def set(self, key, value):
-        self.data[key] = value
-        self.save()
+from zenpad.settings import DEFAULT_SETTINGS, Settings
+from zenpad import trace
 
 class PreferencesDialog(Gtk.Dialog):
+    @trace.traced("PreferencesDialog.__init__")
     def __init__(self, parent):
         super().__init__(title="Preferences", transient_for=parent, flags=0)
         self.add_buttons(Gtk.STOCK_CLOSE, Gtk.ResponseType.CLOSE)
@@ -172,7 +119,34 @@ class PreferencesDialog(Gtk.Dialog):
         auto_save_chk.connect("toggled", self.on_toggle, "auto_save")
         grid.attach(auto_save_chk, 0, row, 2, 1)
         row += 1
+
+        grid.attach(Gtk.Label(label="Auto-Save Every:", xalign=0), 0, row, 1, 1)
+        interval_combo = Gtk.ComboBoxText()
+        for minutes in ["1", "2", "5", "10", "15", "30"]:
+            interval_combo.append(minutes, f"{minutes} min")
+        interval_combo.set_active_id(str(self.settings.get("auto_save_interval")))
+        interval_combo.connect("changed", self.on_combo_changed, "auto_save_interval")
+        grid.attach(interval_combo, 1, row, 1, 1)
+        row += 1
         
+        # Auto Reload
+        reload_chk = Gtk.CheckButton(label="Reload unmodified files when they change on disk")
+        reload_chk.set_active(self.settings.get("auto_reload"))
+        reload_chk.connect("toggled", self.on_toggle, "auto_reload")
+        grid.attach(reload_chk, 0, row, 2, 1)
+        row += 1
+
+        # Follow Mode
+        grid.attach(Gtk.Label(label="Follow Mode Keeps:", xalign=0), 0, row, 1, 1)
+        follow_combo = Gtk.ComboBoxText()
+        for lines, label in [("0", "All lines"), ("10000", "Last 10,000 lines"),
+                             ("100000", "Last 100,000 lines"), ("1000000", "Last 1,000,000 lines")]:
+            follow_combo.append(lines, label)
+        follow_combo.set_active_id(str(self.settings.get("follow_max_lines")))
+        follow_combo.connect("changed", self.on_combo_changed, "follow_max_lines")
+        grid.attach(follow_combo, 1, row, 1, 1)
+        row += 1
+
         # Restore Session
         restore_chk = Gtk.CheckButton(label="Restore last opened files on startup")
         restore_chk.set_active(self.settings.get("restore_session"))
@@ -199,9 +173,10 @@ class PreferencesDialog(Gtk.Dialog):
         # Theme
         grid.attach(Gtk.Label(label="Color Scheme:", xalign=0), 0, row, 1, 1)
         theme_combo = Gtk.ComboBoxText()
-        manager = GtkSource.StyleSchemeManager.get_default()
-        for scheme_id in sorted(manager.get_scheme_ids()):
-            theme_combo.append(scheme_id, scheme_id)
+        with trace.span("enumerate color schemes"):
+            manager = GtkSource.StyleSchemeManager.get_default()
+            for scheme_id in sorted(manager.get_scheme_ids()):
+                theme_combo.append(scheme_id, scheme_id)
         theme_combo.set_active_id(self.settings.get("theme"))
         theme_combo.connect("changed", self.on_combo_changed, "theme")
         grid.attach(theme_combo, 1, row, 1, 1)
@@ -224,17 +199,15 @@ class PreferencesDialog(Gtk.Dialog):
 
     def on_toggle(self, widget, key):
         value = widget.get_active()
+        # Every window applies it through its subscription
         self.settings.set(key, value)
-        self.parent_window.apply_setting(key, value)
 
     def on_combo_changed(self, widget, key):
         value = widget.get_active_id()
-        if key == "tab_width":
+        if key in ("tab_width", "auto_save_interval", "follow_max_lines"):
              value = int(value)
         self.settings.set(key, value)
-        self.parent_window.apply_setting(key, value)
 
     def on_font_set(self, widget):
         value = widget.get_font_name()
         self.settings.set("font", value)
-        self.parent_window.apply_setting("font", value)
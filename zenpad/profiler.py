@@ -0,0 +1,275 @@
+import gi
+import json
+import math
+import os
+import time
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GObject, GLib
+from zenpad import lazy
+
+# Set to 1 to enable profiling, or to a file path to also dump there on exit
+ENV_VAR = "ZENPAD_PROFILE"
+
+# Histogram buckets per power of two (~19% wide), covering 1us .. ~1h
+BUCKETS_PER_OCTAVE = 4
+MAX_BUCKET = 32 * BUCKETS_PER_OCTAVE
+
+KEY_TO_PAINT = "key press -> paint"
+
+_profiler = None
+
+
+class Histogram:
+    """Log-bucketed latency histogram; constant memory regardless of call count."""
+
+    def __init__(self):
+        self.counts = [0] * (MAX_BUCKET + 1)
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        micros = seconds * 1e6
+        index = int(math.log2(micros) * BUCKETS_PER_OCTAVE) + 1 if micros >= 1 else 0
+        self.counts[min(index, MAX_BUCKET)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction, in seconds."""
+        if not self.calls:
+            return 0.0
+        wanted = max(1, math.ceil(self.calls * fraction))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                bound = 2 ** (index / BUCKETS_PER_OCTAVE) / 1e6
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        """Returns a dict with call count and p50/p95/p99/max in milliseconds."""
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def describe_callback(callback):
+    """Readable handler name; lambdas get their file and line."""
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    code = getattr(callback, "__code__", None)
+    if "<lambda>" in name and code:
+        name = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+class Profiler:
+    """
+    Times every signal handler connected while it is installed.
+
+    install() replaces GObject.Object.connect/connect_after with versions
+    that wrap the handler in a timer, so handlers connected by the window
+    and the tabs are covered without touching their code. Each handler
+    gets a histogram keyed by "<emitter class>::<signal> <handler>".
+    """
+
+    def __init__(self, dump_path=None):
+        self.dump_path = dump_path
+        self.histograms = {}
+        self.started = time.time()
+        self._connect = None
+        self._connect_after = None
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def wrap(self, name, callback):
+        histogram = self.histogram(name)
+
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                histogram.add(time.perf_counter() - start)
+        return timed
+
+    def install(self):
+        if self._connect:
+            return
+        profiler = self
+        self._connect = connect = GObject.Object.connect
+        self._connect_after = connect_after = GObject.Object.connect_after
+
+        def timed_connect(obj, signal, callback, *args):
+            name = f"{type(obj).__name__}::{signal} {describe_callback(callback)}"
+            return connect(obj, signal, profiler.wrap(name, callback), *args)
+
+        def timed_connect_after(obj, signal, callback, *args):
+            name = f"{type(obj).__name__}::{signal} (after) {describe_callback(callback)}"
+            return connect_after(obj, signal, profiler.wrap(name, callback), *args)
+
+        GObject.Object.connect = timed_connect
+        GObject.Object.connect_after = timed_connect_after
+
+    def uninstall(self):
+        if self._connect:
+            GObject.Object.connect = self._connect
+            GObject.Object.connect_after = self._connect_after
+            self._connect = self._connect_after = None
+
+    def watch_key_to_paint(self, widget):
+        """
+        Measures from a key press on widget to the end of the next frame
+        painted by its toplevel. Connect before the widget's own key handlers.
+        """
+        connect = self._connect or GObject.Object.connect
+        histogram = self.histogram(KEY_TO_PAINT)
+        state = {"pressed": None, "clock": None, "handler": 0}
+
+        def on_key_press(widget, event):
+            if state["pressed"] is None:
+                state["pressed"] = time.perf_counter()
+            return False
+
+        def on_after_paint(clock):
+            if state["pressed"] is not None:
+                histogram.add(time.perf_counter() - state["pressed"])
+                state["pressed"] = None
+
+        def on_realize(widget):
+            state["clock"] = widget.get_frame_clock()
+            state["handler"] = connect(state["clock"], "after-paint", on_after_paint)
+
+        def on_unrealize(widget):
+            if state["handler"]:
+                state["clock"].disconnect(state["handler"])
+                state["clock"] = None
+                state["handler"] = 0
+
+        connect(widget, "key-press-event", on_key_press)
+        connect(widget, "realize", on_realize)
+        connect(widget, "unrealize", on_unrealize)
+        if widget.get_realized():
+            on_realize(widget)
+
+    def reset(self):
+        self.histograms.clear()
+        self.started = time.time()
+
+    def report(self):
+        """Returns {name: summary} sorted by total time spent, slowest first."""
+        items = sorted(self.histograms.items(), key=lambda item: -item[1].total)
+        return {name: histogram.summary() for name, histogram in items if histogram.calls}
+
+    def dump(self, path=None):
+        path = path or self.dump_path
+        data = {
+            "started": self.started,
+            "duration_s": round(time.time() - self.started, 3),
+            "handlers": self.report(),
+            "deferred_imports_ms": {name: round(ms, 1) for name, ms in lazy.import_times.items()},
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+        return path
+
+
+def enable(dump_path=None):
+    """Turns profiling on for handlers connected from now on."""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(dump_path)
+        _profiler.install()
+    elif dump_path:
+        _profiler.dump_path = dump_path
+    return _profiler
+
+
+def enable_from_environment():
+    value = os.environ.get(ENV_VAR, "")
+    if value and value != "0":
+        return enable(None if value == "1" else value)
+    return None
+
+
+def get_profiler():
+    """Returns the active Profiler, or None when profiling is off."""
+    return _profiler
+
+
+class ProfilerDialog(Gtk.Dialog):
+    """Live table of handler latencies, refreshed every second."""
+
+    COLUMNS = ("Handler", "Calls", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Total ms")
+    KEYS = ("calls", "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_ms")
+
+    def __init__(self, parent, profiler):
+        super().__init__(title="Handler Latency", transient_for=parent, flags=0)
+        self.profiler = profiler
+        self.add_buttons("Reset", 1, "Save JSON...", 2, Gtk.STOCK_CLOSE, Gtk.ResponseType.CLOSE)
+        self.set_default_size(900, 500)
+
+        self.store = Gtk.ListStore(str, int, float, float, float, float, float)
+        view = Gtk.TreeView(model=self.store)
+        for index, title in enumerate(self.COLUMNS):
+            column = Gtk.TreeViewColumn(title, Gtk.CellRendererText(), text=index)
+            column.set_sort_column_id(index)
+            column.set_resizable(True)
+            view.append_column(column)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.add(view)
+        self.get_content_area().pack_start(scrolled, True, True, 0)
+
+        self.connect("response", self.on_response)
+        self.connect("destroy", self.on_destroy)
+        self._source_id = GLib.timeout_add_seconds(1, self.refresh)
+        self.refresh()
+        self.show_all()
+
+    def refresh(self):
+        self.store.clear()
+        for name, summary in self.profiler.report().items():
+            self.store.append([name] + [summary[key] for key in self.KEYS])
+        return True
+
+    def on_response(self, dialog, response):
+        if response == 1:
+            self.profiler.reset()
+            self.refresh()
+        elif response == 2:
+            self.save_json()
+        else:
+            self.destroy()
+
+    def save_json(self):
+        chooser = Gtk.FileChooserDialog(
+            title="Save Latency Report", parent=self, action=Gtk.FileChooserAction.SAVE
+        )
+        chooser.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_SAVE, Gtk.ResponseType.OK)
+        chooser.set_do_overwrite_confirmation(True)
+        chooser.set_current_name("zenpad-latency.json")
+        if chooser.run() == Gtk.ResponseType.OK:
+            try:
+                self.profiler.dump(chooser.get_filename())
+            except OSError as e:
+                print(f"Error saving latency report: {e}")
+        chooser.destroy()
+
+    def on_destroy(self, widget):
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
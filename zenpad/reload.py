@@ -0,0 +1,243 @@
+import gi
+import hashlib
+import os
+import threading
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad import encoding as encodings
+from zenpad.dirty import is_dirty, stat_signature
+
+# Above this many differing lines, the changed region is replaced as a whole
+MAX_DIFF_LINES = 200000
+# Characters at the end of the buffer compared with the file before an append
+APPEND_CHECK_CHARS = 4096
+
+
+def split_lines(text):
+    """Lines with their "\n", plus the char offset where each line starts."""
+    lines = text.split("\n")
+    if lines[-1]:
+        lines = [line + "\n" for line in lines[:-1]] + [lines[-1]]
+    else:
+        lines = [line + "\n" for line in lines[:-1]]
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return lines, offsets
+
+
+def diff_lines(old, new):
+    """
+    Opcodes (i1, i2, j1, j2) that turn the old lines into the new ones,
+    changes only. The common head and tail are skipped line by line; the
+    rest is diffed on line hashes.
+    """
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+
+    if start == end_old and start == end_new:
+        return []
+    if end_old - start > MAX_DIFF_LINES or end_new - start > MAX_DIFF_LINES:
+        return [(start, end_old, start, end_new)]
+
+    # Compare small ints instead of strings
+    ids = {}
+    a = [ids.setdefault(line, len(ids)) for line in old[start:end_old]]
+    b = [ids.setdefault(line, len(ids)) for line in new[start:end_new]]
+
+    import difflib
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=len(a) > 1000)
+    return [(i1 + start, i2 + start, j1 + start, j2 + start)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+class FileReloader:
+    """
+    Brings an EditorTab up to date with its file by editing only what
+    changed, so undo history, cursor, scroll, highlighting and search
+    state survive a reload.
+
+    The file is read, decoded and diffed on a worker thread. A file that
+    only grew (same inode, larger, and the bytes before the old end still
+    hold the end of the buffer) gets just its new bytes read, decoded and
+    appended; the tab's hash states are extended by them instead of
+    hashing the whole file again. Otherwise the buffer text and the file
+    are diffed line by line and each changed hunk becomes one buffer edit,
+    all inside a single user action (one undo step).
+
+    on_done(reloader) is called on the main thread. reloader.error is set
+    if the file could not be read or no longer decodes with the tab's
+    encoding; the caller should fall back to a full load then.
+    """
+
+    def __init__(self, editor, path, on_done=None):
+        self.editor = editor
+        self.path = path
+        self.on_done = on_done
+
+        self.error = None
+        self.cancelled = False
+        self.applying = False  # True while the buffer is being patched
+        self.appended = False
+        self.hunks = 0
+        self.tail = None
+        self.edits = None
+        self.raw_md5 = self.text_md5 = None  # hashlib states behind the new digests
+
+    def start(self):
+        editor = self.editor
+        self.encoding = editor.encoding
+        self.bom = editor.bom
+        self.generation = editor.dirty.generation
+
+        self.newline = editor.newline
+
+        # Append-only is possible if the buffer still is the file it came from
+        self.can_append = bool(not is_dirty(editor) and editor.disk_hash and editor.disk_signature
+                               and editor.disk_md5 and editor.text_md5)
+        self.old_text = None if self.can_append else editor.get_text()
+        if self.can_append:
+            self.old_signature = editor.disk_signature
+            # Copies: the worker extends them
+            self.raw_md5 = editor.disk_md5.copy()
+            self.text_md5 = editor.text_md5.copy()
+            buffer = editor.buffer
+            end = buffer.get_end_iter()
+            start = buffer.get_iter_at_offset(max(0, end.get_offset() - APPEND_CHECK_CHARS))
+            self.old_end = buffer.get_text(start, end, True)
+
+        thread = threading.Thread(target=self.worker, daemon=True)
+        thread.start()
+
+    # -- Worker thread: no Gtk calls here --
+
+    def worker(self):
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                self.signature = stat_signature(st)
+                if self.can_append and self.grew_in_place(f, st):
+                    data = f.read()
+                    # The old text ended on a complete line ending and character
+                    self.tail = encodings.decode_bytes(data, self.encoding)[0]
+                    self.raw_md5.update(data)
+                    self.text_md5.update(self.tail.encode("UTF-8"))
+                    self.appended = True
+                else:
+                    f.seek(0)
+                    data = f.read()
+                    self.raw_md5 = hashlib.md5(data)
+                    self.text, self.newline = encodings.decode_bytes(data, self.encoding, self.bom)
+                    self.text_md5 = hashlib.md5(self.text.encode("UTF-8"))
+            self.raw_digest = self.raw_md5.hexdigest()
+            self.digest = self.text_md5.hexdigest()
+
+            if not self.appended:
+                if self.old_text is None:
+                    # Not append-only after all: fetch the buffer text on the main thread
+                    GLib.idle_add(self.on_need_text)
+                    return
+                self.compute_hunks()
+        except Exception as e:
+            # Whatever it is, finish() must run: it clears editor.reloader
+            self.error = e
+        GLib.idle_add(self.finish)
+
+    def grew_in_place(self, f, st):
+        """
+        True if the file is the one loaded with bytes added at the end;
+        f is then positioned at the old end.
+        """
+        inode, old_size, mtime = self.old_signature
+        if st.st_ino != inode or st.st_size <= old_size:
+            return False
+        if self.newline == "\r" and self.old_end.endswith("\n"):
+            # A CR at the old end may be the first half of a CRLF
+            return False
+        expected = encodings.encode_text(self.old_end, self.encoding, self.newline)
+        if len(expected) > old_size:
+            return False
+        f.seek(old_size - len(expected))
+        return f.read(len(expected)) == expected
+
+    def compute_hunks(self):
+        old_lines, self.old_offsets = split_lines(self.old_text)
+        new_lines, _ = split_lines(self.text)
+        self.old_text = None
+        self.edits = [
+            (i1, i2, "".join(new_lines[j1:j2]))
+            for i1, i2, j1, j2 in diff_lines(old_lines, new_lines)
+        ]
+
+    def diff_worker(self):
+        try:
+            self.compute_hunks()
+        except Exception as e:
+            self.error = e
+        GLib.idle_add(self.finish)
+
+    # -- Main thread --
+
+    def on_need_text(self):
+        self.old_text = self.editor.get_text()
+        self.generation = self.editor.dirty.generation
+        thread = threading.Thread(target=self.diff_worker, daemon=True)
+        thread.start()
+        return False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def finish(self):
+        editor = self.editor
+        buffer = editor.buffer
+        if not self.cancelled and not self.error and editor.dirty.generation != self.generation:
+            # Typed into while we were diffing: diff again against the current text
+            if self.appended:
+                # Only the new bytes were read: start over with the whole file
+                self.appended = self.can_append = False
+                self.old_text = editor.get_text()
+                self.generation = editor.dirty.generation
+                thread = threading.Thread(target=self.worker, daemon=True)
+                thread.start()
+            else:
+                self.on_need_text()
+            return False
+
+        if not self.cancelled and not self.error:
+            self.applying = True
+            buffer.begin_user_action()
+            if self.appended:
+                buffer.insert(buffer.get_end_iter(), self.tail)
+                self.hunks = 1 if self.tail else 0
+            else:
+                # Back to front, so the offsets of earlier hunks stay valid
+                for i1, i2, text in reversed(self.edits):
+                    start = buffer.get_iter_at_offset(self.old_offsets[i1])
+                    if i2 > i1:
+                        end = buffer.get_iter_at_offset(self.old_offsets[i2])
+                        buffer.delete(start, end)
+                    if text:
+                        buffer.insert(start, text)
+                self.hunks = len(self.edits)
+            buffer.end_user_action()
+            self.applying = False
+
+            editor.newline = self.newline
+            editor.disk_signature = self.signature
+            editor.disk_hash = self.raw_digest
+            editor.dirty.mark_saved(digest=self.digest)
+            buffer.set_modified(False)
+
+        if not self.cancelled and not self.error:
+            editor.disk_md5, editor.text_md5 = self.raw_md5, self.text_md5
+        self.text = self.tail = self.edits = self.old_end = None
+        if self.on_done:
+            self.on_done(self)
+        return False
@@ -0,0 +1,209 @@
+import gi
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+import time
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad import trace
+from zenpad.dirty import file_signature
+from zenpad.encoding import encode_text
+
+# Writes allowed in flight at once (Save All)
+MAX_CONCURRENT_SAVES = 4
+
+_slots = threading.Semaphore(MAX_CONCURRENT_SAVES)
+
+# New files get the usual 0o666 & ~umask; the umask can only be read by
+# setting it, which is not thread safe, so do it once at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_atomic(path, data):
+    """
+    Replaces path with data without ever leaving a partial file behind.
+
+    The data goes to a temp file in the same directory, is fsynced and
+    renamed over the target, which is atomic on POSIX: readers and crashes
+    see either the old or the new file. The original's permissions,
+    extended attributes and ACLs (and owner, where allowed) are kept.
+    Symlinks are followed, so the link itself stays in place.
+
+    A rename would give the file a new inode, so a file with other hard
+    links is written in place instead, as is an existing file whose
+    directory does not allow creating the temp file (see write_in_place).
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        st = None
+
+    if st and st.st_nlink > 1:
+        write_in_place(path, data)
+        return
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    except OSError:
+        if st is None:
+            raise
+        # E.g. a writable file in a read-only directory
+        write_in_place(path, data)
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            if st:
+                copy_xattrs(path, f.fileno())
+                os.fchmod(f.fileno(), stat.S_IMODE(st.st_mode))
+                try:
+                    os.fchown(f.fileno(), st.st_uid, st.st_gid)
+                except PermissionError:
+                    pass
+            else:
+                os.fchmod(f.fileno(), 0o666 & ~_UMASK)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def write_in_place(path, data):
+    """
+    Overwrites path in its own inode: truncate, write, fsync. Not atomic,
+    but hard links, ownership and attributes stay as they are.
+    """
+    with open(path, "r+b") as f:
+        f.truncate(0)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def copy_xattrs(path, fd):
+    """Copies the extended attributes of path (ACLs included) to fd, where the platform has them."""
+    if not hasattr(os, "listxattr"):
+        return
+    try:
+        names = os.listxattr(path)
+    except OSError:
+        return
+    for name in names:
+        try:
+            os.setxattr(fd, name, os.getxattr(path, name))
+        except OSError:
+            # Not allowed (e.g. security.* as a user) or not supported here
+            pass
+
+
+class FileSaver:
+    """
+    Saves an EditorTab without blocking the main loop.
+
+    start() takes a snapshot of the text and of the dirty state on the main
+    thread; a worker thread encodes it the way the tab's file is stored
+    (encoding, line endings, BOM), hashes it and writes it with
+    write_atomic().
+    At most MAX_CONCURRENT_SAVES writes run at once, so Save All overlaps
+    its writes without flooding the disk.
+
+    on_done(saver) is called on the main thread afterwards, with
+    saver.error set if the write failed. Saving again while a save of the
+    tab is still running queues the new save behind it; queued saves run
+    one after another in the order they were asked for, each with its own
+    on_done.
+    """
+
+    def __init__(self, editor, path, on_done=None):
+        self.editor = editor
+        self.path = path
+        self.on_done = on_done
+
+        self.digest = None
+        self.raw_digest = None
+        self.text_md5 = self.raw_md5 = None  # hashlib states of the two digests
+        self.signature = None
+        self.error = None
+        self.finished = False
+        self.started = None
+        self._queued = []  # FileSavers waiting for this one, oldest first
+
+    def start(self):
+        editor = self.editor
+        if editor.saver:
+            # Queue behind the running save instead of racing it on disk
+            editor.saver._queued.append(self)
+            return
+        editor.saver = self
+        self.started = time.perf_counter()
+        self.text = editor.get_text()
+        self.snapshot = editor.dirty.snapshot()
+        self.format = (editor.encoding, editor.newline, editor.bom)
+
+        # Not a daemon: a save must not be cut off when the app quits
+        thread = threading.Thread(target=self.write_worker, name="FileSaver")
+        thread.start()
+
+    # -- Worker thread: no Gtk calls here --
+
+    def write_worker(self):
+        with _slots, trace.span("encode and write", category="io", path=self.path):
+            try:
+                data = encode_text(self.text, *self.format)
+                self.text_md5 = hashlib.md5(self.text.encode("UTF-8"))
+                self.raw_md5 = hashlib.md5(data)
+                self.digest = self.text_md5.hexdigest()
+                self.raw_digest = self.raw_md5.hexdigest()
+                write_atomic(self.path, data)
+                self.signature = file_signature(self.path)
+            except Exception as e:
+                self.error = e
+        self.text = None
+        GLib.idle_add(self.finish)
+
+    # -- Main thread --
+
+    def finish(self):
+        self.finished = True
+        editor = self.editor
+        editor.saver = None
+
+        if not self.error:
+            editor.disk_signature = self.signature
+            editor.disk_hash = self.raw_digest
+            editor.disk_md5, editor.text_md5 = self.raw_md5, self.text_md5
+            editor.dirty.mark_saved(digest=self.digest, snapshot=self.snapshot)
+            if not editor.dirty.is_dirty():
+                editor.buffer.set_modified(False)
+
+        trace.complete("FileSaver", self.started, category="io", path=self.path,
+                       error=repr(self.error) if self.error else None)
+        if self.on_done:
+            self.on_done(self)
+        if self._queued:
+            following = self._queued.pop(0)
+            following._queued = self._queued
+            following.start()
+        return False
@@ -0,0 +1,179 @@
+import gi
+import atexit
+import json
+import os
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+from zenpad import trace
+from zenpad.dirty import file_signature
+from zenpad.filewatch import get_watcher
+from zenpad.saver import write_atomic
+
+# Changes within this many ms are written to disk together
+SAVE_DELAY_MS = 500
+
+DEFAULT_SETTINGS = {
+    # Editor
+    "font": "Monospace 12",
+    "word_wrap": True,
+    "show_line_numbers": True,
+    "highlight_current_line": False,
+    
+    # Indentation
+    "tab_width": 4,
+    "use_spaces": True,
+    "auto_indent": True,
+    
+    # Files
+    "auto_save": False,
+    "auto_save_interval": 5, # minutes
+    "auto_reload": True, # reload unmodified tabs when their file changes on disk
+    "follow_max_lines": 0, # lines kept by tabs in Follow mode, 0 = all
+    "restore_session": True,
+    "encoding": "UTF-8",
+    "large_file_threshold": 256, # MB, opened read-only in large file mode
+    
+    # Appearance
+    "theme": "tango",
+    "editor_padding": "normal" # small, normal, large
+}
+
+class Settings:
+    """
+    The settings of all windows, in memory.
+
+    get() never touches the disk. set() notifies the subscribers right
+    away and writes settings.json SAVE_DELAY_MS later, so a burst of
+    changes (dragging through a combo, several toggles) costs one write.
+    The file is replaced atomically (write_atomic), so a crash leaves the
+    old or the new settings, never half a file; pending changes are also
+    written when the process exits.
+
+    Edits of the file by another Zenpad instance (or by hand) are noticed
+    through the shared FileWatcher and reported to the subscribers like
+    local changes. Keys changed here and not yet written win.
+
+    Use get_settings() for the shared store.
+    """
+
+    def __init__(self):
+        self.config_dir = os.path.join(os.path.expanduser("~"), ".config", "zenpad")
+        self.config_file = os.path.join(self.config_dir, "settings.json")
+        self.data = DEFAULT_SETTINGS.copy()
+        self.subscribers = []
+        self.unsaved = set()  # keys set since the last write
+        self.signature = None  # file_signature() of what we last read or wrote
+        self._source_id = 0
+        self.load()
+
+    @trace.traced("Settings.load", category="startup")
+    def load(self):
+        saved = self.read(keep_broken=True)
+        if saved:
+            self.data.update(saved)
+
+    def read(self, keep_broken=False):
+        """
+        The settings in the file, or None if it is missing or unreadable.
+        With keep_broken, a file that is not valid JSON is moved aside.
+        """
+        if not os.path.exists(self.config_file):
+            return None
+        try:
+            self.signature = file_signature(self.config_file)
+            with open(self.config_file, "r") as f:
+                saved = json.load(f)
+            if not isinstance(saved, dict):
+                raise ValueError("not a JSON object")
+            return saved
+        except OSError as e:
+            print(f"Error loading settings: {e}")
+        except ValueError as e:
+            if not keep_broken:
+                # E.g. caught in the middle of a non-atomic write: the next event retries
+                return None
+            # Keep it for the user instead of overwriting it with the next change
+            broken = self.config_file + ".broken"
+            print(f"Error loading settings: {e}; moved to {broken}, using defaults")
+            try:
+                os.replace(self.config_file, broken)
+            except OSError:
+                pass
+        return None
+
+    def watch(self):
+        get_watcher().watch(self.config_file, self.on_file_changed)
+
+    def save(self):
+        """Writes the settings now."""
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+        try:
+            os.makedirs(self.config_dir, exist_ok=True)
+            data = json.dumps(self.data, indent=4).encode("UTF-8")
+            write_atomic(self.config_file, data)
+            self.signature = file_signature(self.config_file)
+            self.unsaved.clear()
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error saving settings: {e}")
+
+    def flush(self):
+        """Writes pending changes, if any."""
+        if self.unsaved:
+            self.save()
+
+    def on_save_timeout(self):
+        self._source_id = 0
+        self.flush()
+        return False
+
+    def get(self, key):
+        return self.data.get(key, DEFAULT_SETTINGS.get(key))
+
+    def set(self, key, value):
+        if key in self.data and self.data[key] == value:
+            return
+        self.data[key] = value
+        self.unsaved.add(key)
+        if not self._source_id:
+            self._source_id = GLib.timeout_add(SAVE_DELAY_MS, self.on_save_timeout)
+        self.notify(key, value)
+
+    def subscribe(self, callback):
+        """Calls callback(key, value) after every change of a setting."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def notify(self, key, value):
+        for callback in list(self.subscribers):
+            callback(key, value)
+
+    def on_file_changed(self, path):
+        if file_signature(self.config_file) == self.signature:
+            # Our own write
+            return
+        saved = self.read()
+        if not saved:
+            return
+        for key, value in saved.items():
+            if key in self.unsaved or self.data.get(key) == value:
+                continue
+            self.data[key] = value
+            self.notify(key, value)
+
+
+_settings = None
+
+
+def get_settings():
+    """The Settings shared by all windows, loaded on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+        _settings.watch()
+        atexit.register(_settings.flush)
+    return _settings
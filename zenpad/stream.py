@@ -0,0 +1,185 @@
+import gi
+import codecs
+import hashlib
+import io
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gio, GLib
+from zenpad import encoding as encodings
+
+# Bytes asked for per asynchronous read
+READ_SIZE = 64 * 1024
+# Decoded characters allowed to wait for the buffer before reading pauses
+MAX_PENDING_CHARS = 4 * 1024 * 1024
+
+
+class StreamLoader:
+    """
+    Streams a Gio.InputStream (e.g. zenpad's stdin) into an EditorTab while
+    it is still being written, the way less does.
+
+    Reads are asynchronous, so the main loop never waits for the producer.
+    Each block is decoded with an incremental decoder (a multi-byte
+    character split between two reads is completed by the next one) and
+    its line endings are translated to LF. Decoded text is collected and
+    appended to the buffer from one idle callback per batch, however many
+    reads came in meanwhile. If the view was scrolled to the end, it
+    follows the new text; scrolling up stops that until the end is reached
+    again. Reading pauses while MAX_PENDING_CHARS wait for the buffer.
+
+    Used in place of a FileLoader (editor.loader, cancel(), on_done), so
+    the tab counts as loading until EOF. Cancelling stops reading but keeps
+    the text received so far. Bytes that do not decode are replaced with
+    U+FFFD rather than failing the whole stream.
+    """
+
+    def __init__(self, editor, stream, encoding=None, on_done=None, auto_scroll=True, name="stdin"):
+        self.editor = editor
+        self.stream = stream
+        # None: a BOM, else UTF-8. Raises LookupError for unknown names
+        self.encoding = encodings.normalize(encoding) if encoding else None
+        self.on_done = on_done
+        self.auto_scroll = auto_scroll
+        self.path = name  # for LoadProgress
+
+        self.newline = "\n"
+        self.bom = False
+        self.fraction = None  # unknown length
+        self.inserted_bytes = 0
+        self.error = None
+        self.cancelled = False
+        self.finished = False
+        self.editable = True
+
+        self._cancellable = Gio.Cancellable()
+        self._decoder = None
+        self._translator = io.IncrementalNewlineDecoder(None, translate=True)
+        self._line_endings = encodings.LineEndingCounter()
+        self._digest = hashlib.md5()
+        self._pending = []  # decoded text waiting for the buffer
+        self._pending_chars = 0
+        self._pending_bytes = 0
+        self._reading = False
+        self._eof = False
+        self._source_id = 0
+
+    def start(self):
+        buffer = self.editor.buffer
+        buffer.begin_not_undoable_action()
+        buffer.set_text("")
+        self.editable = self.editor.view.get_editable()
+        self.editor.view.set_editable(False)
+        self.editor.loader = self
+        self.read_next()
+
+    def cancel(self):
+        if self.finished:
+            return
+        self.cancelled = True
+        self._cancellable.cancel()
+        self.flush()
+        self.finish()
+
+    def read_next(self):
+        self._reading = True
+        self.stream.read_bytes_async(READ_SIZE, GLib.PRIORITY_DEFAULT, self._cancellable, self.on_read)
+
+    def on_read(self, stream, result):
+        self._reading = False
+        if self.finished:
+            return
+        try:
+            data = stream.read_bytes_finish(result).get_data() or b""
+        except GLib.Error as e:
+            self.error = e
+            data = b""
+        self.decode(data, final=not data)
+
+        if not data:
+            self._eof = True
+            self.schedule_flush()
+        elif self._pending_chars < MAX_PENDING_CHARS:
+            self.read_next()
+        # Otherwise on_flush resumes reading once the buffer caught up
+
+    def decode(self, data, final):
+        if self._decoder is None:
+            if not data and not final:
+                return
+            if self.encoding:
+                encoding = self.encoding
+                bom = encodings.bom_for(encoding)
+                skip = len(bom) if bom and data.startswith(bom) else 0
+            else:
+                encoding, skip = encodings.sniff_bom(data)
+            self.encoding = encoding or "utf-8"
+            self.bom = skip > 0
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+            data = data[skip:]
+
+        text = self._decoder.decode(data, final=final)
+        self._line_endings.feed(text)
+        text = self._translator.decode(text, final=final)
+        self._pending_bytes += len(data)
+        if text:
+            self._digest.update(text.encode("UTF-8"))
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        if not self._source_id:
+            # Below redraw priority: reads arriving meanwhile join the batch
+            self._source_id = GLib.idle_add(self.on_flush, priority=GLib.PRIORITY_DEFAULT_IDLE)
+
+    def on_flush(self):
+        self._source_id = 0
+        if self.finished:
+            return False
+        self.flush()
+        if self._eof:
+            self.finish()
+        elif not self._reading:
+            self.read_next()
+        return False
+
+    def flush(self):
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self.inserted_bytes += self._pending_bytes
+        self._pending_bytes = 0
+
+        view = self.editor.view
+        adjustment = view.get_vadjustment()
+        at_end = adjustment.get_value() + adjustment.get_page_size() >= adjustment.get_upper() - 1
+        buffer = self.editor.buffer
+        buffer.insert(buffer.get_end_iter(), text)
+        if self.auto_scroll and at_end:
+            buffer.place_cursor(buffer.get_end_iter())
+            view.scroll_to_mark(buffer.get_insert(), 0.0, False, 0.0, 1.0)
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self._source_id:
+            GLib.source_remove(self._source_id)
+            self._source_id = 0
+
+        editor = self.editor
+        buffer = editor.buffer
+        buffer.end_not_undoable_action()
+        editor.view.set_editable(self.editable)
+        editor.loader = None
+
+        editor.encoding = self.encoding or "utf-8"
+        editor.newline = self._line_endings.dominant
+        editor.bom = self.bom
+        # Like text passed to add_tab: the tab starts clean
+        editor.dirty.mark_saved(digest=self._digest.hexdigest())
+        buffer.set_modified(False)
+
+        if self.on_done:
+            self.on_done(self)
@@ -0,0 +1,197 @@
+"""
+Span tracing of where Zenpad spends its time: startup phases, session
+restore, file loads and saves, the analysis tools.
+
+    with trace.span("load_session", files=3):
+        ...
+
+    @trace.traced()
+    def on_format_json(self, action, parameter):
+        ...
+
+Spans nest, carry the thread they ran on and any keyword arguments as
+metadata, and are written as Chrome trace-event JSON, which
+chrome://tracing, Perfetto (ui.perfetto.dev) and speedscope open as a
+timeline. Tracing is off unless `zenpad --trace-file FILE` or
+ZENPAD_TRACE=FILE turns it on; then span() costs a function call and a
+check. The file is written when Zenpad exits.
+
+No gi imports here: the launcher enables tracing before zenpad.main is
+imported, so the import of Gtk and the window shows up as well.
+"""
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+ENV_VAR = "ZENPAD_TRACE"
+
+# Events kept; a session traced for days stops recording instead of growing
+MAX_EVENTS = 500000
+
+_tracer = None
+
+
+class _NullSpan:
+    """What span() returns while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def set(self, **args):
+        """Adds metadata known only once the span is running (sizes, results)."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    """
+    Collects trace events in memory. Timestamps are microseconds since
+    the tracer was created, which the launcher does first thing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = {}  # tid -> thread name
+        self.dropped = 0
+
+    def _add(self, event):
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        tid = threading.get_native_id()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        event["pid"] = self.pid
+        event["tid"] = tid
+        # list.append is atomic: worker threads need no lock
+        self.events.append(event)
+
+    def complete(self, name, category, start, end, args):
+        """A span that ran from start to end (perf_counter seconds)."""
+        self._add({"name": name, "cat": category, "ph": "X",
+                   "ts": round((start - self.origin) * 1e6, 3),
+                   "dur": round((end - start) * 1e6, 3),
+                   "args": args})
+
+    def instant(self, name, category="zenpad", **args):
+        """A point in time, e.g. the first painted frame."""
+        self._add({"name": name, "cat": category, "ph": "i", "s": "t",
+                   "ts": round((time.perf_counter() - self.origin) * 1e6, 3),
+                   "args": args})
+
+    def to_json(self):
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "zenpad"}}]
+        for tid, thread_name in list(self.threads.items()):
+            metadata.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                             "args": {"name": thread_name}})
+        return {"traceEvents": metadata + list(self.events),
+                "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped}}
+
+    def write(self, path=None):
+        path = path or self.path
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+        return path
+
+
+def span(name, category="zenpad", **args):
+    """Context manager timing its block as one span; a no-op while tracing is off."""
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name, category, args)
+
+
+def complete(name, start, category="zenpad", **args):
+    """
+    A span from start (a time.perf_counter() value) until now, for work
+    that starts and ends in different callbacks, like a file load.
+    Nothing is recorded for a start of None (the work never started).
+    """
+    if _tracer is not None and start is not None:
+        _tracer.complete(name, category, start, time.perf_counter(), args)
+
+
+def instant(name, category="zenpad", **args):
+    if _tracer is not None:
+        _tracer.instant(name, category, **args)
+
+
+def traced(name=None, category="zenpad"):
+    """Decorator: every call of the function is a span named after it."""
+    def decorate(function):
+        span_name = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with Span(_tracer, span_name, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def enable(path):
+    """Turns tracing on; the trace is written to path by write_trace()."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path)
+    elif path:
+        _tracer.path = path
+    return _tracer
+
+
+def enable_from_environment():
+    path = os.environ.get(ENV_VAR)
+    if path:
+        return enable(path)
+    return None
+
+
+def get_tracer():
+    """Returns the active Tracer, or None when tracing is off."""
+    return _tracer
+
+
+def write_trace():
+    """Writes the trace file, if tracing is on. Returns its path or None."""
+    if _tracer is None or not _tracer.path:
+        return None
+    try:
+        return _tracer.write()
+    except OSError as e:
+        print(f"Error writing trace: {e}")
+        return None
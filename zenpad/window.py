@@ -1,28 +1,37 @@
-from gi.repository import Gtk, Gdk, Gio, GLib, Pango
-import hashlib
+from gi.repository import Gtk, Gdk, GLib
 import os
 import json
-from .editor import EditorTab
+import time
+from .editor import EditorTab, STYLE_KEYS
+from .dirty import is_dirty
+from .loader import FileLoader, LoadProgress
+from .stream import StreamLoader
+from .saver import FileSaver
+from .reload import FileReloader
+from .follow import LogFollower
+from .journal import RecoveryJournal, find_orphans, replay
+from .autosave import AutoSaver
+from .filewatch import get_watcher, check_file
+from .dirty import file_signature
+from .largefile import LargeFileTab
 from zenpad import analysis  # New Analysis Module
-try:
-    from zenpad import markdown_preview
-except (ImportError, ValueError):
-    markdown_preview = None
-from zenpad import diff_viewer # Diff Module
-from zenpad.preferences import PreferencesDialog, Settings
+from zenpad.appearance import get_appearance, lookup_language
+# Markdown preview, diff and preferences are imported on first use
+from zenpad import lazy
+from zenpad import menus
+from zenpad import profiler
+from zenpad import trace
+from zenpad.settings import get_settings
 from gi.repository import GtkSource
-from gi.repository import Pango
 
 class ZenpadWindow(Gtk.ApplicationWindow):
-    def __init__(self, application):
+    @trace.traced("ZenpadWindow.__init__", category="startup")
+    def __init__(self, application, restore_session=False):
+        self.startup_time = time.perf_counter()
         super().__init__(application=application, title="Zenpad")
         self.set_default_size(800, 600)
         self.connect("delete-event", self.save_session)
         
-        # Accelerator Group
-        self.accel_group = Gtk.AccelGroup()
-        self.add_accel_group(self.accel_group)
-        
         # 0. Header Bar (For Window Controls Only - CSD)
         header = Gtk.HeaderBar()
         header.set_show_close_button(True)
@@ -35,11 +44,14 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         self.add(main_box)
 
         # Core Components
-        self.settings = Settings()
+        self.settings = get_settings()
+        # Editor font, on the CSS provider shared by all views
+        get_appearance().set_font(self.settings.get("font"))
         
         # State
         self.search_settings = GtkSource.SearchSettings()
-        self.search_context = None
+        # The tab holding the search context: the one in front (see attach_search)
+        self.search_editor = None
         self.incremental_search = True
         self.highlight_all = True
         
@@ -62,9 +74,10 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         self.doc_viewer_mode = False
         self.doc_line_ending = "Current"
         
-        # 1. Menu Bar
+        self.doc_scheme = self.settings.get("theme") or "tango"
+        self.doc_follow = False
 
-        # 1. Menu Bar
+        # 1. Menu Bar (model and app actions shared by all windows, see zenpad.menus)
         self.menubar = self.create_menubar()
         main_box.pack_start(self.menubar, False, False, 0)
         
@@ -76,6 +89,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         self.notebook = Gtk.Notebook()
         self.notebook.set_scrollable(True)
         self.notebook.connect("switch-page", self.on_tab_switched)
+        self.notebook.connect("page-removed", self.on_page_removed)
         main_box.pack_start(self.notebook, True, True, 0)
         
         self.search_settings = GtkSource.SearchSettings()
@@ -95,612 +109,43 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         self.statusbar.pack_end(self.language_label, False, False, 0)
         main_box.pack_end(self.statusbar, False, True, 0)
         
-        # Shortcuts
-        self.create_actions()
-        
         # Track current signal handler to disconnect later
         self.current_cursor_handler = None
         self.md_window = None
         
         # Load Session or Add initial empty tab
-        self.load_session()
+        # (tabs without content yet are loaded in the background, see materialize_tab)
+        self.restore_queue = []
+        self.restore_source_id = 0
+        try:
+            with trace.span("RecoveryJournal", category="startup"):
+                self.journal = RecoveryJournal()
+        except OSError as e:
+            print(f"Crash recovery disabled: {e}")
+            self.journal = None
+        self.connect("destroy", self.on_window_destroy)
+        self.auto_saver = AutoSaver(self)
+        self.auto_saver.configure(self.settings.get("auto_save"), self.settings.get("auto_save_interval"))
+        # Changes from Preferences (in any window) and from other instances
+        self.settings.subscribe(self.apply_setting)
+        # Only the application's first window reopens the last session
+        if restore_session and self.settings.get("restore_session"):
+            self.load_session()
+        if self.notebook.get_n_pages() == 0:
+            self.add_tab()
         
-        self.show_all()
+        with trace.span("show_all", category="startup"):
+            self.show_all()
+        self.log_first_paint()
+        GLib.idle_add(self.offer_recovery)
 
+    @trace.traced(category="startup")
     def create_menubar(self):
-        menubar = Gtk.MenuBar()
-        
-        # File Menu
-        file_menu = Gtk.Menu()
-        file_item = Gtk.MenuItem(label="File")
-        file_item.set_submenu(file_menu)
-        
-        new_item = Gtk.ImageMenuItem(label="New")
-        new_item.set_image(Gtk.Image.new_from_icon_name("document-new", Gtk.IconSize.MENU))
-        new_item.set_always_show_image(True)
-        new_item.connect("activate", self.on_new_tab)
-        file_menu.append(new_item)
-
-        new_window_item = Gtk.ImageMenuItem(label="New Window")
-        new_window_item.set_image(Gtk.Image.new_from_icon_name("window-new", Gtk.IconSize.MENU))
-        new_window_item.set_always_show_image(True)
-        new_window_item.connect("activate", self.on_new_window)
-        file_menu.append(new_window_item)
-        
-        # Open
-        open_item = Gtk.ImageMenuItem(label="Open...")
-        open_item.set_image(Gtk.Image.new_from_icon_name("document-open", Gtk.IconSize.MENU))
-        open_item.set_always_show_image(True)
-        open_item.connect("activate", self.on_open_file)
-        file_menu.append(open_item)
-        
-        # Recent (Placeholder using Gtk.RecentChooserMenu if needed, but keeping simple for now)
-        recent_item = Gtk.MenuItem(label="Open Recent")
-        recent_menu = Gtk.RecentChooserMenu()
-        recent_menu.connect("item-activated", self.on_open_recent)
-        recent_item.set_submenu(recent_menu)
-        file_menu.append(recent_item)
-        
-        file_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Save
-        save_item = Gtk.ImageMenuItem(label="Save")
-        save_item.set_image(Gtk.Image.new_from_icon_name("document-save", Gtk.IconSize.MENU))
-        save_item.set_always_show_image(True)
-        save_item.connect("activate", self.on_save_file)
-        file_menu.append(save_item)
-        
-        save_as_item = Gtk.ImageMenuItem(label="Save As...")
-        save_as_item.set_image(Gtk.Image.new_from_icon_name("document-save-as", Gtk.IconSize.MENU))
-        save_as_item.set_always_show_image(True)
-        save_as_item.connect("activate", self.on_save_as)
-        file_menu.append(save_as_item)
-
-        save_all_item = Gtk.ImageMenuItem(label="Save All")
-        save_all_item.set_image(Gtk.Image.new_from_icon_name("document-save-all", Gtk.IconSize.MENU))
-        save_all_item.set_always_show_image(True)
-        save_all_item.connect("activate", self.on_save_all)
-        file_menu.append(save_all_item)
-        
-        file_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Reload
-        reload_item = Gtk.ImageMenuItem(label="Reload")
-        reload_item.set_image(Gtk.Image.new_from_icon_name("view-refresh", Gtk.IconSize.MENU))
-        reload_item.set_always_show_image(True)
-        reload_item.connect("activate", self.on_reload)
-        file_menu.append(reload_item)
-        
-        file_menu.append(Gtk.SeparatorMenuItem())
-
-        # Print
-        print_item = Gtk.ImageMenuItem(label="Print...")
-        print_item.set_image(Gtk.Image.new_from_icon_name("document-print", Gtk.IconSize.MENU))
-        print_item.set_always_show_image(True)
-        print_item.connect("activate", self.on_print)
-        file_menu.append(print_item)
-        
-        file_menu.append(Gtk.SeparatorMenuItem())
-
-        # Detach Tab
-        detach_item = Gtk.MenuItem(label="Detach Tab")
-        detach_item.connect("activate", self.on_detach_tab)
-        file_menu.append(detach_item)
-        
-        # Reopen Closed Tab
-        reopen_item = Gtk.MenuItem(label="Reopen Closed Tab")
-        reopen_item.connect("activate", self.on_reopen_tab)
-        reopen_item.add_accelerator("activate", self.accel_group, Gdk.KEY_t, Gdk.ModifierType.SHIFT_MASK | Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        file_menu.append(reopen_item)
-        
-        # Close Tab
-        close_tab_item = Gtk.ImageMenuItem(label="Close Tab")
-        close_tab_item.set_image(Gtk.Image.new_from_icon_name("window-close", Gtk.IconSize.MENU))
-        close_tab_item.set_always_show_image(True)
-        close_tab_item.connect("activate", self.on_close_current_tab)
-        close_tab_item.add_accelerator("activate", self.accel_group, Gdk.KEY_w, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        file_menu.append(close_tab_item)
-        
-        # Close Window
-        close_win_item = Gtk.MenuItem(label="Close Window")
-        close_win_item.connect("activate", lambda w: self.close())
-        file_menu.append(close_win_item)
-        
-        quit_item = Gtk.ImageMenuItem(label="Quit")
-        quit_item.set_image(Gtk.Image.new_from_icon_name("application-exit", Gtk.IconSize.MENU))
-        quit_item.set_always_show_image(True)
-        quit_item.connect("activate", lambda w: self.close()) # Quit app?
-        file_menu.append(quit_item)
-        
-        menubar.append(file_item)
-        
-        # Edit Menu
-        edit_menu = Gtk.Menu()
-        edit_item = Gtk.MenuItem(label="Edit")
-        edit_item.set_submenu(edit_menu)
-
-        # Undo/Redo
-        undo_item = Gtk.ImageMenuItem(label="Undo")
-        undo_item.set_image(Gtk.Image.new_from_icon_name("edit-undo", Gtk.IconSize.MENU))
-        undo_item.set_always_show_image(True)
-        undo_item.connect("activate", self.on_undo)
-        undo_item.add_accelerator("activate", self.accel_group, Gdk.KEY_z, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(undo_item)
-
-        redo_item = Gtk.ImageMenuItem(label="Redo")
-        redo_item.set_image(Gtk.Image.new_from_icon_name("edit-redo", Gtk.IconSize.MENU))
-        redo_item.set_always_show_image(True)
-        redo_item.connect("activate", self.on_redo)
-        redo_item.add_accelerator("activate", self.accel_group, Gdk.KEY_y, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(redo_item)
-
-        edit_menu.append(Gtk.SeparatorMenuItem())
-
-        # Cut/Copy/Paste
-        cut_item = Gtk.ImageMenuItem(label="Cut")
-        cut_item.set_image(Gtk.Image.new_from_icon_name("edit-cut", Gtk.IconSize.MENU))
-        cut_item.set_always_show_image(True)
-        cut_item.connect("activate", self.on_cut)
-        cut_item.add_accelerator("activate", self.accel_group, Gdk.KEY_x, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(cut_item)
-
-        copy_item = Gtk.ImageMenuItem(label="Copy")
-        copy_item.set_image(Gtk.Image.new_from_icon_name("edit-copy", Gtk.IconSize.MENU))
-        copy_item.set_always_show_image(True)
-        copy_item.connect("activate", self.on_copy)
-        copy_item.add_accelerator("activate", self.accel_group, Gdk.KEY_c, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(copy_item)
-        
-        paste_item = Gtk.ImageMenuItem(label="Paste")
-        paste_item.set_image(Gtk.Image.new_from_icon_name("edit-paste", Gtk.IconSize.MENU))
-        paste_item.set_always_show_image(True)
-        paste_item.connect("activate", self.on_paste)
-        paste_item.add_accelerator("activate", self.accel_group, Gdk.KEY_v, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(paste_item)
-
-        # Delete Selection/Line
-        del_item = Gtk.MenuItem(label="Delete Selection")
-        del_item.connect("activate", self.on_delete_selection)
-        del_item.add_accelerator("activate", self.accel_group, Gdk.KEY_Delete, 0, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(del_item)
-
-        del_line_item = Gtk.MenuItem(label="Delete Line")
-        del_line_item.connect("activate", self.on_delete_line)
-        del_line_item.add_accelerator("activate", self.accel_group, Gdk.KEY_k, Gdk.ModifierType.SHIFT_MASK | Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(del_line_item)
-
-        edit_menu.append(Gtk.SeparatorMenuItem())
-
-        # Select All
-        sel_all_item = Gtk.ImageMenuItem(label="Select All")
-        sel_all_item.set_image(Gtk.Image.new_from_icon_name("edit-select-all", Gtk.IconSize.MENU))
-        sel_all_item.set_always_show_image(True)
-        sel_all_item.connect("activate", self.on_select_all)
-        sel_all_item.add_accelerator("activate", self.accel_group, Gdk.KEY_a, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(sel_all_item)
-
-        # Convert
-        convert_item = Gtk.MenuItem(label="Convert")
-        convert_menu = Gtk.Menu()
-        convert_item.set_submenu(convert_menu)
-        
-        to_upper = Gtk.MenuItem(label="To Uppercase")
-        to_upper.connect("activate", lambda w: self.on_change_case("upper"))
-        to_upper.add_accelerator("activate", self.accel_group, Gdk.KEY_u, Gdk.ModifierType.SHIFT_MASK | Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        convert_menu.append(to_upper)
-        
-        to_lower = Gtk.MenuItem(label="To Lowercase")
-        to_lower.connect("activate", lambda w: self.on_change_case("lower"))
-        to_lower.add_accelerator("activate", self.accel_group, Gdk.KEY_l, Gdk.ModifierType.SHIFT_MASK | Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        convert_menu.append(to_lower)
-        
-        to_title = Gtk.MenuItem(label="To Title Case")
-        to_title.connect("activate", lambda w: self.on_change_case("title"))
-        convert_menu.append(to_title)
-
-        edit_menu.append(convert_item)
-
-        # Move
-        move_item = Gtk.MenuItem(label="Move")
-        move_menu = Gtk.Menu()
-        move_item.set_submenu(move_menu)
-
-        move_up = Gtk.MenuItem(label="Line Up")
-        move_up.connect("activate", lambda w: self.on_move_line("up"))
-        move_up.add_accelerator("activate", self.accel_group, Gdk.KEY_Up, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE) 
-        move_menu.append(move_up)
-
-        move_down = Gtk.MenuItem(label="Line Down")
-        move_down.connect("activate", lambda w: self.on_move_line("down"))
-        move_down.add_accelerator("activate", self.accel_group, Gdk.KEY_Down, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE) 
-        move_menu.append(move_down)
-        
-        edit_menu.append(move_item)
-
-        # Duplicate
-        dup_item = Gtk.MenuItem(label="Duplicate Line / Selection")
-        dup_item.connect("activate", self.on_duplicate)
-        dup_item.add_accelerator("activate", self.accel_group, Gdk.KEY_d, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(dup_item)
-
-        # Indent
-        indent_inc = Gtk.MenuItem(label="Increase Indent")
-        indent_inc.connect("activate", lambda w: self.on_indent(True))
-        indent_inc.add_accelerator("activate", self.accel_group, Gdk.KEY_i, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(indent_inc)
-
-        indent_dec = Gtk.MenuItem(label="Decrease Indent")
-        indent_dec.connect("activate", lambda w: self.on_indent(False))
-        indent_dec.add_accelerator("activate", self.accel_group, Gdk.KEY_u, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(indent_dec)
-        
-        edit_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Sort Lines
-        sort_item = Gtk.MenuItem(label="Sort Lines")
-        sort_item.connect("activate", self.on_sort_lines)
-        edit_menu.append(sort_item)
-        
-        # Join Lines
-        join_item = Gtk.MenuItem(label="Join Lines")
-        join_item.connect("activate", self.on_join_lines)
-        join_item.add_accelerator("activate", self.accel_group, Gdk.KEY_j, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(join_item)
-        
-        # Toggle Comment
-        comment_item = Gtk.MenuItem(label="Toggle Comment")
-        comment_item.connect("activate", self.on_toggle_comment)
-        comment_item.add_accelerator("activate", self.accel_group, Gdk.KEY_slash, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(comment_item)
-        
-        # Trim Trailing Whitespace
-        trim_item = Gtk.MenuItem(label="Trim Trailing Whitespace")
-        trim_item.connect("activate", self.on_trim_whitespace)
-        edit_menu.append(trim_item)
-        
-        edit_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Insert Date/Time
-        date_item = Gtk.MenuItem(label="Insert Date/Time")
-        date_item.connect("activate", self.on_insert_date)
-        date_item.add_accelerator("activate", self.accel_group, Gdk.KEY_F5, 0, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(date_item)
-
-        edit_menu.append(Gtk.SeparatorMenuItem())
-        
-        pref_item = Gtk.ImageMenuItem(label="Preferences...")
-        pref_item.set_image(Gtk.Image.new_from_icon_name("preferences-system", Gtk.IconSize.MENU))
-        pref_item.set_always_show_image(True)
-        pref_item = Gtk.ImageMenuItem(label="Preferences...")
-        pref_item.set_image(Gtk.Image.new_from_icon_name("preferences-system", Gtk.IconSize.MENU))
-        pref_item.set_always_show_image(True)
-        pref_item.connect("activate", self.on_preferences_clicked)
-        pref_item.add_accelerator("activate", self.accel_group, Gdk.KEY_comma, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        edit_menu.append(pref_item)
-        
-        menubar.append(edit_item)
-        
-        # Search Menu
-        search_menu = Gtk.Menu()
-        search_item = Gtk.MenuItem(label="Search")
-        search_item.set_submenu(search_menu)
-        
-        # Find
-        find_item = Gtk.ImageMenuItem(label="Find")
-        find_item.set_image(Gtk.Image.new_from_icon_name("edit-find", Gtk.IconSize.MENU))
-        find_item.set_always_show_image(True)
-        find_item.connect("activate", lambda w: self.on_find_clicked("find"))
-        find_item.add_accelerator("activate", self.accel_group, Gdk.KEY_f, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        search_menu.append(find_item)
-
-        # Find Next
-        find_next_item = Gtk.MenuItem(label="Find Next")
-        find_next_item.connect("activate", self.on_search_next)
-        find_next_item.add_accelerator("activate", self.accel_group, Gdk.KEY_g, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        search_menu.append(find_next_item)
-
-        # Find Previous
-        find_prev_item = Gtk.MenuItem(label="Find Previous")
-        find_prev_item.connect("activate", self.on_search_prev)
-        find_prev_item.add_accelerator("activate", self.accel_group, Gdk.KEY_g, Gdk.ModifierType.SHIFT_MASK | Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        search_menu.append(find_prev_item)
-
-        # Find and Replace
-        replace_item = Gtk.ImageMenuItem(label="Find and Replace...")
-        replace_item.set_image(Gtk.Image.new_from_icon_name("edit-find-replace", Gtk.IconSize.MENU))
-        replace_item.set_always_show_image(True)
-        replace_item.connect("activate", lambda w: self.on_find_clicked("replace"))
-        replace_item.add_accelerator("activate", self.accel_group, Gdk.KEY_r, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        search_menu.append(replace_item)
-        
-        search_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Incremental Search
-        self.inc_search_item = Gtk.CheckMenuItem(label="Incremental Search")
-        self.inc_search_item.set_active(self.incremental_search)
-        self.inc_search_item.connect("toggled", self.on_toggle_incremental)
-        search_menu.append(self.inc_search_item)
-        
-        # Highlight All
-        self.highlight_item = Gtk.CheckMenuItem(label="Highlight All")
-        self.highlight_item.set_active(self.highlight_all)
-        self.highlight_item.connect("toggled", self.on_toggle_highlight)
-        search_menu.append(self.highlight_item)
-        
-        search_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Go to
-        goto_item = Gtk.MenuItem(label="Go to...")
-        goto_item.connect("activate", self.on_goto_line)
-        goto_item.add_accelerator("activate", self.accel_group, Gdk.KEY_l, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        search_menu.append(goto_item)
-        
-        menubar.append(search_item)
-        
-        # View Menu
-        view_menu = Gtk.Menu()
-        view_item = Gtk.MenuItem(label="View")
-        view_item.set_submenu(view_menu)
-        
-        # Select Font
-        font_item = Gtk.ImageMenuItem(label="Select Font...")
-        font_item.set_image(Gtk.Image.new_from_icon_name("preferences-desktop-font", Gtk.IconSize.MENU))
-        font_item.set_always_show_image(True)
-        font_item.connect("activate", self.on_select_font)
-        view_menu.append(font_item)
-        
-        # Color Scheme Submenu
-        scheme_item = Gtk.MenuItem(label="Color Scheme")
-        scheme_menu = Gtk.Menu()
-        scheme_item.set_submenu(scheme_menu)
-        
-        # Populate schemes
-        manager = GtkSource.StyleSchemeManager.get_default()
-        schemes = manager.get_scheme_ids()
-        # Sort for niceness, maybe prioritize Tango/Classic?
-        # Just listing them
-        group = None
-        for scheme_id in sorted(schemes):
-            if group is None:
-                item = Gtk.RadioMenuItem(label=scheme_id)
-                group = item
-            else:
-                item = Gtk.RadioMenuItem(label=scheme_id, group=group)
-            
-            if scheme_id == "tango":
-                 item.set_active(True)
-            
-            item.connect("activate", self.on_change_scheme, scheme_id)
-            scheme_menu.append(item)
-            
-        view_menu.append(scheme_item)
-        
-        view_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Line Numbers
-        line_num_item = Gtk.CheckMenuItem(label="Line Numbers")
-        line_num_item.set_active(self.show_line_numbers)
-        line_num_item.connect("toggled", self.on_toggle_line_numbers)
-        view_menu.append(line_num_item)
-        
-        # Menubar
-        self.menubar_chk = Gtk.CheckMenuItem(label="Menubar")
-        self.menubar_chk.set_action_name("win.toggle_menubar")
-        view_menu.append(self.menubar_chk)
-        
-        # Toolbar
-        self.toolbar_chk = Gtk.CheckMenuItem(label="Toolbar")
-        self.toolbar_chk.set_action_name("win.toggle_toolbar")
-        view_menu.append(self.toolbar_chk)
-        
-        # Statusbar
-        self.statusbar_chk = Gtk.CheckMenuItem(label="Statusbar")
-        self.statusbar_chk.set_action_name("win.toggle_statusbar")
-        view_menu.append(self.statusbar_chk)
-        
-        view_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Fullscreen
-        fs_item = Gtk.CheckMenuItem(label="Fullscreen")
-        fs_item.set_action_name("win.toggle_fullscreen")
-        view_menu.append(fs_item)
-        
-        view_menu.append(Gtk.SeparatorMenuItem())
-
-        zoom_in_item = Gtk.ImageMenuItem(label="Zoom In")
-        zoom_in_item.set_image(Gtk.Image.new_from_icon_name("zoom-in", Gtk.IconSize.MENU))
-        zoom_in_item.set_always_show_image(True)
-        zoom_in_item.connect("activate", self.on_zoom_in)
-        zoom_in_item.add_accelerator("activate", self.accel_group, Gdk.KEY_plus, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        view_menu.append(zoom_in_item)
-
-        zoom_out_item = Gtk.ImageMenuItem(label="Zoom Out")
-        zoom_out_item.set_image(Gtk.Image.new_from_icon_name("zoom-out", Gtk.IconSize.MENU))
-        zoom_out_item.set_always_show_image(True)
-        zoom_out_item.connect("activate", self.on_zoom_out)
-        zoom_out_item.add_accelerator("activate", self.accel_group, Gdk.KEY_minus, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        view_menu.append(zoom_out_item)
-        
-        zoom_reset_item = Gtk.ImageMenuItem(label="Reset Zoom")
-        zoom_reset_item.set_image(Gtk.Image.new_from_icon_name("zoom-original", Gtk.IconSize.MENU))
-        zoom_reset_item.set_always_show_image(True)
-        zoom_reset_item.connect("activate", self.on_zoom_reset)
-        zoom_reset_item.add_accelerator("activate", self.accel_group, Gdk.KEY_0, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        view_menu.append(zoom_reset_item)
-        
-        menubar.append(view_item)
-
-        # Document Menu
-        doc_menu = Gtk.Menu()
-        doc_item = Gtk.MenuItem(label="Document")
-        doc_item.set_submenu(doc_menu)
-        
-        # Word Wrap
-        self.wrap_chk = Gtk.CheckMenuItem(label="Word Wrap")
-        self.wrap_chk.set_active(self.doc_word_wrap)
-        self.wrap_chk.connect("toggled", self.on_toggle_word_wrap)
-        doc_menu.append(self.wrap_chk)
-        
-        # Auto Indent
-        self.indent_chk = Gtk.CheckMenuItem(label="Auto Indent")
-        self.indent_chk.set_active(self.doc_auto_indent)
-        self.indent_chk.connect("toggled", self.on_toggle_auto_indent)
-        doc_menu.append(self.indent_chk)
-        
-        # Tab Size Submenu
-        tab_size_item = Gtk.MenuItem(label="Tab Size")
-        tab_size_menu = Gtk.Menu()
-        tab_size_item.set_submenu(tab_size_menu)
-        
-        for size in [2, 4, 8]:
-             item = Gtk.RadioMenuItem(label=str(size))
-             if size == self.doc_tab_size:
-                 item.set_active(True)
-             item.connect("activate", self.on_change_tab_size, size)
-             tab_size_menu.append(item)
-        doc_menu.append(tab_size_item)
-        
-        # Filetype Submenu (Simplified)
-        filetype_item = Gtk.MenuItem(label="Filetype")
-        filetype_menu = Gtk.Menu()
-        filetype_item.set_submenu(filetype_menu)
-        
-        # Common languages
-        common_langs = ["Plain Text", "Python", "C", "C++", "Java", "JavaScript", "HTML", "CSS", "Markdown"]
-        for lang in common_langs:
-             item = Gtk.MenuItem(label=lang)
-             item.connect("activate", self.on_change_filetype, lang)
-             filetype_menu.append(item)
-        doc_menu.append(filetype_item)
-
-        # Line Ending Submenu
-        le_item = Gtk.MenuItem(label="Line Ending")
-        le_menu = Gtk.Menu()
-        le_item.set_submenu(le_menu)
-        
-        for le, label in [("\n", "Unix (LF)"), ("\r\n", "Windows (CRLF)"), ("\r", "Mac (CR)")]:
-             item = Gtk.MenuItem(label=label)
-             item.connect("activate", self.on_change_line_ending, le)
-             le_menu.append(item)
-        doc_menu.append(le_item)
-        
-        # Unicode BOM
-        self.bom_chk = Gtk.CheckMenuItem(label="Write Unicode BOM")
-        self.bom_chk.set_active(self.doc_write_bom)
-        self.bom_chk.connect("toggled", self.on_toggle_bom)
-        doc_menu.append(self.bom_chk)
-        
-        # Viewer Mode
-        self.viewmode_chk = Gtk.CheckMenuItem(label="Viewer Mode")
-        self.viewmode_chk.set_active(self.doc_viewer_mode)
-        self.viewmode_chk.connect("toggled", self.on_toggle_viewer_mode)
-        doc_menu.append(self.viewmode_chk)
-        
-        doc_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Navigation
-        prev_tab = Gtk.MenuItem(label="Previous Tab")
-        prev_tab.connect("activate", self.on_prev_tab)
-        prev_tab.add_accelerator("activate", self.accel_group, Gdk.KEY_Page_Up, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        doc_menu.append(prev_tab)
-
-        next_tab = Gtk.MenuItem(label="Next Tab")
-        next_tab.connect("activate", self.on_next_tab)
-        next_tab.add_accelerator("activate", self.accel_group, Gdk.KEY_Page_Down, Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        doc_menu.append(next_tab)
-        
-        doc_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Dynamic Tab List (Placeholder / Simple)
-        # We'll rely on on_tab_switched to update this if we wanted full dynamic
-        
-        menubar.append(doc_item)
-        
-        # Tools Menu
-        tools_menu = Gtk.Menu()
-        tools_item = Gtk.MenuItem(label="Tools")
-        tools_item.set_submenu(tools_menu)
-        
-        # Formatters
-        fmt_json = Gtk.MenuItem(label="Format JSON")
-        fmt_json.set_action_name("win.format_json")
-        tools_menu.append(fmt_json)
-        
-        fmt_xml = Gtk.MenuItem(label="Format XML")
-        fmt_xml.set_action_name("win.format_xml")
-        tools_menu.append(fmt_xml)
-
-        convert_item = Gtk.MenuItem(label="Convert Log to JSON")
-        convert_item.set_action_name("win.convert_json")
-        tools_menu.append(convert_item)
-        
-        tools_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Hex View
-        hex_item = Gtk.MenuItem(label="Hex View")
-        hex_item.set_action_name("win.hex_view")
-        tools_menu.append(hex_item)
-
-        hash_item = Gtk.MenuItem(label="Calculate Hash")
-        hash_item.set_action_name("win.calculate_hash")
-        hash_item.add_accelerator("activate", self.accel_group, Gdk.KEY_H, Gdk.ModifierType.CONTROL_MASK | Gdk.ModifierType.SHIFT_MASK, Gtk.AccelFlags.VISIBLE)
-        tools_menu.append(hash_item)
-        
-        tools_menu.append(Gtk.SeparatorMenuItem())
-        
-        # Encodings Submenu
-        enc_menu = Gtk.Menu()
-        enc_item = Gtk.MenuItem(label="Encryption / Encoding")
-        enc_item.set_submenu(enc_menu)
-        
-        b64_enc = Gtk.MenuItem(label="Base64 Encode")
-        b64_enc.set_action_name("win.base64_enc")
-        enc_menu.append(b64_enc)
-        
-        b64_dec = Gtk.MenuItem(label="Base64 Decode")
-        b64_dec.set_action_name("win.base64_dec")
-        enc_menu.append(b64_dec)
-        
-        enc_menu.append(Gtk.SeparatorMenuItem())
-        
-        url_enc = Gtk.MenuItem(label="URL Encode")
-        url_enc.set_action_name("win.url_enc")
-        enc_menu.append(url_enc)
-        
-        url_dec = Gtk.MenuItem(label="URL Decode")
-        url_dec.set_action_name("win.url_dec")
-        enc_menu.append(url_dec)
-        
-        tools_menu.append(enc_item)
-
-        tools_menu.append(Gtk.SeparatorMenuItem())
-
-        md_item = Gtk.MenuItem(label="Markdown Preview")
-        md_item.set_action_name("win.markdown_preview")
-        tools_menu.append(md_item)
-        
-        cmp_item = Gtk.MenuItem(label="Compare with Tab...")
-        cmp_item.set_action_name("win.compare_tabs")
-        tools_menu.append(cmp_item)
-        
-        menubar.append(tools_item)
-        
-        # Help Menu (moved to end)
-        help_menu = Gtk.Menu()
-
-        help_item = Gtk.MenuItem(label="Help")
-        help_item.set_submenu(help_menu)
-        
-        about_item = Gtk.ImageMenuItem(label="About")
-        about_item.set_image(Gtk.Image.new_from_icon_name("help-about", Gtk.IconSize.MENU))
-        about_item.set_always_show_image(True)
-        about_item.connect("activate", self.on_about)
-        help_menu.append(about_item)
-        
-        menubar.append(help_item)
-        
-        return menubar
+        registry = menus.get_registry(self.get_application())
+        menus.add_window_actions(self)
+        return Gtk.MenuBar.new_from_model(registry.model)
 
+    @trace.traced(category="startup")
     def create_toolbar(self):
         toolbar = Gtk.Toolbar()
         toolbar.set_style(Gtk.ToolbarStyle.ICONS)
@@ -774,6 +219,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         
         return toolbar
 
+    @trace.traced(category="startup")
     def create_search_bar(self):
         self.search_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         self.search_box.set_spacing(0)
@@ -858,21 +304,48 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         
         self.search_bar_revealer.add(self.search_box)
     
-    def on_toggle_incremental(self, widget):
-        self.incremental_search = widget.get_active()
+    def on_toggle_incremental(self, active):
+        self.incremental_search = active
         # If turned ON, maybe trigger search now?
         if self.incremental_search:
             text = self.search_entry.get_text()
             if text:
                 self.search_settings.set_search_text(text)
-
-    def on_toggle_highlight(self, widget):
-        self.highlight_all = widget.get_active()
-        n_pages = self.notebook.get_n_pages()
-        for i in range(n_pages):
-            editor = self.notebook.get_nth_page(i)
-            if editor.search_context:
-                editor.search_context.set_highlight(self.highlight_all)
+                self.attach_search()
+
+    def on_toggle_highlight(self, active):
+        self.highlight_all = active
+        # Background tabs have no search context to highlight with
+        if self.search_editor and self.search_editor.search_context:
+            self.search_editor.search_context.set_highlight(self.highlight_all)
+
+    def attach_search(self, editor=None):
+        """
+        Gives the tab in front (or editor) the search context and takes it
+        from the tab that had it. All tabs share self.search_settings, and
+        every attached context rescans its whole buffer on each change of
+        the search text, so only one tab has one: typing in the search entry
+        costs the same with one tab or a hundred. Nothing is created while
+        there is nothing to search for. Returns the context or None.
+        """
+        if editor is None:
+            page_num = self.notebook.get_current_page()
+            if page_num == -1:
+                return None
+            editor = self.notebook.get_nth_page(page_num)
+        if self.search_editor is not editor:
+            if self.search_editor is not None:
+                self.search_editor.detach_search()
+            self.search_editor = None
+        if editor.search_context is None:
+            if not self.search_settings.get_search_text():
+                return None
+            context = editor.attach_search(self.highlight_all)
+            if context is None:
+                return None
+            context.connect("notify::occurrences-count", lambda w, p: self.update_match_count(editor))
+        self.search_editor = editor
+        return editor.search_context
 
     def on_goto_line(self, widget, param=None):
         page_num = self.notebook.get_current_page()
@@ -917,6 +390,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         text = entry.get_text()
         if self.incremental_search:
             self.search_settings.set_search_text(text)
+            self.attach_search()
         else:
              # If incremental is off, we clear the search settings logic?
              # No, simply don't update it yet. The user sees "text" in entry but "highlight" matches old text?
@@ -940,8 +414,13 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
         editor = self.notebook.get_nth_page(page_num)
+
+        if isinstance(editor, LargeFileTab):
+            # Search the whole file, not just the loaded window
+            editor.find(self.search_settings.get_search_text(), True, self.search_settings.get_case_sensitive())
+            return
         
-        if editor.search_context:
+        if self.attach_search(editor):
             buff = editor.buffer
             insert = buff.get_insert()
             iter_start = buff.get_iter_at_mark(insert)
@@ -989,8 +468,13 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
         editor = self.notebook.get_nth_page(page_num)
+
+        if isinstance(editor, LargeFileTab):
+            # Search the whole file, not just the loaded window
+            editor.find(self.search_settings.get_search_text(), False, self.search_settings.get_case_sensitive())
+            return
         
-        if editor.search_context:
+        if self.attach_search(editor):
             buff = editor.buffer
             insert = buff.get_insert()
             iter_start = buff.get_iter_at_mark(insert)
@@ -1090,102 +574,171 @@ class ZenpadWindow(Gtk.ApplicationWindow):
              
         response = dialog.run()
         if response == Gtk.ResponseType.OK:
-            font_desc = dialog.get_font_desc()
-            n_pages = self.notebook.get_n_pages()
-            for i in range(n_pages):
-                editor = self.notebook.get_nth_page(i)
-                editor.font_desc = font_desc
-                editor.view.modify_font(font_desc)
+            # The editor font is one setting for all views; applied through apply_setting
+            self.settings.set("font", dialog.get_font_desc().to_string())
         dialog.destroy()
 
-    def on_change_scheme(self, widget, scheme_id):
-        if widget.get_active():
-            n_pages = self.notebook.get_n_pages()
-            for i in range(n_pages):
-                editor = self.notebook.get_nth_page(i)
-                editor.set_scheme(scheme_id)
+    def on_change_scheme(self, scheme_id):
+        self.doc_scheme = scheme_id
+        self.restyle_tabs("theme", scheme_id)
 
-    def on_toggle_line_numbers(self, widget):
-        self.show_line_numbers = widget.get_active()
-        n_pages = self.notebook.get_n_pages()
-        for i in range(n_pages):
-            editor = self.notebook.get_nth_page(i)
-            editor.view.set_show_line_numbers(self.show_line_numbers)
+    def on_toggle_line_numbers(self, active):
+        self.show_line_numbers = active
+        self.restyle_tabs("show_line_numbers", active)
 
-    def on_toggle_menubar_state(self, action, value):
-        action.set_state(value)
-        self.show_menubar = value.get_boolean()
+    def on_toggle_menubar_state(self, active):
+        self.show_menubar = active
         self.menubar.set_visible(self.show_menubar)
 
-    def on_toggle_toolbar_state(self, action, value):
-        action.set_state(value)
-        self.show_toolbar = value.get_boolean()
+    def on_toggle_toolbar_state(self, active):
+        self.show_toolbar = active
         self.toolbar.set_visible(self.show_toolbar)
 
-    def on_toggle_statusbar_state(self, action, value):
-        action.set_state(value)
-        self.show_statusbar = value.get_boolean()
+    def on_toggle_statusbar_state(self, active):
+        self.show_statusbar = active
         self.statusbar.set_visible(self.show_statusbar)
 
-    def on_toggle_fullscreen_state(self, action, value):
-        action.set_state(value)
-        self.is_fullscreen = value.get_boolean()
+    def on_toggle_fullscreen_state(self, active):
+        self.is_fullscreen = active
         if self.is_fullscreen:
             self.fullscreen()
         else:
             self.unfullscreen()
 
-    def on_toggle_word_wrap(self, widget):
-        self.doc_word_wrap = widget.get_active()
-        n_pages = self.notebook.get_n_pages()
-        for i in range(n_pages):
-            editor = self.notebook.get_nth_page(i)
-            editor.view.set_wrap_mode(Gtk.WrapMode.WORD if self.doc_word_wrap else Gtk.WrapMode.NONE)
-
-    def on_toggle_auto_indent(self, widget):
-        self.doc_auto_indent = widget.get_active()
-        n_pages = self.notebook.get_n_pages()
-        for i in range(n_pages):
+    def on_toggle_word_wrap(self, active):
+        self.doc_word_wrap = active
+        self.restyle_tabs("word_wrap", active)
+
+    def on_toggle_auto_indent(self, active):
+        self.doc_auto_indent = active
+        self.restyle_tabs("auto_indent", active)
+
+    def on_change_tab_size(self, size):
+        self.doc_tab_size = size
+        self.restyle_tabs("tab_width", size)
+
+    def restyle_tabs(self, key, value):
+        """
+        Applies an appearance setting to the tab in front now and to the
+        others when they are next shown (on_tab_switched), so a change with
+        hundreds of tabs open does not restyle and re-layout hidden views.
+        """
+        if key not in STYLE_KEYS:
+            return
+        current = self.notebook.get_current_page()
+        for i in range(self.notebook.get_n_pages()):
             editor = self.notebook.get_nth_page(i)
-            editor.view.set_auto_indent(self.doc_auto_indent)
-
-    def on_change_tab_size(self, widget, size):
-        if widget.get_active():
-            self.doc_tab_size = size
-            n_pages = self.notebook.get_n_pages()
-            for i in range(n_pages):
-                editor = self.notebook.get_nth_page(i)
-                editor.view.set_tab_width(size)
+            if i == current:
+                editor.pending_style.pop(key, None)
+                editor.apply_style(key, value)
+            else:
+                editor.pending_style[key] = value
 
-    def on_change_filetype(self, widget, lang_name):
-        # Simple mapping or lookup
-        manager = GtkSource.LanguageManager.get_default()
-        lang_id = lang_name.lower().replace(" ", "-").replace("++", "pp")
-        if lang_name == "Plain Text": lang_id = None
-        
-        # Try to find it
-        language = manager.get_language(lang_id) if lang_id else None
+    def on_change_filetype(self, lang_id):
+        # "" is Plain Text
+        language = lookup_language(lang_id)
         
         page_num = self.notebook.get_current_page()
         if page_num != -1:
             editor = self.notebook.get_nth_page(page_num)
-            editor.buffer.set_language(language)
+            editor.set_language(language)
 
-    def on_change_line_ending(self, widget, le):
+    def on_change_line_ending(self, le):
         self.doc_line_ending = le
-        # In reality, this would require converting buffer text
-        pass
+        # The buffer always uses LF; the ending is applied when saving
+        page_num = self.notebook.get_current_page()
+        if page_num != -1:
+            editor = self.notebook.get_nth_page(page_num)
+            editor.newline = le
+            self.update_statusbar(editor)
 
-    def on_toggle_bom(self, widget):
-        self.doc_write_bom = widget.get_active()
+    def on_toggle_bom(self, active):
+        self.doc_write_bom = active
+        page_num = self.notebook.get_current_page()
+        if page_num != -1:
+            self.notebook.get_nth_page(page_num).bom = self.doc_write_bom
+
+    def update_document_state(self, editor):
+        """Shows the tab's line ending and BOM in the Document menu."""
+        self.doc_line_ending = editor.newline
+        self.doc_write_bom = editor.bom
+        self.doc_follow = bool(editor.follower)
+        # set_state() does not run the handlers
+        self.lookup_action("write_bom").set_state(GLib.Variant.new_boolean(editor.bom))
+        follow = self.lookup_action("follow")
+        follow.set_state(GLib.Variant.new_boolean(self.doc_follow))
+        follow.set_enabled(bool(editor.file_path) and not editor.read_only)
+        self.update_statusbar(editor)
 
-    def on_toggle_viewer_mode(self, widget):
-        self.doc_viewer_mode = widget.get_active()
+    def on_toggle_viewer_mode(self, active):
+        self.doc_viewer_mode = active
         n_pages = self.notebook.get_n_pages()
         for i in range(n_pages):
-            editor = self.notebook.get_nth_page(i)
-            # Read only = not editable
-            editor.view.set_editable(not self.doc_viewer_mode)
+            self.update_editable(self.notebook.get_nth_page(i))
+
+    def update_editable(self, editor):
+        """Editable unless viewer mode, large file mode, Follow or a load in progress rule it out."""
+        editor.view.set_editable(not (self.doc_viewer_mode or editor.read_only or editor.follower
+                                      or editor.loader or editor.partial))
+
+    def on_toggle_follow(self, active):
+        page_num = self.notebook.get_current_page()
+        if page_num == -1:
+            self.lookup_action("follow").set_state(GLib.Variant.new_boolean(False))
+            return
+        editor = self.notebook.get_nth_page(page_num)
+        if active:
+            self.start_follow(editor)
+        else:
+            self.stop_follow(editor)
+        self.update_document_state(editor)
+
+    def start_follow(self, editor):
+        """Turns the tab into a live view of the end of its file (see LogFollower)."""
+        if editor.follower or not editor.file_path or editor.read_only:
+            return
+        if editor.loader or editor.pending:
+            self.show_error("The file is still loading.")
+            return
+        if is_dirty(editor):
+            self.show_error("Save or reload the file before following it.")
+            return
+
+        def on_update(follower):
+            if follower.error:
+                print(f"Following {follower.path}: {follower.error}")
+
+        # Our own watch would offer to reload on every append
+        self.unwatch_tab(editor)
+        editor.view.set_editable(False)
+        editor.follower = LogFollower(editor, editor.file_path, self.settings.get("follow_max_lines"), on_update)
+        editor.follower.start()
+        self.update_tab_label(editor)
+
+    def stop_follow(self, editor):
+        follower = editor.follower
+        if not follower:
+            return
+        follower.stop()
+        editor.follower = None
+        # The buffer holds at most follow_max_lines of the log, decoded leniently:
+        # it stays read-only until the whole file is in (see load_file)
+        editor.partial = True
+        editor.disk_signature = follower.signature
+        editor.disk_hash = None
+        editor.disk_md5 = editor.text_md5 = None
+        self.update_editable(editor)
+
+        def on_loaded(loader):
+            if loader.error:
+                print(f"Error loading {editor.file_path} after Follow: {loader.error}")
+            elif not loader.cancelled:
+                # Back where the log was being followed
+                buffer = editor.buffer
+                buffer.place_cursor(buffer.get_end_iter())
+                editor.view.scroll_to_mark(buffer.get_insert(), 0.0, False, 0.0, 1.0)
+
+        self.load_file(editor, editor.file_path, on_done=on_loaded)
 
     def on_prev_tab(self, widget):
         curr = self.notebook.get_current_page()
@@ -1328,7 +881,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         if page_num == -1: return
         editor = self.notebook.get_nth_page(page_num)
         
-        if editor.search_context:
+        if self.attach_search(editor):
             buff = editor.buffer
             # Check if selection matches search
             bounds = buff.get_selection_bounds()
@@ -1348,7 +901,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
         editor = self.notebook.get_nth_page(page_num)
-        if editor.search_context:
+        if self.attach_search(editor):
             editor.search_context.replace_all(self.replace_entry.get_text(), -1)
 
     def on_find_clicked(self, mode="find"):
@@ -1368,142 +921,21 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         else:
             self.replace_revealer.set_reveal_child(False)
 
-    def create_actions(self):
-        # Action Map
-        action_group = Gio.SimpleActionGroup()
-        self.insert_action_group("win", action_group)
-
-        # Actions
-        actions = [
-            ("new_tab", self.on_new_tab),
-            ("new_window", self.on_new_window),
-            ("open", self.on_open_file),
-            ("save", self.on_save_file),
-            ("save_as", self.on_save_as),
-            ("save_all", self.on_save_all),
-            ("reload", self.on_reload),
-            ("print", self.on_print),
-            ("detach_tab", self.on_detach_tab),
-            ("find", lambda *args: self.on_find_clicked("find")),
-            ("replace", lambda *args: self.on_find_clicked("replace")),
-            ("find_next", self.on_search_next),
-            ("find_prev", self.on_search_prev),
-            ("find_prev", self.on_search_prev),
-            ("indent", lambda *args: self.on_indent(True)),
-            ("unindent", lambda *args: self.on_indent(False)),
-            ("undo", lambda *args: self.on_undo(None)),
-            ("redo", lambda *args: self.on_redo(None)),
-            ("zoom_in", self.on_zoom_in),
-            ("zoom_out", self.on_zoom_out),
-            ("close_tab", self.on_close_current_tab),
-            ("close_window", lambda *args: self.close()),
-            ("quit", lambda *args: self.get_application().quit())
-        ]
-
-        # Helper Actions for shortcuts
-        actions.extend([
-            ("zoom_reset", self.on_zoom_reset),
-            ("toc_upper", lambda *args: self.on_change_case("upper")),
-            ("toc_lower", lambda *args: self.on_change_case("lower")),
-            ("duplicate", self.on_duplicate),
-            ("delete_line", self.on_delete_line),
-            ("move_up", lambda *args: self.on_move_line("up")),
-            ("move_down", lambda *args: self.on_move_line("down")),
-            ("preferences", lambda *args: self.on_preferences_clicked(None)),
-            # Analysis Actions
-            ("format_json", self.on_format_json),
-            ("format_xml", self.on_format_xml),
-            ("convert_json", self.on_convert_json),
-            ("hex_view", self.on_hex_view),
-            ("calculate_hash", self.on_calculate_hash),
-            # Encodings
-            ("base64_enc", lambda *args: self.on_transform_text("base64_enc")),
-            ("base64_dec", lambda *args: self.on_transform_text("base64_dec")),
-            ("url_enc", lambda *args: self.on_transform_text("url_enc")),
-            ("url_dec", lambda *args: self.on_transform_text("url_dec")),
-            ("markdown_preview", self.on_markdown_preview),
-            ("compare_tabs", self.on_compare_tabs)
-        ])
-
-        for name, callback in actions:
-            action = Gio.SimpleAction.new(name, None)
-            action.connect("activate", callback)
-            action_group.add_action(action)
-        
-        # Stateful Actions (View Toggles)
-        toggles = [
-            ("toggle_menubar", self.show_menubar, self.on_toggle_menubar_state),
-            ("toggle_toolbar", self.show_toolbar, self.on_toggle_toolbar_state),
-            ("toggle_statusbar", self.show_statusbar, self.on_toggle_statusbar_state),
-            ("toggle_fullscreen", self.is_fullscreen, self.on_toggle_fullscreen_state)
-        ]
-        
-        for name, state, callback in toggles:
-            action = Gio.SimpleAction.new_stateful(name, None, GLib.Variant.new_boolean(state))
-            action.connect("change-state", callback)
-            action_group.add_action(action)
-
-        self.insert_action_group("win", action_group)
-        
-        # Accelerators
-        app = self.get_application()
-        app.set_accels_for_action("win.new_tab", ["<Primary>n"])
-        app.set_accels_for_action("win.new_window", ["<Primary><Shift>n"])
-        app.set_accels_for_action("win.open", ["<Primary>o"])
-        app.set_accels_for_action("win.save", ["<Primary>s"])
-        app.set_accels_for_action("win.save_as", ["<Primary><Shift>s"])
-        app.set_accels_for_action("win.reload", ["F5"])
-        app.set_accels_for_action("win.print", ["<Primary>p"])
-        app.set_accels_for_action("win.detach_tab", ["<Primary>d"])
-        app.set_accels_for_action("win.reopen_tab", ["<Primary><Shift>t"])
-        app.set_accels_for_action("win.find", ["<Primary>f"])
-        app.set_accels_for_action("win.replace", ["<Primary>h"])
-        app.set_accels_for_action("win.find_replace", ["<Primary>r"])
-        app.set_accels_for_action("win.find_next", ["<Primary>g", "F3"])
-        app.set_accels_for_action("win.find_prev", ["<Primary><Shift>g", "<Shift>F3"])
-        app.set_accels_for_action("win.goto_line", ["<Primary>l"])
-        app.set_accels_for_action("win.indent", ["<Primary>i"])
-        app.set_accels_for_action("win.unindent", ["<Primary>u"])
-        app.set_accels_for_action("win.undo", ["<Primary>z"])
-        app.set_accels_for_action("win.redo", ["<Primary>y", "<Primary><Shift>z"])
-        app.set_accels_for_action("win.zoom_in", ["<Primary>plus", "<Primary>equal"])
-        app.set_accels_for_action("win.zoom_out", ["<Primary>minus"])
-        app.set_accels_for_action("win.zoom_reset", ["<Primary>0"])
-        app.set_accels_for_action("win.toggle_menubar", ["<Primary>m"])
-        app.set_accels_for_action("win.toggle_fullscreen", ["F11"])
-        app.set_accels_for_action("win.close_tab", ["<Primary>w"])
-        app.set_accels_for_action("win.close_window", ["<Primary><Shift>w"])
-        app.set_accels_for_action("win.quit", ["<Primary>q"])
-        app.set_accels_for_action("win.toc_upper", ["<Primary><Shift>u"])
-        app.set_accels_for_action("win.toc_lower", ["<Primary><Shift>l"])
-        app.set_accels_for_action("win.duplicate", ["<Primary>d"])
-        app.set_accels_for_action("win.delete_line", ["<Primary><Shift>k"])
-        app.set_accels_for_action("win.move_up", ["<Primary>Up"])
-        app.set_accels_for_action("win.move_down", ["<Primary>Down"])
-        app.set_accels_for_action("win.preferences", ["<Primary>comma"])
-        app.set_accels_for_action("win.format_json", ["<Primary><Shift>j"])
-        app.set_accels_for_action("win.format_xml", ["<Primary><Shift>x"])
-        app.set_accels_for_action("win.convert_json", ["<Primary><Alt>l"])
-        app.set_accels_for_action("win.hex_view", ["<Primary><Shift>h"])
-
     def on_new_window(self, widget, param=None):
         app = self.get_application()
         win = ZenpadWindow(app)
         win.present()
 
-    def on_open_recent(self, recent_chooser):
-        item = recent_chooser.get_current_item()
-        if item:
-            uri = item.get_uri()
-            # Convert file:// uri to path
-            if uri.startswith("file://"):
-                path = uri[7:]
-                # decode %20 etc if needed, but keeping simple
-                import urllib.parse
-                path = urllib.parse.unquote(path)
-                # Use the centralized open method to handle errors/warnings consistently
-                # Don't create new tabs for missing recent files
-                self.open_file_from_path(path, create_if_missing=False)
+    def open_recent_uri(self, uri):
+        # Convert file:// uri to path
+        if uri.startswith("file://"):
+            path = uri[7:]
+            # decode %20 etc if needed, but keeping simple
+            import urllib.parse
+            path = urllib.parse.unquote(path)
+            # Use the centralized open method to handle errors/warnings consistently
+            # Don't create new tabs for missing recent files
+            self.open_file_from_path(path, create_if_missing=False)
 
     def on_save_as(self, widget, param=None):
         page_num = self.notebook.get_current_page()
@@ -1515,21 +947,71 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         n = self.notebook.get_n_pages()
         for i in range(n):
             editor = self.notebook.get_nth_page(i)
-            if editor.file_path:
+            # Writes run concurrently (see FileSaver); unchanged files are left alone
+            if editor.file_path and not editor.read_only and not editor.loader and is_dirty(editor):
                 self.save_to_path(editor, editor.file_path)
             # Alternatively prompt for save as, but usually save all just saves known files
 
     def on_reload(self, widget, param=None):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
-        editor = self.notebook.get_nth_page(page_num)
-        if editor.file_path and os.path.exists(editor.file_path):
+        self.reload_tab(self.notebook.get_nth_page(page_num))
+
+    def reload_tab(self, editor):
+        """
+        Brings the tab up to date with its file. Only the changed lines are
+        replaced (see FileReloader), as one undoable step; a full load is the
+        fallback when that is not possible.
+        """
+        if not editor.file_path or not os.path.exists(editor.file_path):
+            return
+        if editor.follower:
+            editor.follower.read(restart=True)
+            return
+        if editor.reloader:
+            return
+        if editor.read_only:
+            # Large file mode: map and index the file again, never into the buffer
             try:
-                with open(editor.file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                editor.set_text(content)
-            except Exception as e:
-                print(f"Error reloading: {e}")
+                editor.reload()
+            except (OSError, ValueError) as e:
+                self.show_error(f"Error reloading file: {e}")
+            self.update_tab_label(editor)
+            return
+        if editor.loader or editor.pending or editor.partial:
+            self.full_reload(editor)
+            return
+
+        def on_reloaded(reloader):
+            editor.reloader = None
+            if self.notebook.page_num(editor) == -1 or reloader.cancelled:
+                return
+            if reloader.error:
+                # E.g. no longer valid in the tab's encoding
+                print(f"Reloading changes failed ({reloader.error}), loading the whole file")
+                self.full_reload(editor)
+                return
+            if self.journal:
+                self.journal.rebase(editor)
+            self.watch_tab(editor)
+            self.update_tab_label(editor)
+            if self.notebook.page_num(editor) == self.notebook.get_current_page():
+                self.update_document_state(editor)
+
+        editor.reloader = FileReloader(editor, editor.file_path, on_done=on_reloaded)
+        editor.reloader.start()
+
+    def full_reload(self, editor):
+        line, column = editor.get_cursor_position()
+
+        def on_loaded(loader):
+            if loader.error:
+                # The loader put the tab's text back
+                print(f"Error reloading {editor.file_path}: {loader.error}")
+            elif not loader.cancelled:
+                self.goto_line(editor, line, column - 1)
+
+        self.load_file(editor, editor.file_path, on_done=on_loaded)
 
     def on_print(self, widget, param=None):
         # Basic print scaffolding
@@ -1547,20 +1029,50 @@ class ZenpadWindow(Gtk.ApplicationWindow):
     def on_detach_tab(self, widget, param=None):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
-        
-        # Get content and path
-        editor = self.notebook.get_nth_page(page_num)
-        text = editor.get_text()
+        self.detach_tab(self.notebook.get_nth_page(page_num))
+
+    def detach_tab(self, editor):
+        """Moves the tab's document into a new window."""
+        if editor.pending:
+            # Nothing is loaded yet: load it, then move what was loaded
+            def on_loaded(loader):
+                if not loader.cancelled and not loader.error and self.notebook.page_num(editor) != -1:
+                    self.detach_tab(editor)
+            self.materialize_tab(editor, on_done=on_loaded)
+            return
+
         path = editor.file_path
-        title = os.path.basename(path) if path else "Untitled"
-        
+        # The buffer only holds part of the file (still loading, the end of
+        # a followed log, a large file's window): copying it would let a
+        # Save overwrite the file with that part, so open the file instead
+        reopen = path and (editor.loader or editor.partial or editor.follower or editor.read_only)
+        if reopen:
+            encoding = editor.loader.encoding if editor.loader else editor.encoding
+            line, column = (None, None) if editor.loader else editor.get_cursor_position()
+        else:
+            text = editor.get_text()
+            dirty = is_dirty(editor)
+
         # Remove from current
-        self.close_tab(page_num)
-        
+        self.close_tab(self.notebook.page_num(editor))
+
         # Create new window with this tab
         app = self.get_application()
         win = ZenpadWindow(app)
-        win.add_tab(text, title, path)
+        if reopen:
+            win.open_file_from_path(path, line=line, column=column - 1 if column else None,
+                                    encoding=encoding, create_if_missing=False)
+        else:
+            moved = win.add_tab(text, os.path.basename(path) if path else "Untitled", path)
+            # Saving must write the file back the way it is stored
+            moved.encoding, moved.newline, moved.bom = editor.encoding, editor.newline, editor.bom
+            moved.disk_signature, moved.disk_hash = editor.disk_signature, editor.disk_hash
+            moved.disk_md5, moved.text_md5 = editor.disk_md5, editor.text_md5
+            if dirty:
+                # Keep the unsaved changes unsaved: the saved state is an earlier one
+                moved.dirty.mark_saved(digest=editor.dirty.saved_hash, snapshot=(-1, editor.dirty.saved_length))
+                moved.buffer.set_modified(True)
+            win.watch_tab(moved)
         # Remove the initial empty tab of new window if it exists
         if win.notebook.get_n_pages() > 1:
             win.notebook.remove_page(0)
@@ -1569,23 +1081,10 @@ class ZenpadWindow(Gtk.ApplicationWindow):
     def on_new_tab(self, widget, param=None):
         self.add_tab()
         
-    def on_close_current_tab(self, widget=None, param=None):
-        n_pages = self.notebook.get_n_pages()
-        if n_pages == 1:
-            self.close()
-            return
-        
-        page_num = self.notebook.get_current_page()
-        if page_num != -1:
-            editor = self.notebook.get_nth_page(page_num)
-            if self.check_unsaved_changes(editor):
-                self.close_tab(page_num)
-
-    def close_tab(self, page_num):
-        self.notebook.remove_page(page_num)
-
-    def add_tab(self, content=None, title="Untitled", path=None):
-        editor = EditorTab(self.search_settings)
+    def add_tab(self, content=None, title="Untitled", path=None, editor=None, select=True):
+        # A prepared tab (e.g. LargeFileTab) can be passed in instead
+        if editor is None:
+            editor = EditorTab(self.search_settings)
         if content is not None:
             editor.set_text(content)
         
@@ -1635,47 +1134,32 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         editor.buffer.connect("notify::language", lambda w, p: self.update_tab_label(editor))
         # Content changed signal (for Markdown Preview)
         editor.buffer.connect("changed", lambda w: self.on_buffer_changed(editor))
-        # Search signals
-        if editor.search_context:
-             editor.search_context.connect("notify::occurrences-count", lambda w, p: self.update_match_count(editor))
+        # Search signals are connected when the tab gets its search context (attach_search)
 
         # Apply Global Settings to New Tab
-        editor.view.set_show_line_numbers(self.show_line_numbers)
+        editor.set_show_line_numbers(self.show_line_numbers)
+        self.update_editable(editor)
         editor.view.set_highlight_current_line(self.settings.get("highlight_current_line"))
         editor.view.set_wrap_mode(Gtk.WrapMode.WORD if self.doc_word_wrap else Gtk.WrapMode.NONE)
         editor.view.set_auto_indent(self.doc_auto_indent)
         editor.view.set_tab_width(self.doc_tab_size)
         editor.view.set_insert_spaces_instead_of_tabs(self.doc_use_spaces)
-        
-        # Apply Font
-        font_name = self.settings.get("font")
-        if font_name:
-             font_desc = Pango.FontDescription(font_name)
-             editor.view.modify_font(font_desc)
-             editor.font_desc = font_desc
-        
-        # Apply Theme
-        editor.set_scheme(self.settings.get("theme"))
-
-        # Apply Padding
-        pad_map = {"small": 2, "normal": 6, "large": 12}
-        margin = pad_map.get(self.settings.get("editor_padding"), 6)
-        editor.view.set_left_margin(margin)
-        editor.view.set_right_margin(margin)
+        # The font comes from the shared CSS provider (zenpad.appearance)
+        editor.set_scheme(self.doc_scheme)
+        editor.apply_style("editor_padding", self.settings.get("editor_padding"))
 
         # Reset modified flag (ensure opening file/new tab is clean)
         editor.buffer.set_modified(False)
 
-        # Initialize last_buffer for new tabs
-        content = editor.buffer.get_text(editor.buffer.get_start_iter(), editor.buffer.get_end_iter(), True)
-        editor.last_buffer = hashlib.md5(content.encode("UTF-8")).hexdigest()
+        # Record the saved state for dirty tracking (reuses the text we were given)
+        editor.dirty.mark_saved(content if content is not None else "")
 
-        # Switch to the new tab
-        # Reset modified flag (ensure opening file/new tab is clean)
-        editor.buffer.set_modified(False)
+        if self.journal and not editor.read_only:
+            self.journal.attach(editor)
         
         # Switch to the new tab
-        self.notebook.set_current_page(index)
+        if select:
+            self.notebook.set_current_page(index)
         self.update_tab_label(editor)
         return editor
 
@@ -1708,15 +1192,17 @@ class ZenpadWindow(Gtk.ApplicationWindow):
              name = os.path.basename(editor.file_path) if editor.file_path else "Untitled"
              
              # Check for unsaved changes
-             content = editor.buffer.get_text(editor.buffer.get_start_iter(), editor.buffer.get_end_iter(), True)
-             saved = hashlib.md5(content.encode("UTF-8")).hexdigest() == editor.last_buffer
-             
-             if editor.buffer.get_modified() and not saved:
+             if is_dirty(editor):
                  name += " ●"
                  
              label_widget.set_text(name)
              if editor.file_path:
-                 tab_widget.set_tooltip_text(editor.file_path)
+                 tooltip = editor.file_path
+                 if editor.last_auto_save:
+                     tooltip += time.strftime("\nAuto-saved at %H:%M:%S", time.localtime(editor.last_auto_save))
+                 if editor.follower:
+                     tooltip += "\nFollowing changes (tail -f)"
+                 tab_widget.set_tooltip_text(tooltip)
 
         # Update Language Indicators
         lang = editor.buffer.get_language()
@@ -1820,7 +1306,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         if page_num == -1: return
 
         # Check for unsaved changes first
-        if not self.check_unsaved_changes(editor):
+        if not self.check_unsaved_changes(editor, on_saved=lambda: self.on_close_clicked(editor)):
             return
 
         # If it's the last tab, close the window
@@ -1845,7 +1331,13 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         
         dialog.destroy()
 
-    def open_file_from_path(self, file_path, line=None, column=None, encoding=None, create_if_missing=True):
+    @trace.traced()
+    def open_file_from_path(self, file_path, line=None, column=None, encoding=None, create_if_missing=True, lazy=False):
+        """
+        Opens file_path in a new tab. With lazy, only the tab header is
+        created; the content is loaded when the tab is first shown or in
+        the background (see materialize_tab).
+        """
         if not os.path.exists(file_path):
              # Warn user first
              dialog = Gtk.MessageDialog(
@@ -1872,55 +1364,377 @@ class ZenpadWindow(Gtk.ApplicationWindow):
              # If I type, it becomes modified. That's fine.
              return
 
-        try:
-            # If encoding specified, try it strictly?
-            if encoding:
-                 with open(file_path, "r", encoding=encoding) as f:
-                     content = f.read()
-            else:
-                # Try UTF-8 first
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
+        threshold = self.settings.get("large_file_threshold")
+        if threshold and os.path.getsize(file_path) >= threshold * 1024 * 1024:
+            return self.open_large_file(file_path, line, column, encoding)
+
+        if lazy:
+            editor = self.add_tab(None, os.path.basename(file_path), file_path, select=False)
+            # Set after add_tab: adding the first page switches to it
+            editor.pending = {"line": line, "column": column, "encoding": encoding}
+            self.queue_materialize(editor)
+            return editor
 
-            editor = self.add_tab(content, os.path.basename(file_path), file_path)
-            last_text = editor.buffer.get_text(editor.buffer.get_start_iter(), editor.buffer.get_end_iter(), True)
+        editor = self.add_tab(None, os.path.basename(file_path), file_path)
+
+        def on_loaded(loader):
+            if loader.cancelled or loader.error:
+                # Drop the half-loaded tab
+                self.discard_tab(editor)
+                if loader.error:
+                    self.show_error(f"Error opening file: {loader.error}")
+                return
+
+            if loader.used_fallback:
+                # The status bar shows the encoding; no need to block on a dialog
+                print(f"Detected encoding did not fit {file_path}, opened as {loader.encoding.upper()}")
 
-            editor.last_buffer = hashlib.md5(last_text.encode(encoding if encoding else "UTF-8")).hexdigest()
             if line is not None:
                 self.goto_line(editor, line, column)
-            
+
             # Add to Recent
             manager = Gtk.RecentManager.get_default()
             manager.add_item("file://" + file_path)
-            
-        except UnicodeDecodeError:
-            # Fallback to Latin-1 or other permissive encoding
-            print(f"UTF-8 decode failed for {file_path}, trying ISO-8859-1")
-            try:
-                with open(file_path, "r", encoding="iso-8859-1") as f:
-                    content = f.read()
-                
-                # Warn user
-                dlg = Gtk.MessageDialog(parent=self, modal=True, message_type=Gtk.MessageType.WARNING,
-                                        buttons=Gtk.ButtonsType.OK, text="Encoding Warning")
-                dlg.format_secondary_text(f"The file '{os.path.basename(file_path)}' could not be opened as UTF-8.\nOpened using ISO-8859-1 fallback. Some characters may display incorrectly.")
-                dlg.run()
-                dlg.destroy()
-                
-                # If we failed to get content in fallback, maybe add empty?
-                # But here we are just adding what we got?
-                # Actually earlier code flow:
-                # self.add_tab(content, ...)
-                # So we should be consistent.
-                # Just capture it.
-                editor = self.add_tab(content, os.path.basename(file_path), file_path)
-                if line is not None:
-                    self.goto_line(editor, line, column)
-            except Exception as e:
-                self.show_error(f"Error opening binary/incompatible file: {e}")
-                
-        except Exception as e:
+
+        self.load_file(editor, file_path, encoding, on_loaded)
+        return editor
+
+    def open_large_file(self, file_path, line=None, column=None, encoding=None):
+        """Opens file_path memory-mapped and read-only (see LargeFileTab)."""
+        try:
+            editor = LargeFileTab(file_path, self.search_settings, encoding)
+        except (OSError, ValueError, LookupError) as e:
             self.show_error(f"Error opening file: {e}")
+            return None
+
+        self.add_tab(None, os.path.basename(file_path), file_path, editor=editor)
+        if line is not None:
+            self.goto_line(editor, line, column)
+
+        manager = Gtk.RecentManager.get_default()
+        manager.add_item("file://" + file_path)
+        return editor
+
+    def load_file(self, editor, path, encoding=None, on_done=None):
+        """
+        Loads path into editor in the background (see FileLoader), with a
+        progress bar and cancel button in the tab header meanwhile.
+        Every way of getting a file from disk into a tab goes through here.
+        """
+        if editor.loader:
+            editor.loader.cancel()
+
+        progress = None
+
+        def on_loaded(loader):
+            if progress:
+                progress.destroy()
+            if not loader.error and not loader.cancelled:
+                editor.partial = False
+            # Viewer mode may have changed meanwhile
+            self.update_editable(editor)
+            if not loader.error and not loader.cancelled:
+                if self.journal:
+                    self.journal.rebase(editor)
+                self.watch_tab(editor)
+            self.update_tab_label(editor)
+            if self.notebook.page_num(editor) == self.notebook.get_current_page():
+                self.update_document_state(editor)
+            if on_done:
+                on_done(loader)
+
+        loader = FileLoader(editor, path, encoding, on_done=on_loaded)
+        progress = self.add_load_progress(editor, loader)
+        loader.start()
+        return loader
+
+    def add_load_progress(self, editor, loader):
+        """Puts a LoadProgress for loader into the tab header."""
+        tab_widget = self.notebook.get_tab_label(editor)
+        hbox = tab_widget.get_child() if isinstance(tab_widget, Gtk.EventBox) else tab_widget
+        if not hbox:
+            return None
+        progress = LoadProgress(loader)
+        hbox.pack_start(progress, False, False, 0)
+        # Keep the close button last
+        hbox.reorder_child(progress, len(hbox.get_children()) - 2)
+        return progress
+
+    def open_stream(self, stream, title="Stdin", encoding=None):
+        """
+        Opens a new tab that fills with stream's content as it arrives
+        (see StreamLoader), e.g. `some-command | zenpad -`.
+        """
+        try:
+            editor = EditorTab(self.search_settings)
+            loader = StreamLoader(editor, stream, encoding)
+        except LookupError:
+            self.show_error(f"Unknown encoding: {encoding}")
+            return None
+        self.add_tab(title=title, editor=editor)
+
+        def on_streamed(loader):
+            if progress:
+                progress.destroy()
+            if loader.error:
+                print(f"Error reading {title}: {loader.error}")
+            self.update_tab_label(editor)
+            if self.notebook.page_num(editor) == self.notebook.get_current_page():
+                self.update_document_state(editor)
+
+        loader.on_done = on_streamed
+        progress = self.add_load_progress(editor, loader)
+        loader.start()
+        return loader
+
+    @trace.traced()
+    def materialize_tab(self, editor, on_done=None):
+        """Loads the content of a lazily opened tab and restores its cursor and scroll."""
+        state = editor.pending
+        if not state:
+            return
+        editor.pending = None
+
+        def on_loaded(loader):
+            if loader.cancelled or loader.error:
+                if loader.error:
+                    print(f"Error loading {editor.file_path}: {loader.error}")
+                    self.discard_tab(editor)
+            else:
+                self.restore_view_state(editor, state)
+                manager = Gtk.RecentManager.get_default()
+                manager.add_item("file://" + editor.file_path)
+            if on_done:
+                on_done(loader)
+
+        self.load_file(editor, editor.file_path, state.get("encoding"), on_loaded)
+
+    def queue_materialize(self, editor):
+        """Loads the tab at idle priority unless it is shown first."""
+        self.restore_queue.append(editor)
+        if not self.restore_source_id:
+            self.restore_source_id = GLib.idle_add(self.on_restore_idle, priority=GLib.PRIORITY_LOW)
+
+    def on_restore_idle(self):
+        self.restore_source_id = 0
+        while self.restore_queue:
+            editor = self.restore_queue.pop(0)
+            if editor.pending and self.notebook.page_num(editor) != -1:
+                # One at a time: the next starts once this one is in
+                def on_loaded(loader):
+                    if self.restore_queue and not self.restore_source_id:
+                        self.restore_source_id = GLib.idle_add(self.on_restore_idle, priority=GLib.PRIORITY_LOW)
+                    elif not self.restore_queue:
+                        self.log_restore_done()
+                self.materialize_tab(editor, on_loaded)
+                return False
+        self.log_restore_done()
+        return False
+
+    def log_restore_done(self):
+        # Only for the startup restore, not for later bulk opens
+        if self.startup_time is None:
+            return
+        elapsed = (time.perf_counter() - self.startup_time) * 1000
+        trace.instant("all tabs loaded", category="startup", ms=round(elapsed))
+        self.startup_time = None
+
+    def log_first_paint(self):
+        """Traces the time from window creation to its first painted frame (see zenpad.trace)."""
+        clock = self.get_frame_clock()
+        if not clock:
+            return
+
+        def on_after_paint(clock):
+            clock.disconnect(handler_id)
+            if self.startup_time is None:
+                return
+            elapsed = (time.perf_counter() - self.startup_time) * 1000
+            pending = sum(1 for i in range(self.notebook.get_n_pages()) if self.notebook.get_nth_page(i).pending)
+            trace.instant("first paint", category="startup", ms=round(elapsed),
+                          tabs=self.notebook.get_n_pages(), pending=pending)
+
+        handler_id = clock.connect("after-paint", on_after_paint)
+
+    def get_view_state(self, editor):
+        """Cursor and first visible line of a tab, for the session file."""
+        if editor.pending:
+            return {"line": editor.pending.get("line"), "column": editor.pending.get("column"),
+                    "top": editor.pending.get("top")}
+        line, column = editor.get_cursor_position()
+        state = {"line": line, "column": column - 1}
+        if not isinstance(editor, LargeFileTab):
+            rect = editor.view.get_visible_rect()
+            top, _ = editor.view.get_line_at_y(rect.y)
+            state["top"] = top.get_line() + 1
+        return state
+
+    def restore_view_state(self, editor, state):
+        """Applies get_view_state() output once the tab's content is in."""
+        buff = editor.buffer
+        line = state.get("line")
+        if line:
+            iter_ = buff.get_iter_at_line(max(0, line - 1))
+            if state.get("column"):
+                iter_.forward_chars(int(state["column"]))
+            buff.place_cursor(iter_)
+
+        # Marks scroll once the view is laid out, even on a hidden tab
+        top = state.get("top")
+        if top:
+            mark = buff.create_mark(None, buff.get_iter_at_line(top - 1), True)
+            editor.view.scroll_to_mark(mark, 0.0, True, 0.0, 0.0)
+            buff.delete_mark(mark)
+        elif line:
+            editor.view.scroll_to_mark(buff.get_insert(), 0.0, True, 0.0, 0.5)
+
+    def on_page_removed(self, notebook, child, page_num):
+        if child is self.search_editor:
+            child.detach_search()
+            self.search_editor = None
+        if self.journal:
+            self.journal.detach(child)
+        self.unwatch_tab(child)
+        if child.follower:
+            child.follower.stop()
+
+    def watch_tab(self, editor):
+        """Follows changes to the tab's file on disk (see zenpad.filewatch)."""
+        path = editor.file_path
+        if not path or editor.read_only or editor.follower:
+            return
+        if editor.file_watch and editor.file_watch[0] == path:
+            return
+        self.unwatch_tab(editor)
+        callback = lambda path: self.on_disk_change(editor)
+        get_watcher().watch(path, callback)
+        editor.file_watch = (path, callback)
+
+    def unwatch_tab(self, editor):
+        if editor.file_watch:
+            get_watcher().unwatch(*editor.file_watch)
+            editor.file_watch = None
+
+    def on_disk_change(self, editor):
+        # Our own loads, saves and reloads update the signature themselves
+        if editor.loader or editor.saver or editor.reloader or editor.pending:
+            return
+
+        def on_result(changed, signature):
+            if self.notebook.page_num(editor) == -1:
+                return
+            if changed is None:
+                print(f"{editor.file_path} was removed from disk")
+            elif not changed:
+                # Touched or rewritten with the same bytes
+                editor.disk_signature = signature
+            elif not is_dirty(editor) and self.settings.get("auto_reload"):
+                self.reload_tab(editor)
+            else:
+                editor.changed_on_disk = True
+                if self.notebook.page_num(editor) == self.notebook.get_current_page():
+                    self.prompt_reload(editor)
+
+        check_file(editor.file_path, editor.disk_signature, editor.disk_hash, on_result)
+
+    def prompt_reload(self, editor):
+        if not editor.changed_on_disk or self.notebook.page_num(editor) == -1:
+            return
+        editor.changed_on_disk = False
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            flags=0,
+            message_type=Gtk.MessageType.WARNING,
+            buttons=Gtk.ButtonsType.NONE,
+            text=f"\"{os.path.basename(editor.file_path)}\" changed on disk.",
+        )
+        if is_dirty(editor):
+            dialog.format_secondary_text("Reload it from disk? Your unsaved changes will be lost.")
+        else:
+            dialog.format_secondary_text("Reload it from disk?")
+        dialog.add_buttons("Keep Current", Gtk.ResponseType.CANCEL, "Reload", Gtk.ResponseType.OK)
+        response = dialog.run()
+        dialog.destroy()
+
+        if response == Gtk.ResponseType.OK:
+            self.reload_tab(editor)
+        else:
+            # Keep ours: do not ask again for this version of the file
+            editor.disk_signature = file_signature(editor.file_path)
+            editor.disk_hash = None
+            editor.disk_md5 = editor.text_md5 = None
+
+    def on_window_destroy(self, widget):
+        self.settings.unsubscribe(self.apply_setting)
+        self.auto_saver.stop()
+        # Closed normally, after the unsaved changes prompts: nothing to recover
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    @trace.traced(category="startup")
+    def offer_recovery(self):
+        """Offers to restore the unsaved tabs of instances that crashed."""
+        journals = find_orphans()
+        recovered = []
+        for path in journals:
+            try:
+                recovered.extend(replay(path))
+            except (OSError, ValueError) as e:
+                print(f"Cannot read recovery journal {path}: {e}")
+        documents = [(path, text) for path, text, error in recovered if error is None]
+        failed = [(path, error) for path, text, error in recovered if error is not None]
+
+        if documents or failed:
+            lines = [os.path.basename(path) if path else "Untitled" for path, text in documents]
+            lines += [f"{os.path.basename(path)} (cannot be recovered: {error})" for path, error in failed]
+            dialog = Gtk.MessageDialog(
+                transient_for=self,
+                flags=0,
+                message_type=Gtk.MessageType.QUESTION,
+                buttons=Gtk.ButtonsType.NONE,
+                text="Recover unsaved documents?",
+            )
+            dialog.format_secondary_text(
+                "Zenpad did not shut down properly. Unsaved changes were found for:\n\n" + "\n".join(lines)
+            )
+            dialog.add_buttons("Discard", Gtk.ResponseType.REJECT)
+            if documents:
+                dialog.add_buttons("Recover", Gtk.ResponseType.ACCEPT)
+            response = dialog.run()
+            dialog.destroy()
+
+            if response == Gtk.ResponseType.ACCEPT:
+                for path, text in documents:
+                    self.add_recovered_tab(path, text)
+
+        # Recovered tabs are in our own journal now
+        for path in journals:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        return False
+
+    def add_recovered_tab(self, path, text):
+        # A clean copy of the same file (from the session) would only confuse
+        stale = [self.notebook.get_nth_page(i) for i in range(self.notebook.get_n_pages())]
+        stale = [editor for editor in stale
+                 if path and editor.file_path == path and not is_dirty(editor) and not editor.loader]
+
+        editor = self.add_tab(None, os.path.basename(path) if path else "Untitled", path)
+        # Undoable and unsaved, like any other edit
+        editor.buffer.set_text(text)
+        for old in stale:
+            self.notebook.remove_page(self.notebook.page_num(old))
+
+    def discard_tab(self, editor):
+        """Removes a tab without prompting or remembering it (failed loads)."""
+        page_num = self.notebook.page_num(editor)
+        if page_num != -1:
+            self.notebook.remove_page(page_num)
+        if self.notebook.get_n_pages() == 0:
+            self.add_tab()
 
     def show_error(self, message):
         dlg = Gtk.MessageDialog(parent=self, modal=True, message_type=Gtk.MessageType.ERROR,
@@ -1935,15 +1749,12 @@ class ZenpadWindow(Gtk.ApplicationWindow):
             return
         
         editor = self.notebook.get_nth_page(page_num)
-        last_text = editor.buffer.get_text(editor.buffer.get_start_iter(), editor.buffer.get_end_iter(), True)
-
-        editor.last_buffer = hashlib.md5(last_text.encode("UTF-8")).hexdigest()
         if editor.file_path:
             self.save_to_path(editor, editor.file_path)
         else:
             self.save_file_as(editor)
 
-    def save_file_as(self, editor):
+    def save_file_as(self, editor, on_done=None):
         dialog = Gtk.FileChooserDialog(
             title="Save File", parent=self, action=Gtk.FileChooserAction.SAVE
         )
@@ -1956,7 +1767,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         response = dialog.run()
         if response == Gtk.ResponseType.OK:
             file_path = dialog.get_filename()
-            self.save_to_path(editor, file_path)
+            self.save_to_path(editor, file_path, on_done=on_done)
             
             # Add to Recent
             manager = Gtk.RecentManager.get_default()
@@ -1964,28 +1775,64 @@ class ZenpadWindow(Gtk.ApplicationWindow):
             
         dialog.destroy()
 
-    def save_to_path(self, editor, path):
-        try:
-            content = editor.get_text()
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
-            editor.file_path = path
-            editor.buffer.set_modified(False) # Mark as saved
-            editor.detect_language(path)
-            self.update_tab_label(editor)
-        except PermissionError:
-            self.show_error(f"Permission denied: Cannot write to '{path}'.\nCheck file permissions or run as administrator.")
-        except Exception as e:
-            self.show_error(f"Error saving file: {e}")
-
-    def check_unsaved_changes(self, editor):
-        if editor.buffer.get_modified():
-            content = editor.buffer.get_text(editor.buffer.get_start_iter(), editor.buffer.get_end_iter(), True)
-
-            # Changed but content is same, return true
-            if hashlib.md5(content.encode("UTF-8")).hexdigest() == editor.last_buffer:
-                return True
+    @trace.traced()
+    def save_to_path(self, editor, path, auto=False, on_done=None):
+        """
+        Saves editor to path in the background. auto (AutoSaver) reports
+        failures on the console instead of in a dialog. on_done(saver) is
+        called once the write is over, with saver.error set if it failed.
+        """
+        if editor.read_only:
+            self.show_error("This file is open read-only in large file mode.")
+            return
+        if editor.pending:
+            # Never loaded, so never changed: nothing to write
+            return
+        if editor.loader:
+            self.show_error("The file is still loading. Wait for it to finish or cancel it before saving.")
+            return
+        if editor.follower and path == editor.file_path:
+            # The buffer may hold only the last lines of the log
+            self.show_error("Turn off Follow before saving over the file being followed.")
+            return
+        if editor.partial and path == editor.file_path:
+            self.show_error("Only the end of the file is loaded. Reload it before saving over it.")
+            return
 
+        def on_saved(saver):
+            if saver.error and auto:
+                print(f"Auto-save of {path} failed: {saver.error}")
+            elif isinstance(saver.error, PermissionError):
+                self.show_error(f"Permission denied: Cannot write to '{path}'.\nCheck file permissions or run as administrator.")
+            elif saver.error:
+                self.show_error(f"Error saving file: {saver.error}")
+            else:
+                if auto:
+                    editor.last_auto_save = time.time()
+                if editor.file_path != path:
+                    editor.file_path = path
+                    editor.detect_language(path)
+                if self.journal:
+                    self.journal.rebase(editor)
+                self.watch_tab(editor)
+                self.update_tab_label(editor)
+            if on_done:
+                on_done(saver)
+
+        # Written on a worker thread; the tab turns clean once it is on disk
+        FileSaver(editor, path, on_done=on_saved).start()
+
+    def check_unsaved_changes(self, editor, on_saved=None):
+        """
+        Asks whether to save a modified tab before it is closed. Returns True
+        if the close can go ahead now. Saving is asynchronous, so "Save"
+        returns False and calls on_saved() once the file is written; that
+        should retry the close, which then finds the tab clean.
+        """
+        if editor.loader:
+            # Still loading: nothing of the user's to lose
+            return True
+        if is_dirty(editor):
             filename = os.path.basename(editor.file_path) if editor.file_path else "Untitled"
             dialog = Gtk.MessageDialog(
                 transient_for=self,
@@ -2005,11 +1852,15 @@ class ZenpadWindow(Gtk.ApplicationWindow):
             dialog.destroy()
             
             if response == Gtk.ResponseType.YES:
-                self.on_save_file(None)
-                # Check if save was successful (buffer not modified)
-                if editor.buffer.get_modified():
-                    return False # Save failed or cancelled
-                return True
+                def on_done(saver):
+                    # A failed save keeps the tab open (the error was shown)
+                    if not saver.error and on_saved:
+                        on_saved()
+                if editor.file_path:
+                    self.save_to_path(editor, editor.file_path, on_done=on_done)
+                else:
+                    self.save_file_as(editor, on_done=on_done)
+                return False # Closed from on_done once written
             elif response == Gtk.ResponseType.REJECT:
                 return True # Close without saving
             else:
@@ -2025,11 +1876,13 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         page_num = self.notebook.get_current_page()
         if page_num != -1:
             editor = self.notebook.get_nth_page(page_num)
-            if self.check_unsaved_changes(editor):
+            if self.check_unsaved_changes(editor, on_saved=lambda: self.on_close_clicked(editor)):
                 self.close_tab(page_num)
 
     def close_tab(self, page_num):
         editor = self.notebook.get_nth_page(page_num)
+        if editor.loader:
+            editor.loader.cancel()
         if editor.file_path:
              self.closed_tabs.append((editor.file_path, editor.get_cursor_position()))
         self.notebook.remove_page(page_num)
@@ -2039,7 +1892,15 @@ class ZenpadWindow(Gtk.ApplicationWindow):
 
     def on_tab_switched(self, notebook, page, page_num):
         editor = self.notebook.get_nth_page(page_num)
-        self.update_statusbar(editor)
+        # Before it is drawn: settings changed while it was hidden
+        editor.apply_pending_style()
+        # The search context moves along to the tab in front
+        self.attach_search(editor)
+        if editor.pending:
+            self.materialize_tab(editor)
+        elif editor.changed_on_disk:
+            GLib.idle_add(self.prompt_reload, editor)
+        self.update_document_state(editor)
         self.update_language_label(editor) # Force update usage
         self.update_match_count(editor) # Update search count for this tab
         
@@ -2062,10 +1923,8 @@ class ZenpadWindow(Gtk.ApplicationWindow):
 
     def update_title(self, editor):
         filename = os.path.basename(editor.file_path) if editor.file_path else "Untitled"
-        content = editor.buffer.get_text(editor.buffer.get_start_iter(), editor.buffer.get_end_iter(), True)
-        saved = hashlib.md5(content.encode("UTF-8")).hexdigest() == editor.last_buffer
 
-        if editor.buffer.get_modified() and not saved:
+        if is_dirty(editor):
             self.set_title(f"*{filename} - Zenpad")
         else:
             self.set_title(f"{filename} - Zenpad")
@@ -2075,19 +1934,20 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         line, col = editor.get_cursor_position()
         
         # Info
-        encoding = "UTF-8" # Default for now
+        encoding = editor.encoding.upper()
+        if editor.bom:
+            encoding += " (BOM)"
         le_label = {
             "\n": "Unix (LF)",
             "\r\n": "Windows (CRLF)",
             "\r": "Mac (CR)",
-            "Current": "Unix (LF)" # Default assumption
-        }.get(self.doc_line_ending, "Unix (LF)")
+        }.get(editor.newline, "Unix (LF)")
         
         self.statusbar.pop(0) # Remove old
         self.statusbar.push(0, f"Line {line}, Column {col}  |  {encoding}  |  {le_label}")
 
     def on_preferences_clicked(self, widget):
-        dialog = PreferencesDialog(self)
+        dialog = lazy.load("preferences").PreferencesDialog(self)
         dialog.run()
         dialog.destroy()
 
@@ -2098,57 +1958,48 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         elif key == "auto_indent": self.doc_auto_indent = value
         elif key == "tab_width": self.doc_tab_size = int(value)
         elif key == "use_spaces": self.doc_use_spaces = value
+        elif key == "theme": self.doc_scheme = value
+        elif key in ("auto_save", "auto_save_interval"):
+            self.auto_saver.configure(self.settings.get("auto_save"), self.settings.get("auto_save_interval"))
+        elif key == "follow_max_lines":
+            for i in range(self.notebook.get_n_pages()):
+                follower = self.notebook.get_nth_page(i).follower
+                if follower:
+                    follower.max_lines = value
+            return
+        elif key == "font":
+            # One provider restyles every view
+            get_appearance().set_font(value)
+            return
+        # Keep the menu's check and radio items in step
+        menus.sync_window_action(self, key)
         
-        # Iterate over all tabs and apply setting
-        n_pages = self.notebook.get_n_pages()
-        for i in range(n_pages):
-            editor = self.notebook.get_nth_page(i)
-            view = editor.view
-            
-            if key == "line_numbers" or key == "show_line_numbers":
-                view.set_show_line_numbers(value)
-            elif key == "word_wrap":
-                view.set_wrap_mode(Gtk.WrapMode.WORD if value else Gtk.WrapMode.NONE)
-            elif key == "highlight_current_line":
-                view.set_highlight_current_line(value)
-            elif key == "auto_indent":
-                view.set_auto_indent(value)
-            elif key == "tab_width":
-                view.set_tab_width(int(value))
-            elif key == "use_spaces":
-                view.set_insert_spaces_instead_of_tabs(value)
-            elif key == "theme":
-                editor.set_scheme(value)
-            elif key == "font":
-                font_desc = Pango.FontDescription(value)
-                editor.view.modify_font(font_desc)
-                editor.font_desc = font_desc # Update editor's stored desc
-            elif key == "editor_padding":
-                pad_map = {"small": 2, "normal": 6, "large": 12}
-                margin = pad_map.get(value, 6)
-                view.set_left_margin(margin)
-                view.set_right_margin(margin)
-
-        # Also store these settings to persistence if needed (not implemented yet)
+        self.restyle_tabs(key, value)
 
     def save_session(self, widget, event):
         # 1. Check for unsaved changes in ALL tabs
         n_pages = self.notebook.get_n_pages()
         for i in range(n_pages):
             editor = self.notebook.get_nth_page(i)
-            if not self.check_unsaved_changes(editor):
+            if not self.check_unsaved_changes(editor, on_saved=self.close):
                 return True # Cancel close
 
         # 2. Save Session Data
         session_data = {
             "window_size": self.get_size(),
-            "files": []
+            "files": [],
+            "active": 0,
         }
         
+        current = self.notebook.get_current_page()
         for i in range(n_pages):
              editor = self.notebook.get_nth_page(i)
              if editor.file_path:
-                 session_data["files"].append(editor.file_path)
+                 if i == current:
+                     session_data["active"] = len(session_data["files"])
+                 entry = {"path": editor.file_path}
+                 entry.update(self.get_view_state(editor))
+                 session_data["files"].append(entry)
                  
         try:
             config_dir = os.path.join(os.path.expanduser("~"), ".config", "zenpad")
@@ -2162,25 +2013,46 @@ class ZenpadWindow(Gtk.ApplicationWindow):
             
         return False # Allow closing
 
+    @trace.traced(category="startup")
     def load_session(self):
+        """
+        Reopens the tabs of the last session. Only the active tab is loaded
+        right away; the others get their header now and their content when
+        first shown or in the background.
+        """
         config_path = os.path.join(os.path.expanduser("~"), ".config", "zenpad", "session.json")
         if os.path.exists(config_path):
             try:
                 with open(config_path, "r") as f:
-                    paths = json.load(f)
-                    for path in paths:
-                        if os.path.exists(path):
-                            with open(path, "r", encoding="utf-8") as f_content:
-                                self.add_tab(f_content.read(), os.path.basename(path), path)
+                    session = json.load(f)
+                # Older sessions were a plain list of paths
+                if isinstance(session, list):
+                    session = {"files": session}
+
+                if session.get("window_size"):
+                    self.resize(*session["window_size"])
+
+                active = None
+                for i, entry in enumerate(session.get("files", [])):
+                    if isinstance(entry, str):
+                        entry = {"path": entry}
+                    path = entry.get("path")
+                    if not path or not os.path.exists(path):
+                        continue
+                    editor = self.open_file_from_path(path, entry.get("line"), entry.get("column"),
+                                                      create_if_missing=False, lazy=True)
+                    if editor and editor.pending:
+                        editor.pending["top"] = entry.get("top")
+                    if editor and (active is None or i == session.get("active")):
+                        active = editor
+
+                if active:
+                    # Materializes it through on_tab_switched
+                    self.notebook.set_current_page(self.notebook.page_num(active))
+                    if active.pending:
+                        self.materialize_tab(active)
             except Exception as e:
                 print(f"Error loading session: {e}")
-                
-        # If no tabs loaded (list empty or file not found), add default
-        if self.notebook.get_n_pages() == 0:
-            self.add_tab()
-
-        if self.notebook.get_n_pages() == 0:
-            self.add_tab()
 
 
     def on_about(self, widget, param=None):
@@ -2242,10 +2114,9 @@ class ZenpadWindow(Gtk.ApplicationWindow):
                         self.notebook.set_current_page(i)
                         return
                 
-                # Open it
-                with open(path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                self.add_tab(content, os.path.basename(path), path)
+                # Open it where it was left
+                line, column = cursor
+                self.open_file_from_path(path, line=line, column=column - 1)
             else:
                 print(f"File not found: {path}")
 
@@ -2278,12 +2149,15 @@ class ZenpadWindow(Gtk.ApplicationWindow):
          self._modify_all_lines(lambda line: line.rstrip())
 
     # --- Analysis / Tools Handlers ---
+    @trace.traced(category="tools")
     def on_format_json(self, action, parameter):
         self._run_formatter(analysis.format_json, "JSON")
 
+    @trace.traced(category="tools")
     def on_format_xml(self, action, parameter):
         self._run_formatter(analysis.format_xml, "XML")
 
+    @trace.traced(category="tools")
     def on_convert_json(self, action, parameter):
         """Standard converter that makes a NEW TAB with the JSON"""
         import threading
@@ -2324,10 +2198,9 @@ class ZenpadWindow(Gtk.ApplicationWindow):
                  
                  # Force language to JSON immediately to prevent race conditions
                  # This ensures the recursion guard works instantly for the next click
-                 manager = GtkSource.LanguageManager.get_default()
-                 json_lang = manager.get_language("json")
+                 json_lang = lookup_language("json")
                  if json_lang and new_editor:
-                     new_editor.buffer.set_language(json_lang)
+                     new_editor.set_language(json_lang)
                      
             else:
                  self.show_error(f"Failed to convert: {error}")
@@ -2363,6 +2236,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         else:
             self.show_error(f"Failed to format {name}: {error}")
 
+    @trace.traced(category="tools")
     def on_hex_view(self, action, parameter):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
@@ -2384,7 +2258,8 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         # Set Read-Only and Monospace
         new_editor.view.set_editable(False)
         # Maybe set a simpler highlighting or none
-        new_editor.buffer.set_language(None)
+        new_editor.set_language(None)
+    @trace.traced(category="tools")
     def on_calculate_hash(self, action, parameter):
         page_num = self.notebook.get_current_page()
         if page_num == -1: return
@@ -2444,13 +2319,26 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         dialog.run()
         dialog.destroy()
 
+    @trace.traced(category="tools")
     def on_transform_text(self, mode):
         """Helper to run text transformation"""
         self._run_formatter(lambda text: analysis.transform_text(text, mode), mode)
 
+    @trace.traced(category="tools")
     def on_markdown_preview(self, action, parameter):
-        if not markdown_preview:
-            cmd = "sudo apt install gir1.2-webkit2-4.1 python3-markdown"
+        if self.md_window and self.md_window.is_visible():
+            self.md_window.present()
+            return
+
+        missing = lazy.missing_markdown_deps()
+        if not missing:
+            try:
+                markdown_preview = lazy.load("markdown_preview")
+            except (ImportError, ValueError) as e:
+                print(f"Markdown preview unavailable: {e}")
+                missing = ["gir1.2-webkit2-4.1", "python3-markdown"]
+        if missing:
+            cmd = "sudo apt install " + " ".join(missing)
             dialog = Gtk.MessageDialog(
                 transient_for=self,
                 flags=0,
@@ -2471,27 +2359,34 @@ class ZenpadWindow(Gtk.ApplicationWindow):
             dialog.destroy()
             return
 
-        if self.md_window and self.md_window.is_visible():
-            self.md_window.present()
-        else:
-            self.md_window = markdown_preview.MarkdownPreviewWindow(self)
-            self.md_window.show_all()
-            # Initial Update
-            page_num = self.notebook.get_current_page()
-            if page_num != -1:
-                editor = self.notebook.get_nth_page(page_num)
-                self.md_window.update_content(editor.get_text())
+        self.md_window = markdown_preview.MarkdownPreviewWindow(self)
+        self.md_window.show_all()
+        # Initial Update
+        page_num = self.notebook.get_current_page()
+        if page_num != -1:
+            editor = self.notebook.get_nth_page(page_num)
+            self.md_window.update_content(editor.get_text())
+
+    def on_handler_latency(self, action, parameter):
+        active = profiler.get_profiler()
+        if not active:
+            self.show_error(f"Profiling is off. Start Zenpad with --profile or {profiler.ENV_VAR}=1.")
+            return
+        profiler.ProfilerDialog(self, active)
 
     def on_buffer_changed(self, editor):
         """Called when any buffer changes content"""
+        self.auto_saver.note_edit()
         # Only update if preview is open AND the changed buffer is the ACTIVE one
         if self.md_window and self.md_window.is_visible():
             page_num = self.notebook.get_current_page()
             if page_num != -1:
                 active_editor = self.notebook.get_nth_page(page_num)
                 if active_editor == editor:
-                    self.md_window.update_content(editor.get_text())
+                    # Debounced; the text is only fetched once typing pauses
+                    self.md_window.queue_update(editor.get_text)
 
+    @trace.traced(category="tools")
     def on_compare_tabs(self, action, parameter):
         current_page = self.notebook.get_current_page()
         if current_page == -1: return
@@ -2504,6 +2399,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
             name = os.path.basename(editor.file_path) if editor.file_path else f"Untitled {i+1}"
             titles.append(name)
             
+        diff_viewer = lazy.load("diff_viewer")
         dialog = diff_viewer.DiffDialog(self, current_page, titles)
         response = dialog.run()
         
@@ -2531,9 +2427,9 @@ class ZenpadWindow(Gtk.ApplicationWindow):
                 new_editor.view.set_editable(False)
                 
                 # Try setting 'diff' language
-                lang = GtkSource.LanguageManager.get_default().get_language("diff")
+                lang = lookup_language("diff")
                 if lang:
-                    new_editor.buffer.set_language(lang)
+                    new_editor.set_language(lang)
                     
         dialog.destroy()
 
@@ -2669,7 +2565,7 @@ class ZenpadWindow(Gtk.ApplicationWindow):
         for i in range(n_pages - 1, -1, -1):
             editor = self.notebook.get_nth_page(i)
             if editor != target_editor:
-                if self.check_unsaved_changes(editor):
+                if self.check_unsaved_changes(editor, on_saved=lambda editor=editor: self.on_close_clicked(editor)):
                     self.close_tab(i)
 
     def on_copy_path(self, editor):
@@ -2695,6 +2591,9 @@ class ZenpadWindow(Gtk.ApplicationWindow):
                      print(f"Error opening folder: {e}")
 
     def goto_line(self, editor, line, column=0):
+        if isinstance(editor, LargeFileTab):
+            editor.goto_line(line, column or 0)
+            return
         try:
             buff = editor.buffer
             if line < 1: line = 1